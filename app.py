@@ -1,11 +1,17 @@
-import os
 import streamlit as st
-from vapi_python import Vapi
-from dotenv import load_dotenv
+from voice_backends import open_backend
+from config import load_settings, stylesheet_html
+from metrics import CallTimer
+import metrics
+from call_executor import CallLifecycle, make_executor
+from call_session import connector, sync_session
+from call_state import LIVE_STATES
+from session_manager import SessionBusy, SessionManager, current_session_id, streamlit_session_alive
+from widgets import call_controls
 import time
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (once per process)
+settings = load_settings()
 
 # Set page config
 st.set_page_config(
@@ -15,50 +21,70 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .main-title {
-        font-size: 42px;
-        font-weight: bold;
-        color: #1E88E5;
-        text-align: center;
-        margin-bottom: 30px;
-    }
-    .sub-title {
-        font-size: 24px;
-        color: #424242;
-        text-align: center;
-        margin-bottom: 20px;
-    }
-    .status-active {
-        color: #4CAF50;
-        font-weight: bold;
-    }
-    .status-inactive {
-        color: #F44336;
-        font-weight: bold;
-    }
-    .container {
-        background-color: #f5f5f5;
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(stylesheet_html(st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
+
+# Warm Vapi clients (or the call simulator) shared by every session in this process
+@st.cache_resource
+def get_client_pool():
+    pool = open_backend(settings.voice_backend, settings.api_url)
+    if settings.api_key and settings.prewarm:
+        # Pre-warm in the background at app boot so the first click is fast
+        pool.warm_async(settings.api_key)
+    return pool
+
+client_pool = get_client_pool()
+
+# Call start/stop runs on a bounded thread pool shared by every session
+@st.cache_resource
+def get_call_executor():
+    return make_executor()
+
+# Admission control and orphan reaping for every live call on this node
+@st.cache_resource
+def get_session_manager():
+    manager = SessionManager(
+        max_calls=settings.max_calls,
+        max_calls_per_key=settings.max_calls_per_key,
+        is_alive=streamlit_session_alive
+    )
+    manager.start_reaper()
+    return manager
+
+session_manager = get_session_manager()
+
+# Call latency histograms, exported in OpenMetrics format when configured
+@st.cache_resource
+def get_call_metrics():
+    if settings.metrics_file:
+        metrics.registry.start_exporter(settings.metrics_file)
+    if settings.metrics_port:
+        metrics.registry.serve(settings.metrics_port)
+    return metrics.registry
+
+call_metrics = get_call_metrics()
 
 # Initialize session state variables
 if 'call_active' not in st.session_state:
     st.session_state.call_active = False
 if 'vapi_instance' not in st.session_state:
     st.session_state.vapi_instance = None
+if 'call_started_at' not in st.session_state:
+    st.session_state.call_started_at = None
+if 'call_lifecycle' not in st.session_state:
+    st.session_state.call_lifecycle = CallLifecycle(get_call_executor())
+
+def sync_call_state():
+    # Mirror the background lifecycle into the session keys the rest of the page reads
+    sync_session(st.session_state, st.session_state.call_lifecycle)
+
+sync_call_state()
 
 # Title and description
 st.markdown('<div class="main-title">Vapi Voice Assistant</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-title">Talk to an AI assistant using your voice</div>', unsafe_allow_html=True)
 
 # API Key input
-api_key = os.getenv("VAPI_API_KEY")
+api_key = settings.api_key
 if not api_key:
     api_key = st.text_input("Enter your Vapi API Key:", type="password", 
                            help="Get your API key from the Vapi dashboard")
@@ -89,94 +115,85 @@ with col2:
 
 st.markdown('</div>', unsafe_allow_html=True)
 
-# Call control section
-st.markdown('<div class="container">', unsafe_allow_html=True)
-st.subheader("Voice Call Control")
-
-# Display call status
-status_text = "ACTIVE" if st.session_state.call_active else "INACTIVE"
-status_class = "status-active" if st.session_state.call_active else "status-inactive"
-st.markdown(f"Call Status: <span class='{status_class}'>{status_text}</span>", unsafe_allow_html=True)
-
-# Start/Stop call buttons
-col1, col2 = st.columns(2)
-
 def start_call():
     if not api_key:
         st.error("Please enter your Vapi API Key")
         return
     
+    # Time each phase of the start, from this click to the assistant's first words
+    timer = CallTimer(call_metrics, app="assistant")
+    clicked = time.perf_counter()
+    
+    with timer.time("client"):
+        client = client_pool.get(api_key)
+    
+    # Prepare assistant configuration
+    prompt_started = time.perf_counter()
+    if assistant_id:
+        # Start call with existing assistant ID
+        start_kwargs = {"assistant_id": assistant_id}
+    else:
+        # Create custom assistant
+        start_kwargs = {"assistant": {
+            "firstMessage": first_message,
+            "context": context,
+            "model": model,
+            "voice": voice,
+            "recordingEnabled": recording_enabled,
+            "interruptionsEnabled": interruptions_enabled
+        }}
+    timer.observe("prompt", time.perf_counter() - prompt_started)
+    
+    # Starts now if this node has a free slot, otherwise waits in the queue
     try:
-        # Initialize Vapi instance
-        vapi = Vapi(api_key=api_key)
-        st.session_state.vapi_instance = vapi
-        
-        # Prepare assistant configuration
-        if assistant_id:
-            # Start call with existing assistant ID
-            st.session_state.vapi_instance.start(assistant_id=assistant_id)
-        else:
-            # Create custom assistant
-            assistant = {
-                "firstMessage": first_message,
-                "context": context,
-                "model": model,
-                "voice": voice,
-                "recordingEnabled": recording_enabled,
-                "interruptionsEnabled": interruptions_enabled
-            }
-            st.session_state.vapi_instance.start(assistant=assistant)
-        
-        st.session_state.call_active = True
-        st.success("Call started successfully!")
-        st.rerun()
-    except Exception as e:
-        st.error(f"Error starting call: {str(e)}")
+        session_manager.submit(current_session_id(), api_key, st.session_state.call_lifecycle,
+                               connector(client, start_kwargs, timer=timer, clicked=clicked))
+    except SessionBusy:
+        st.error("Another call is already in progress in this browser session")
 
 def stop_call():
-    if st.session_state.vapi_instance:
-        try:
-            st.session_state.vapi_instance.stop()
-            st.session_state.call_active = False
-            st.session_state.vapi_instance = None
-            st.success("Call stopped successfully!")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Error stopping call: {str(e)}")
+    st.session_state.call_lifecycle.stop()
 
-with col1:
-    if not st.session_state.call_active:
-        st.button("Start Call", on_click=start_call, type="primary", use_container_width=True)
+# Call control section, rerun on its own when the call starts or stops
+@st.fragment
+def call_control():
+    lifecycle = st.session_state.call_lifecycle
+    sync_call_state()
 
-with col2:
-    if st.session_state.call_active:
-        st.button("Stop Call", on_click=stop_call, type="primary", use_container_width=True)
+    st.markdown('<div class="container">', unsafe_allow_html=True)
+    st.subheader("Voice Call Control")
 
-st.markdown('</div>', unsafe_allow_html=True)
+    # Call status and Start/Stop call buttons
+    call_controls("Call Status", lifecycle, session_manager, current_session_id(),
+                  "Start Call", "Stop Call", start_call, stop_call)
 
-# Instructions section
-if not st.session_state.call_active:
-    st.markdown('<div class="container">', unsafe_allow_html=True)
-    st.subheader("How to Use")
-    st.markdown("""
-    1. Enter your Vapi API Key (get it from the [Vapi Dashboard](https://dashboard.vapi.ai/))
-    2. Configure your assistant or use an existing assistant ID
-    3. Click "Start Call" to begin the voice conversation
-    4. Speak into your microphone to interact with the assistant
-    5. Click "Stop Call" when you're done
-    
-    **Note:** Make sure your browser has permission to access your microphone.
-    """)
     st.markdown('</div>', unsafe_allow_html=True)
-else:
-    st.markdown('<div class="container">', unsafe_allow_html=True)
-    st.subheader("Conversation in Progress")
-    st.markdown("""
-    Your voice conversation is active. Speak into your microphone to interact with the assistant.
+
+    # Instructions section
+    if lifecycle.state not in LIVE_STATES:
+        st.markdown('<div class="container">', unsafe_allow_html=True)
+        st.subheader("How to Use")
+        st.markdown("""
+        1. Enter your Vapi API Key (get it from the [Vapi Dashboard](https://dashboard.vapi.ai/))
+        2. Configure your assistant or use an existing assistant ID
+        3. Click "Start Call" to begin the voice conversation
+        4. Speak into your microphone to interact with the assistant
+        5. Click "Stop Call" when you're done
     
-    Click "Stop Call" when you're finished with the conversation.
-    """)
-    st.markdown('</div>', unsafe_allow_html=True)
+        **Note:** Make sure your browser has permission to access your microphone.
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
+    else:
+        st.markdown('<div class="container">', unsafe_allow_html=True)
+        st.subheader("Conversation in Progress")
+        st.markdown("""
+        Your voice conversation is active. Speak into your microphone to interact with the assistant.
+    
+        Click "Stop Call" when you're finished with the conversation.
+        """)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+call_control()
 
 # Footer
 st.markdown("---")
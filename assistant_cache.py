@@ -0,0 +1,164 @@
+"""On-disk cache of server-side Vapi assistant IDs.
+
+Each distinct assistant payload is created once through ``POST /assistant``.
+The returned ID is stored under the payload's content hash, so later calls can
+use ``Vapi.start(assistant_id=...)`` instead of sending the full inline config.
+
+Only payloads that repeat benefit. An interview with planned questions (the
+default whenever a question bank is loaded) has them in its context, which
+makes every payload unique, so those calls send the assistant inline and
+bypass the cache.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+
+import requests
+
+from prompts import TEMPLATES_VERSION
+from vapi_clients import DEFAULT_API_URL, VapiError
+
+DEFAULT_CACHE_PATH = ".assistant_cache.json"
+DEFAULT_TTL = 7 * 24 * 3600
+
+
+def create_assistant(api_url, api_key, assistant, timeout=10, session=None):
+    """Create an assistant server-side and return its ID."""
+    response = (session or requests).post(
+        f"{api_url}/assistant",
+        headers={
+            'Authorization': 'Bearer ' + api_key,
+            'Content-Type': 'application/json'
+        },
+        json=assistant,
+        timeout=timeout
+    )
+    if not response.ok:
+        # Error bodies are not always JSON (e.g. from a proxy in front of the API)
+        try:
+            message = response.json().get("message")
+        except (ValueError, AttributeError):
+            message = None
+        raise VapiError(f"Error creating assistant: {message or response.status_code}", status=response.status_code)
+    return response.json()["id"]
+
+
+class AssistantIdCache:
+    """Maps (API key, assistant content hash) to a server-side assistant ID.
+
+    Entries expire after ``ttl`` seconds, and the whole cache is dropped when
+    the prompt templates change. Several processes can share the file: each
+    write merges in what the others have saved since.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, ttl=DEFAULT_TTL, api_url=DEFAULT_API_URL,
+                 templates_version=TEMPLATES_VERSION):
+        self.path = path
+        self.ttl = ttl
+        self.api_url = api_url
+        self.templates_version = templates_version
+        self._lock = threading.Lock()
+        # One lock per entry being created, so concurrent misses make a single POST
+        self._creating = {}
+        self._entries = self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(data, dict) or data.get("templates_version") != self.templates_version:
+            return {}
+        return {key: entry for key, entry in data.get("entries", {}).items() if not self._expired(entry)}
+
+    def _expired(self, entry):
+        return time.time() - entry["created_at"] > self.ttl
+
+    def _save(self, keep=None):
+        # Merge with the file, keeping the newer of two entries, so other processes' entries survive
+        entries = self._load()
+        for key, entry in self._entries.items():
+            if key not in entries or entry["created_at"] >= entries[key]["created_at"]:
+                entries[key] = entry
+        self._entries = {key: entry for key, entry in entries.items()
+                         if not self._expired(entry) and (keep is None or keep(key))}
+        data = {"templates_version": self.templates_version, "entries": self._entries}
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".assistant_cache.")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _key(api_key, content_hash):
+        # Assistants belong to the account behind the key, so IDs are not shared across keys
+        key_id = hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+        return f"{key_id}:{content_hash}"
+
+    def get(self, api_key, content_hash):
+        with self._lock:
+            entry = self._entries.get(self._key(api_key, content_hash))
+        if entry is None or self._expired(entry):
+            return None
+        return entry["id"]
+
+    def put(self, api_key, content_hash, assistant_id):
+        with self._lock:
+            self._entries[self._key(api_key, content_hash)] = {
+                "id": assistant_id,
+                "created_at": time.time()
+            }
+            self._save()
+
+    def invalidate(self, api_key=None, content_hash=None):
+        """Drop one entry, every entry for a key, or the whole cache."""
+        with self._lock:
+            if api_key is None:
+                self._save(keep=lambda key: False)
+            elif content_hash is not None:
+                dropped = self._key(api_key, content_hash)
+                self._save(keep=lambda key: key != dropped)
+            else:
+                prefix = self._key(api_key, "")
+                self._save(keep=lambda key: not key.startswith(prefix))
+
+    def get_or_create(self, api_key, compiled, session=None):
+        """Return the assistant ID for a ``prompts.CompiledAssistant``, creating it if needed."""
+        assistant_id = self.get(api_key, compiled.content_hash)
+        if assistant_id is not None:
+            return assistant_id
+        key = self._key(api_key, compiled.content_hash)
+        with self._lock:
+            creating = self._creating.setdefault(key, threading.Lock())
+        with creating:
+            # Whoever held the lock before us may have created it already
+            assistant_id = self.get(api_key, compiled.content_hash)
+            if assistant_id is None:
+                try:
+                    assistant_id = create_assistant(self.api_url, api_key, compiled.assistant, session=session)
+                    self.put(api_key, compiled.content_hash, assistant_id)
+                finally:
+                    with self._lock:
+                        self._creating.pop(key, None)
+        return assistant_id
+
+
+def from_env():
+    """Build the cache from environment settings, or return None when the mode is off."""
+    if os.getenv("VAPI_ASSISTANT_CACHE", "").lower() not in ("1", "true", "yes"):
+        return None
+    return AssistantIdCache(
+        path=os.getenv("VAPI_ASSISTANT_CACHE_PATH", DEFAULT_CACHE_PATH),
+        ttl=float(os.getenv("VAPI_ASSISTANT_CACHE_TTL", DEFAULT_TTL)),
+        api_url=os.getenv("VAPI_API_URL", DEFAULT_API_URL)
+    )
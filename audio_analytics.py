@@ -0,0 +1,261 @@
+"""Post-call analytics over interview recordings.
+
+Recordings are memory-mapped and processed in fixed-size chunks, so an
+hour-long file never has to fit in RAM. Each chunk is cut into short frames
+whose energy decides who is speaking. With a stereo recording (candidate and
+interviewer on separate channels) this gives:
+
+- talk time per speaker and the candidate's share of it
+- silence ratio (nobody speaking)
+- interruptions (one side starts talking over the other)
+- answer latency for every question (interviewer stops -> candidate starts)
+- speaking rate, when the matching transcript is available
+
+Mono recordings only get talk and silence totals. Files are analysed in
+parallel on a process pool:
+
+    python audio_analytics.py recordings/ --transcripts transcripts/ --out audio.jsonl
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from transcripts import read_transcript
+
+FRAME_SECONDS = 0.02
+CHUNK_SECONDS = 60
+# Frames louder than this (dBFS) count as speech
+SPEECH_THRESHOLD_DB = -40.0
+# Pauses shorter than this are part of the same turn; blips shorter than MIN_SPEECH are noise
+MIN_PAUSE = 0.3
+MIN_SPEECH = 0.1
+# Overlaps shorter than this are back-channel ("mm-hm"), not interruptions
+MIN_INTERRUPTION = 0.5
+CANDIDATE_CHANNEL = 0
+
+_DTYPES = {(1, 16): np.int16, (1, 32): np.int32, (3, 32): np.float32}
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def open_wav(path):
+    """Memory-map the samples of a PCM WAV file. Returns (samples[frames, channels], sample_rate)."""
+    with open(path, "rb") as f:
+        riff, _, wave = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave != b"WAVE":
+            raise ValueError(f"{path} is not a WAV file")
+        fmt = None
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                raise ValueError(f"{path} has no data chunk")
+            chunk_id, size = struct.unpack("<4sI", header)
+            if chunk_id == b"fmt ":
+                body = f.read(size)
+                tag, channels, rate, _, _, bits = struct.unpack("<HHIIHH", body[:16])
+                if tag == _WAVE_FORMAT_EXTENSIBLE:
+                    tag = struct.unpack("<H", body[24:26])[0]
+                fmt = (tag, channels, rate, bits)
+            elif chunk_id == b"data":
+                offset = f.tell()
+                break
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+    if fmt is None:
+        raise ValueError(f"{path} has no fmt chunk")
+    tag, channels, rate, bits = fmt
+    dtype = _DTYPES.get((tag, bits))
+    if dtype is None:
+        raise ValueError(f"{path}: unsupported sample format (format {tag}, {bits} bits)")
+    # Recordings still being written can have a bogus data size; trust the file length
+    frames = (os.path.getsize(path) - offset) // (channels * bits // 8)
+    samples = np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(frames, channels))
+    return samples, rate
+
+
+def open_pcm(path, sample_rate=16000, channels=1):
+    """Memory-map a headerless 16-bit little-endian PCM file."""
+    frames = os.path.getsize(path) // (2 * channels)
+    return np.memmap(path, dtype="<i2", mode="r", shape=(frames, channels)), sample_rate
+
+
+def _release(samples, start, stop):
+    # Drop the pages of a processed chunk so resident memory stays around one chunk
+    mapped = getattr(samples, "_mmap", None)
+    if mapped is None or not hasattr(mapped, "madvise") or not hasattr(mmap, "MADV_DONTNEED"):
+        return
+    # The mapping starts at the allocation boundary below the data offset
+    base = samples.offset % mmap.ALLOCATIONGRANULARITY
+    begin = base + start * samples.strides[0]
+    begin -= begin % mmap.PAGESIZE
+    end = base + stop * samples.strides[0]
+    mapped.madvise(mmap.MADV_DONTNEED, begin, end - begin)
+
+
+def frame_levels(samples, sample_rate, frame_seconds=FRAME_SECONDS, chunk_seconds=CHUNK_SECONDS):
+    """Per-frame loudness in dBFS, shape (frames, channels), read one chunk at a time."""
+    frame_len = max(int(sample_rate * frame_seconds), 1)
+    total = len(samples) // frame_len
+    channels = samples.shape[1]
+    scale = float(np.iinfo(samples.dtype).max) if np.issubdtype(samples.dtype, np.integer) else 1.0
+    frames_per_chunk = max(int(chunk_seconds / frame_seconds), 1)
+    levels = np.empty((total, channels), dtype=np.float32)
+    for start in range(0, total, frames_per_chunk):
+        stop = min(start + frames_per_chunk, total)
+        # Only this slice of the memory map is paged in
+        chunk = np.asarray(samples[start * frame_len:stop * frame_len], dtype=np.float32) / scale
+        power = np.square(chunk).reshape(stop - start, frame_len, channels).mean(axis=1)
+        levels[start:stop] = 10 * np.log10(power + 1e-12)
+        _release(samples, start * frame_len, stop * frame_len)
+    return levels
+
+
+def _runs(mask):
+    """(start, stop) frame indices of every run of True in ``mask``."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_mask(levels, frame_seconds=FRAME_SECONDS, threshold=SPEECH_THRESHOLD_DB,
+                min_pause=MIN_PAUSE, min_speech=MIN_SPEECH):
+    """Frames where a channel is speaking, with short pauses bridged and short blips dropped."""
+    mask = levels > threshold
+    starts, stops = _runs(~mask)
+    for start, stop in zip(starts, stops):
+        # Bridge pauses inside a turn, but not leading or trailing silence
+        if start > 0 and stop < len(mask) and (stop - start) * frame_seconds < min_pause:
+            mask[start:stop] = True
+    starts, stops = _runs(mask)
+    for start, stop in zip(starts, stops):
+        if (stop - start) * frame_seconds < min_speech:
+            mask[start:stop] = False
+    return mask
+
+
+def conversation_metrics(candidate, interviewer, frame_seconds=FRAME_SECONDS, min_interruption=MIN_INTERRUPTION):
+    """Turn-taking metrics from the two speakers' per-frame speech masks."""
+    total = len(candidate) * frame_seconds
+    candidate_time = np.count_nonzero(candidate) * frame_seconds
+    interviewer_time = np.count_nonzero(interviewer) * frame_seconds
+    silence = np.count_nonzero(~(candidate | interviewer)) * frame_seconds
+    talk = candidate_time + interviewer_time
+
+    def interruptions(speaker, other):
+        # Turns that start while the other side is talking and overlap long enough
+        count = 0
+        for start, stop in zip(*_runs(speaker)):
+            if other[start] and np.count_nonzero(other[start:stop]) * frame_seconds >= min_interruption:
+                count += 1
+        return count
+
+    # For each interviewer turn, the gap until the candidate next starts talking
+    candidate_starts = _runs(candidate)[0]
+    latencies = []
+    for stop in _runs(interviewer)[1]:
+        later = candidate_starts[np.searchsorted(candidate_starts, stop):]
+        if len(later):
+            latencies.append(round((later[0] - stop) * frame_seconds, 2))
+
+    return {
+        "duration": round(total, 2),
+        "candidate_talk_time": round(candidate_time, 2),
+        "interviewer_talk_time": round(interviewer_time, 2),
+        "candidate_share": round(candidate_time / talk, 3) if talk else 0.0,
+        "silence_ratio": round(silence / total, 3) if total else 0.0,
+        "candidate_interruptions": interruptions(candidate, interviewer),
+        "interviewer_interruptions": interruptions(interviewer, candidate),
+        "answer_latencies": latencies,
+        "mean_answer_latency": round(float(np.mean(latencies)), 2) if latencies else None,
+    }
+
+
+def analyse_recording(path, transcript_path=None, candidate_channel=CANDIDATE_CHANNEL,
+                      threshold=SPEECH_THRESHOLD_DB, sample_rate=16000, channels=1):
+    """Analytics for one ``.wav`` (or headerless ``.pcm``/``.raw``) recording."""
+    if path.endswith(".wav"):
+        samples, rate = open_wav(path)
+    else:
+        samples, rate = open_pcm(path, sample_rate, channels)
+    levels = frame_levels(samples, rate)
+    masks = [speech_mask(levels[:, c], threshold=threshold) for c in range(levels.shape[1])]
+
+    if len(masks) >= 2:
+        candidate = masks[candidate_channel]
+        interviewer = masks[1 - candidate_channel]
+        result = conversation_metrics(candidate, interviewer)
+    else:
+        # One mixed channel: speakers can't be told apart
+        speaking = masks[0]
+        duration = len(speaking) * FRAME_SECONDS
+        result = {
+            "duration": round(duration, 2),
+            "talk_time": round(np.count_nonzero(speaking) * FRAME_SECONDS, 2),
+            "silence_ratio": round(float(np.mean(~speaking)), 3) if len(speaking) else 0.0,
+        }
+
+    result["speaking_rate_wpm"] = None
+    if transcript_path and os.path.exists(transcript_path) and "candidate_talk_time" in result:
+        words = sum(len(f["text"].split()) for f in read_transcript(transcript_path) if f["role"] == "user")
+        minutes = result["candidate_talk_time"] / 60
+        result["speaking_rate_wpm"] = round(words / minutes, 1) if minutes else None
+    result["path"] = path
+    return result
+
+
+def _analyse(job):
+    path, transcript_path, options = job
+    try:
+        return analyse_recording(path, transcript_path, **options)
+    except (OSError, ValueError) as e:
+        return {"path": path, "error": str(e)}
+
+
+def find_recordings(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith((".wav", ".pcm", ".raw")))
+    return sorted(paths)
+
+
+def analyse_directory(directory, transcripts_dir=None, workers=None, **options):
+    """Analyse every recording under ``directory``, matching transcripts by file name."""
+    jobs = []
+    for path in find_recordings(directory):
+        transcript_path = None
+        if transcripts_dir:
+            name = os.path.splitext(os.path.basename(path))[0]
+            transcript_path = os.path.join(transcripts_dir, name + ".jsonl")
+        jobs.append((path, transcript_path, options))
+    if workers == 1 or len(jobs) <= 1:
+        return [_analyse(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_analyse, jobs))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="Directory of .wav/.pcm recordings named <interview id>.wav")
+    parser.add_argument("--transcripts", help="Transcript directory, for speaking rate")
+    parser.add_argument("--out", help="Write one JSON result per line here (default: stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--candidate-channel", type=int, default=CANDIDATE_CHANNEL,
+                        help="Channel with the candidate's voice in stereo recordings")
+    parser.add_argument("--threshold", type=float, default=SPEECH_THRESHOLD_DB, help="Speech level in dBFS")
+    parser.add_argument("--sample-rate", type=int, default=16000, help="Sample rate of headerless PCM files")
+    parser.add_argument("--channels", type=int, default=1, help="Channels of headerless PCM files")
+    args = parser.parse_args()
+
+    results = analyse_directory(args.directory, args.transcripts, args.workers,
+                                candidate_channel=args.candidate_channel, threshold=args.threshold,
+                                sample_rate=args.sample_rate, channels=args.channels)
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+    if args.out:
+        out.close()
@@ -0,0 +1,470 @@
+"""Relay for candidates' browser audio, for servers with no audio devices.
+
+The page captures the candidate's microphone and streams 16 kHz 16-bit mono
+PCM over a WebSocket to ``AudioRelay``. The relay forwards it to the call's
+Vapi WebSocket transport and sends the interviewer's audio back the same way.
+The relay runs its own event loop thread, like the metrics server.
+
+Each direction of each stream is buffered in a ``FrameRing``: a fixed number
+of 20 ms frame slots in one preallocated NumPy array. Incoming bytes are
+copied once, straight into the next free slot, whatever size the chunks
+arrive in. Frames are queued and batched by moving indices over the slots.
+The only other copy is the one bytes object per send that the WebSocket
+library needs, because tornado won't take a memoryview. Every ring comes
+from a ``RingPool`` sized at startup, so audio memory is fixed by the number
+of streams allowed.
+
+Backpressure: each ring is drained only as fast as its receiving socket
+accepts writes. If that side stalls, the ring fills and then drops its
+oldest frame, which keeps both memory and added delay bounded. Interarrival
+jitter (RFC 3550), queueing delay and drops are reported per direction.
+"""
+
+import asyncio
+import json
+import threading
+import time
+
+import numpy as np
+from tornado.ioloop import PeriodicCallback
+from tornado.iostream import StreamClosedError
+from tornado.web import Application
+from tornado.websocket import WebSocketClosedError, WebSocketHandler, websocket_connect
+
+SAMPLE_RATE = 16000
+FRAME_SECONDS = 0.02
+FRAME_SAMPLES = int(SAMPLE_RATE * FRAME_SECONDS)
+# One second of audio per direction absorbs network bursts without adding much delay
+RING_FRAMES = 50
+DEFAULT_MAX_STREAMS = 100
+DEFAULT_PORT = 8765
+# Frames sent in one message when a ring has fallen behind
+MAX_BATCH_FRAMES = 10
+REPORT_INTERVAL = 1.0
+
+# What the browser sends and Vapi's WebSocket transport is asked for
+AUDIO_FORMAT = {"format": "pcm_s16le", "container": "raw", "sampleRate": SAMPLE_RATE}
+
+UPLINK = "uplink"
+DOWNLINK = "downlink"
+
+
+class AudioCapacityError(Exception):
+    """Every audio stream the relay was sized for is in use."""
+
+
+class FrameRing:
+    """Bounded FIFO of fixed-size PCM frames held in a preallocated array.
+
+    ``push`` copies incoming bytes into frame slots; ``peek`` returns the
+    oldest complete frames as a view and ``pop`` frees them once sent. When
+    every slot is full, the oldest frame is dropped to make room. Frames are
+    numbered by ``position`` so a send that was overtaken by drops frees only
+    what is still queued. Not thread-safe: the relay's event loop owns it.
+    """
+
+    def __init__(self, frames):
+        # ``frames`` is a (slots, samples) int16 array, usually part of a RingPool's block
+        self.frames = frames
+        self.capacity, self.frame_samples = frames.shape
+        self.completed_at = np.zeros(self.capacity)
+        self.reset()
+
+    def reset(self):
+        self.head = 0       # slot being filled
+        self.tail = 0       # oldest complete frame
+        self.count = 0      # complete frames
+        self.filled = 0     # samples in the slot being filled
+        self.pushed = 0
+        self.popped = 0
+        self.dropped = 0
+        self.high_water = 0
+
+    def push(self, data, now=None):
+        """Append PCM bytes; returns the number of frames completed."""
+        now = time.monotonic() if now is None else now
+        samples = np.frombuffer(data, dtype=np.int16, count=len(data) // 2)
+        offset, completed = 0, 0
+        while offset < len(samples):
+            if self.filled == 0 and self.count == self.capacity:
+                # Full: the slot about to be filled holds the oldest frame
+                self.tail = (self.tail + 1) % self.capacity
+                self.count -= 1
+                self.dropped += 1
+            take = min(self.frame_samples - self.filled, len(samples) - offset)
+            self.frames[self.head, self.filled:self.filled + take] = samples[offset:offset + take]
+            self.filled += take
+            offset += take
+            if self.filled == self.frame_samples:
+                self.completed_at[self.head] = now
+                self.head = (self.head + 1) % self.capacity
+                self.filled = 0
+                self.count += 1
+                self.pushed += 1
+                completed += 1
+        self.high_water = max(self.high_water, self.count)
+        return completed
+
+    def peek(self, limit=1):
+        """Up to ``limit`` of the oldest complete frames, as one view (never wrapping), or None."""
+        if not self.count:
+            return None
+        return self.frames[self.tail:self.tail + min(limit, self.count, self.capacity - self.tail)]
+
+    @property
+    def position(self):
+        """Number of the oldest queued frame: how many have left the ring, sent or dropped."""
+        return self.popped + self.dropped
+
+    def pop(self, start, count):
+        """Free frames ``start`` to ``start + count`` (see ``position``) once they have been sent.
+
+        Frames that ``push`` dropped to make room while they were being sent
+        did go out, so they count as sent rather than dropped.
+        """
+        overtaken = min(max(self.position - start, 0), count)
+        self.dropped -= overtaken
+        remaining = count - overtaken
+        self.tail = (self.tail + remaining) % self.capacity
+        self.count -= remaining
+        self.popped += count
+
+
+class RingPool:
+    """Every ring the relay can hand out, allocated up front as one block."""
+
+    def __init__(self, max_streams=DEFAULT_MAX_STREAMS, frames=RING_FRAMES, frame_samples=FRAME_SAMPLES):
+        # Two rings (uplink and downlink) per stream. Written once so the pages are committed
+        # now rather than as streams first touch them
+        self.block = np.empty((max_streams * 2, frames, frame_samples), dtype=np.int16)
+        self.block.fill(0)
+        self._free = list(range(len(self.block)))
+        self._lock = threading.Lock()
+
+    @property
+    def available(self):
+        return len(self._free) // 2
+
+    def acquire(self):
+        """An (uplink, downlink) pair of empty rings. Raises ``AudioCapacityError`` if none are left."""
+        with self._lock:
+            if len(self._free) < 2:
+                raise AudioCapacityError("All audio streams are in use")
+            slots = self._free.pop(), self._free.pop()
+        rings = []
+        for slot in slots:
+            ring = FrameRing(self.block[slot])
+            ring.slot = slot
+            rings.append(ring)
+        return tuple(rings)
+
+    def release(self, *rings):
+        with self._lock:
+            self._free.extend(ring.slot for ring in rings)
+
+
+class Jitter:
+    """RFC 3550 interarrival jitter of a stream of PCM chunks, in seconds."""
+
+    def __init__(self, sample_rate=SAMPLE_RATE):
+        self.sample_rate = sample_rate
+        self.value = 0.0
+        self._last = None
+        self._last_seconds = 0.0
+
+    def arrived(self, byte_count, now):
+        if self._last is not None:
+            # How much later (or earlier) this chunk came than the audio before it lasted
+            deviation = (now - self._last) - self._last_seconds
+            self.value += (abs(deviation) - self.value) / 16
+        self._last = now
+        self._last_seconds = byte_count / 2 / self.sample_rate
+
+
+class _Stream:
+    """One call's audio: the browser socket, the upstream Vapi socket and a ring each way.
+
+    Lives on the relay's event loop. The browser may disconnect and reconnect
+    (e.g. when the page reloads); the stream ends when the call is stopped or
+    the upstream closes.
+    """
+
+    def __init__(self, relay, token, upstream_url, rings, on_message, on_close):
+        self.relay = relay
+        self.token = token
+        self.upstream_url = upstream_url
+        self.rings = {UPLINK: rings[0], DOWNLINK: rings[1]}
+        self.jitter = {UPLINK: Jitter(), DOWNLINK: Jitter()}
+        self.waited = {UPLINK: 0.0, DOWNLINK: 0.0}
+        self.on_message = on_message
+        self.on_close = on_close
+        self.browser = None
+        self.upstream = None
+        self.error = None
+        self.closed = False
+        self.pending = []
+        self._ready = None
+        self._task = None
+
+    def attach(self, browser):
+        if self.closed:
+            browser.close(4410, "Call ended")
+            return
+        if self.browser is not None:
+            # The newest page wins
+            self.browser.close(4409, "Replaced by another connection")
+        self.browser = browser
+        if self._task is None:
+            self._ready = {UPLINK: asyncio.Event(), DOWNLINK: asyncio.Event()}
+            self._task = asyncio.ensure_future(self._run())
+        self._ready[DOWNLINK].set()
+
+    def detach(self, browser):
+        if self.browser is browser:
+            self.browser = None
+
+    def received(self, direction, data):
+        now = time.monotonic()
+        self.jitter[direction].arrived(len(data), now)
+        if self.rings[direction].push(data, now) and self._ready is not None:
+            self._ready[direction].set()
+
+    async def _run(self):
+        try:
+            self.upstream = await websocket_connect(self.upstream_url)
+        except Exception as e:
+            self.error = f"Couldn't connect the call's audio: {e}"
+            self.close()
+            return
+        if self.closed:
+            # Stopped while connecting
+            self.upstream.close()
+            return
+        for text in self.pending:
+            self.upstream.write_message(text)
+        self.pending = []
+        self._ready[UPLINK].set()
+        pumps = [asyncio.ensure_future(self._pump(UPLINK, lambda: self.upstream)),
+                 asyncio.ensure_future(self._pump(DOWNLINK, lambda: self.browser))]
+        try:
+            while True:
+                message = await self.upstream.read_message()
+                if message is None:
+                    break
+                if isinstance(message, bytes):
+                    self.received(DOWNLINK, message)
+                elif self.on_message is not None:
+                    try:
+                        self.on_message(json.loads(message))
+                    except ValueError:
+                        pass
+        finally:
+            for pump in pumps:
+                pump.cancel()
+            self.close()
+
+    async def _pump(self, direction, target):
+        # Sends as fast as the receiving socket takes it; the ring absorbs (and, if it must, drops) the rest
+        ring, ready = self.rings[direction], self._ready[direction]
+        while not self.closed:
+            socket = target()
+            frames = ring.peek(MAX_BATCH_FRAMES)
+            if frames is None or socket is None:
+                ready.clear()
+                await ready.wait()
+                continue
+            start, count, queued_at = ring.position, len(frames), ring.completed_at[ring.tail]
+            try:
+                # Copied before the await, so frames pushed meanwhile can't change what is sent
+                await socket.write_message(frames.tobytes(), binary=True)
+            except (StreamClosedError, WebSocketClosedError):
+                if direction == UPLINK:
+                    return
+                # The browser went away; hold its audio (bounded) until it reconnects
+                self.detach(socket)
+                continue
+            ring.pop(start, count)
+            self.waited[direction] = max(self.waited[direction], time.monotonic() - queued_at)
+
+    def send(self, text):
+        if self.closed:
+            return
+        if self.upstream is None:
+            # Not connected yet: control messages wait for the browser's audio to join
+            self.pending.append(text)
+            return
+        try:
+            self.upstream.write_message(text)
+        except WebSocketClosedError:
+            pass
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        if self._ready is not None:
+            for ready in self._ready.values():
+                ready.set()
+        if self.browser is not None:
+            self.browser.close(4410, "Call ended")
+        if self.upstream is not None:
+            self.upstream.close()
+        self.relay._forget(self)
+        if self.on_close is not None:
+            self.on_close()
+
+    def stats(self):
+        return {
+            direction: {
+                "queued": ring.count,
+                "high_water": ring.high_water,
+                "frames": ring.pushed,
+                "dropped": ring.dropped,
+                "jitter_ms": round(self.jitter[direction].value * 1000, 2),
+            }
+            for direction, ring in self.rings.items()
+        }
+
+
+class AudioRelay:
+    """WebSocket relay between candidates' browsers and their calls' Vapi audio transports.
+
+    ``register`` a call's upstream URL under a secret token; the browser then
+    connects to ``url(token)``. ``registry`` (a ``metrics.MetricsRegistry``)
+    receives each stream's jitter and queueing delay once a second.
+    """
+
+    def __init__(self, port=DEFAULT_PORT, host="0.0.0.0", public_url=None, max_streams=DEFAULT_MAX_STREAMS,
+                 registry=None):
+        self.host = host
+        self.port = port
+        self.public_url = public_url
+        self.max_streams = max_streams
+        self.registry = registry
+        self.pool = RingPool(max_streams)
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._loop = None
+        self._thread = None
+
+    def start(self):
+        """Listen on a daemon thread. Returns the relay once it is accepting connections."""
+        if self._thread is not None:
+            return self
+        listening = threading.Event()
+        errors = []
+
+        def run():
+            asyncio.set_event_loop(asyncio.new_event_loop())
+            self._loop = asyncio.get_event_loop()
+            try:
+                server = Application([(r"/audio/([A-Za-z0-9_-]+)", _BrowserSocket, {"relay": self})]).listen(
+                    self.port, self.host)
+            except OSError as e:
+                errors.append(e)
+                listening.set()
+                return
+            self.port = next(iter(server._sockets.values())).getsockname()[1]
+            PeriodicCallback(self._report, REPORT_INTERVAL * 1000).start()
+            listening.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, name="audio-relay", daemon=True)
+        self._thread.start()
+        listening.wait()
+        if errors:
+            raise errors[0]
+        if self.public_url is None:
+            self.public_url = f"ws://localhost:{self.port}"
+        return self
+
+    def url(self, token):
+        return f"{self.public_url.rstrip('/')}/audio/{token}"
+
+    def register(self, token, upstream_url=None, on_message=None, on_close=None):
+        """Reserve rings for a call's stream. Raises ``AudioCapacityError`` when the relay is full.
+
+        The upstream is connected when the browser first attaches, so the
+        stream's ``upstream_url`` must be set before ``url(token)`` is handed out.
+        """
+        rings = self.pool.acquire()
+        stream = _Stream(self, token, upstream_url, rings, on_message, on_close)
+        with self._lock:
+            self._streams[token] = stream
+        return stream
+
+    def unregister(self, token):
+        """End a call's stream: close both sockets and free its rings."""
+        with self._lock:
+            stream = self._streams.get(token)
+        if stream is not None:
+            self._loop.call_soon_threadsafe(stream.close)
+
+    def send(self, token, text):
+        """Send a text (control) message up a stream's upstream socket. Returns False if there is no such stream."""
+        stream = self._get(token)
+        if stream is None:
+            return False
+        self._loop.call_soon_threadsafe(stream.send, text)
+        return True
+
+    def _get(self, token):
+        with self._lock:
+            return self._streams.get(token)
+
+    def _forget(self, stream):
+        with self._lock:
+            if self._streams.get(stream.token) is stream:
+                del self._streams[stream.token]
+        self.pool.release(*stream.rings.values())
+
+    def _report(self):
+        with self._lock:
+            streams = list(self._streams.values())
+        if self.registry is None:
+            return
+        for stream in streams:
+            for direction in (UPLINK, DOWNLINK):
+                self.registry.observe("audio_jitter", stream.jitter[direction].value, direction=direction)
+                self.registry.observe("audio_queue_delay", stream.waited[direction], direction=direction)
+                stream.waited[direction] = 0.0
+
+    def stats(self):
+        with self._lock:
+            streams = list(self._streams.values())
+        per_stream = [stream.stats() for stream in streams]
+        return {
+            "streams": len(streams),
+            "max_streams": self.max_streams,
+            "buffer_bytes": self.pool.block.nbytes,
+            "dropped": sum(s[d]["dropped"] for s in per_stream for d in (UPLINK, DOWNLINK)),
+            "max_jitter_ms": {d: max((s[d]["jitter_ms"] for s in per_stream), default=0.0) for d in (UPLINK, DOWNLINK)},
+        }
+
+
+class _BrowserSocket(WebSocketHandler):
+    """A candidate's page sending microphone audio and playing the interviewer's."""
+
+    def initialize(self, relay):
+        self.relay = relay
+        self.stream = None
+
+    def check_origin(self, origin):
+        # The page is served from another port or host; the unguessable token is the credential
+        return True
+
+    def open(self, token):
+        self.stream = self.relay._get(token)
+        if self.stream is None:
+            self.close(4404, "Unknown call")
+            return
+        self.set_nodelay(True)
+        self.stream.attach(self)
+
+    def on_message(self, message):
+        if self.stream is not None and isinstance(message, bytes):
+            self.stream.received(UPLINK, message)
+
+    def on_close(self):
+        if self.stream is not None:
+            self.stream.detach(self)
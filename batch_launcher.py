@@ -0,0 +1,374 @@
+"""Launch batches of phone interviews from a CSV or JSONL manifest.
+
+Each manifest row is one interview: the candidate's phone number plus the same
+choices as the interview page (``interview_type``, ``interview_level``,
+``interview_duration``, ``company_type``, ``job_description``) and optionally
+``id``, ``candidate`` (name or email) and ``scheduled_at`` (ISO 8601). The
+assistant is compiled exactly as for a call started from the page, with a
+question plan the candidate has not seen before, and Vapi calls the candidate
+from ``VAPI_PHONE_NUMBER_ID``.
+
+Launches are paced by a token bucket and retried with exponential backoff
+on rate limiting and server errors. Progress is appended to a checkpoint
+file, so an interrupted batch can be rerun with the same command and only
+the remaining rows are launched:
+
+    python batch_launcher.py candidates.csv --max-active-calls 10
+    python batch_launcher.py candidates.jsonl --rate 2 --burst 5 --dry-run
+"""
+
+import argparse
+import asyncio
+import csv
+import hashlib
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import requests
+from urllib3.exceptions import NewConnectionError
+
+import interviews
+import question_bank
+from config import load_settings
+from state_store import open_store
+from vapi_clients import DEFAULT_API_URL, VapiClient, VapiError
+
+DEFAULT_RATE = 1.0
+DEFAULT_BURST = 5
+DEFAULT_CONCURRENCY = 8
+DEFAULT_MAX_ATTEMPTS = 6
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 60.0
+
+# Checkpoint statuses. A row left "started" was interrupted mid-request and may
+# or may not have reached Vapi; "retrying" rows are known not to have.
+STARTED = "started"
+RETRYING = "retrying"
+LAUNCHED = "launched"
+FAILED = "failed"
+UNCERTAIN = "uncertain"
+
+Row = namedtuple("Row", ["row_id", "line", "phone", "candidate", "config", "scheduled_at"])
+
+
+def _parse_time(value):
+    if not value:
+        return 0.0
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value).timestamp()
+
+
+def _records(path):
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.endswith(".csv"):
+            # Line 1 is the header
+            for line, record in enumerate(csv.DictReader(f), 2):
+                yield line, record
+        else:
+            # Parsed in read_manifest, so one bad line is reported with the rest
+            for line, text in enumerate(f, 1):
+                if text.strip():
+                    yield line, text
+
+
+def read_manifest(path):
+    """Rows of a manifest, and a list of errors for rows that can't be launched."""
+    rows, errors = [], []
+    for line, record in _records(path):
+        try:
+            if isinstance(record, str):
+                record = json.loads(record)
+                if not isinstance(record, dict):
+                    raise ValueError("not a JSON object")
+            record = {k.strip(): (v.strip() if isinstance(v, str) else v) for k, v in record.items() if k}
+            phone = record.get("phone")
+            if not phone:
+                raise ValueError("missing phone")
+            config = interviews.make_config(**{field: record.get(field) for field in interviews.InterviewConfig._fields})
+            scheduled_at = _parse_time(record.get("scheduled_at"))
+        except ValueError as e:
+            errors.append(f"{path}:{line}: {e}")
+            continue
+        # Rows without an ID are identified by their content, which stays stable across reruns
+        row_id = record.get("id") or hashlib.sha256(
+            json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+        rows.append(Row(str(row_id), line, phone, record.get("candidate") or "", config, scheduled_at))
+    return rows, errors
+
+
+class Checkpoint:
+    """Append-only JSONL log of each row's progress; the last record of a row wins."""
+
+    def __init__(self, path):
+        self.path = path
+        self.records = {}
+        if os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as f:
+                for text in f:
+                    try:
+                        record = json.loads(text)
+                    except ValueError:
+                        # A torn last line from a crash mid-write
+                        continue
+                    self.records[record["id"]] = record
+        self._file = open(path, "a", encoding="utf-8")
+
+    def status(self, row_id):
+        record = self.records.get(row_id)
+        return record["status"] if record else None
+
+    def write(self, row_id, status, **fields):
+        record = dict(fields, id=row_id, status=status, at=time.time())
+        # Durable before the next step: a "started" row must never be launched twice by mistake
+        self._file.write(json.dumps(record) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records[row_id] = record
+
+    def close(self):
+        self._file.close()
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second on average, in bursts of up to ``capacity``."""
+
+    def __init__(self, rate, capacity, clock=time.monotonic):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = float(capacity)
+        self.updated = clock()
+        self.paused_until = 0.0
+
+    def pause(self, seconds):
+        """Hold every acquisition for ``seconds``, e.g. after the API says it is rate limiting."""
+        self.paused_until = max(self.paused_until, self.clock() + seconds)
+
+    async def acquire(self):
+        while True:
+            now = self.clock()
+            if now < self.paused_until:
+                await asyncio.sleep(self.paused_until - now)
+                continue
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+def backoff_delay(attempt, error=None, base=BACKOFF_BASE, cap=BACKOFF_CAP, rng=random):
+    """Full-jitter exponential backoff; a ``Retry-After`` from the API is the minimum."""
+    delay = rng.uniform(0, min(cap, base * 2 ** attempt))
+    return max(delay, getattr(error, "retry_after", None) or 0)
+
+
+def is_transient(error):
+    if isinstance(error, VapiError):
+        return error.transient
+    return never_sent(error)
+
+
+def never_sent(error):
+    """True if a request failed while connecting, before Vapi could have received it.
+
+    Anything later (a read timeout, a connection dropped mid-request) may have
+    placed the call after all, so it is never retried (see UNCERTAIN).
+    """
+    if isinstance(error, (requests.ConnectTimeout, requests.exceptions.SSLError)):
+        return True
+    if not isinstance(error, requests.ConnectionError) or isinstance(error, requests.ReadTimeout):
+        return False
+    # requests wraps urllib3's MaxRetryError, whose reason says where the request failed
+    reason = getattr(error.args[0] if error.args else None, "reason", None)
+    return isinstance(reason, NewConnectionError)
+
+
+class BatchLauncher:
+    """Launches manifest rows on ``concurrency`` asyncio workers, recording each in ``checkpoint``."""
+
+    def __init__(self, client, phone_number_id, checkpoint, limiter, concurrency=DEFAULT_CONCURRENCY,
+                 max_attempts=DEFAULT_MAX_ATTEMPTS, bank=None, history=None, job_description_budget=None,
+                 out=sys.stdout):
+        self.client = client
+        self.phone_number_id = phone_number_id
+        self.checkpoint = checkpoint
+        self.limiter = limiter
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.bank = bank
+        self.history = history
+        self.job_description_budget = job_description_budget
+        self.out = out
+        self.counts = Counter()
+        # The HTTP calls block, so they run on threads while asyncio does the pacing
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="batch-launch")
+
+    def pending(self, rows, retry_failed=False, retry_uncertain=False):
+        """Rows still to launch, in schedule order. Skipped rows are counted in ``counts``."""
+        todo, seen = [], set()
+        retry = {RETRYING, FAILED} if retry_failed else {RETRYING}
+        if retry_uncertain:
+            retry |= {STARTED, UNCERTAIN}
+        for row in rows:
+            status = self.checkpoint.status(row.row_id)
+            if row.row_id in seen:
+                self.counts["duplicate"] += 1
+            elif status is not None and status not in retry:
+                self.counts[f"already {status}"] += 1
+            else:
+                todo.append(row)
+            seen.add(row.row_id)
+        return sorted(todo, key=lambda row: row.scheduled_at)
+
+    def _launch(self, row):
+        candidate = row.candidate or row.phone
+        questions = interviews.plan_questions(self.bank, self.history, candidate, row.config)
+        interview = interviews.prepare(row.config, questions, self.job_description_budget)
+        customer = {"number": row.phone}
+        if row.candidate and "@" not in row.candidate:
+            customer["name"] = row.candidate
+        call_id = self.client.create_phone_call({
+            "assistant": interview.assistant,
+            "phoneNumberId": self.phone_number_id,
+            "customer": customer,
+        })
+        if questions:
+            self.history.record(candidate, questions)
+        return call_id, interview
+
+    def _report(self, row, status, detail):
+        self.counts[status] += 1
+        print(f"{status:9} {row.row_id} (line {row.line}) {detail}", file=self.out, flush=True)
+
+    async def launch(self, row):
+        delay = row.scheduled_at - time.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        for attempt in range(1, self.max_attempts + 1):
+            await self.limiter.acquire()
+            self.checkpoint.write(row.row_id, STARTED, attempts=attempt)
+            try:
+                call_id, interview = await loop.run_in_executor(self._executor, self._launch, row)
+            except Exception as e:
+                if not is_transient(e) and isinstance(e, requests.RequestException):
+                    self.checkpoint.write(row.row_id, UNCERTAIN, attempts=attempt, error=str(e))
+                    self._report(row, UNCERTAIN, f"{e} (rerun with --retry-uncertain to launch it again)")
+                    return
+                if not is_transient(e) or attempt == self.max_attempts:
+                    self.checkpoint.write(row.row_id, FAILED, attempts=attempt, error=str(e))
+                    self._report(row, FAILED, str(e))
+                    return
+                wait = backoff_delay(attempt - 1, e)
+                if getattr(e, "status", None) == 429:
+                    # Slow every worker down, not just this one
+                    self.limiter.pause(wait)
+                self.checkpoint.write(row.row_id, RETRYING, attempts=attempt, error=str(e))
+                self.counts["retries"] += 1
+                await asyncio.sleep(wait)
+                continue
+            self.checkpoint.write(row.row_id, LAUNCHED, attempts=attempt, call_id=call_id,
+                                  **interviews.interview_meta(row.row_id, interview))
+            self._report(row, LAUNCHED, f"call {call_id}" + (f" after {attempt} attempts" if attempt > 1 else ""))
+            return
+
+    async def _worker(self, queue):
+        while not queue.empty():
+            await self.launch(queue.get_nowait())
+
+    async def run(self, rows):
+        queue = asyncio.Queue()
+        for row in rows:
+            queue.put_nowait(row)
+        try:
+            await asyncio.gather(*(self._worker(queue) for _ in range(self.concurrency)))
+        finally:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        return self.counts
+
+
+def _rate(args, rows):
+    if args.rate:
+        return args.rate
+    if args.max_active_calls and rows:
+        # At this rate, calls of the batch's average length keep about max_active_calls running
+        average = sum(interviews.duration_seconds(row.config) for row in rows) / len(rows)
+        return args.max_active_calls / average
+    return DEFAULT_RATE
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("manifest", help="CSV or JSONL file, one interview per row")
+    parser.add_argument("--checkpoint", help="progress file (default: <manifest>.progress.jsonl)")
+    parser.add_argument("--phone-number-id", help="Vapi phone number to call from (default: VAPI_PHONE_NUMBER_ID)")
+    parser.add_argument("--rate", type=float, help=f"launches per second (default: {DEFAULT_RATE}, "
+                        "or derived from --max-active-calls)")
+    parser.add_argument("--burst", type=int, help="launches allowed back to back")
+    parser.add_argument("--max-active-calls", type=int, help="provider concurrency limit to pace the batch for")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="launch requests in flight")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS)
+    parser.add_argument("--retry-failed", action="store_true", help="launch rows that failed last time again")
+    parser.add_argument("--retry-uncertain", action="store_true",
+                        help="launch rows that were interrupted mid-request again (may call twice)")
+    parser.add_argument("--dry-run", action="store_true", help="check the manifest and show what would launch")
+    args = parser.parse_args()
+
+    settings = load_settings()
+    rows, errors = read_manifest(args.manifest)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        sys.exit(f"{len(errors)} invalid rows; fix the manifest and rerun")
+    phone_number_id = args.phone_number_id or settings.phone_number_id
+    if not args.dry_run and not (settings.api_key and phone_number_id):
+        sys.exit("VAPI_API_KEY and a phone number ID (--phone-number-id or VAPI_PHONE_NUMBER_ID) are required")
+
+    checkpoint = Checkpoint(args.checkpoint or os.path.splitext(args.manifest)[0] + ".progress.jsonl")
+    rate = _rate(args, rows)
+    burst = args.burst or max(1, min(DEFAULT_BURST, args.max_active_calls or DEFAULT_BURST))
+    source = question_bank.DEFAULT_SOURCE if settings.question_bank is None else settings.question_bank
+    bank = question_bank.load(source) if source else None
+    launcher = BatchLauncher(
+        VapiClient(settings.api_key or "", settings.api_url or DEFAULT_API_URL, pool_size=args.concurrency),
+        phone_number_id,
+        checkpoint, TokenBucket(rate, burst), args.concurrency, args.max_attempts, bank,
+        question_bank.QuestionHistory(open_store(settings.state_url)), settings.job_description_budget
+    )
+    todo = launcher.pending(rows, args.retry_failed, args.retry_uncertain)
+    skipped = ", ".join(f"{count} {status}" for status, count in sorted(launcher.counts.items()))
+    print(f"{len(rows)} rows, {len(todo)} to launch at {rate:.3g}/s (burst {burst})"
+          + (f"; skipping {skipped}" if skipped else ""), file=sys.stderr)
+    if launcher.counts[f"already {STARTED}"] or launcher.counts[f"already {UNCERTAIN}"]:
+        print("Rows interrupted mid-request may already have been called; check them in the Vapi dashboard "
+              "and rerun with --retry-uncertain to launch them again", file=sys.stderr)
+    if args.dry_run or not todo:
+        return
+
+    launcher.counts.clear()
+    started = time.perf_counter()
+    try:
+        counts = asyncio.run(launcher.run(todo))
+    except KeyboardInterrupt:
+        sys.exit(f"Interrupted; rerun to continue from {checkpoint.path}")
+    finally:
+        checkpoint.close()
+    elapsed = time.perf_counter() - started
+    print(", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+          + f" in {elapsed:.1f}s", file=sys.stderr)
+    if counts[FAILED] or counts[UNCERTAIN]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
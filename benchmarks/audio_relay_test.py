@@ -0,0 +1,220 @@
+"""Browser audio relay under load: many concurrent streams at flat memory.
+
+Places calls through ``voice_backends.BrowserAudioVoice`` against
+``FakeVapiServer``, whose WebSocket-transport calls point at an in-process
+echo server standing in for Vapi's audio socket (it sends every frame back and
+a transcript message every second). For each call a simulated browser streams
+20 ms frames of 16 kHz PCM in real time through the ``AudioRelay`` and reads
+the echoed audio back.
+
+Calls run in ``--waves`` back-to-back waves of ``--streams`` concurrent calls,
+each lasting ``--seconds``. After each wave it records the process's resident
+memory, and at the end it reports frames relayed and dropped, jitter and
+queueing delay from the relay's metrics, and relay CPU time:
+
+    python benchmarks/audio_relay_test.py --streams 100 --seconds 10 --waves 3
+
+It exits 1 if audio was lost, streams leaked or memory grew across waves.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from tornado.web import Application
+from tornado.websocket import WebSocketHandler, websocket_connect
+
+from audio_transport import FRAME_SAMPLES, FRAME_SECONDS, AudioRelay
+from fake_vapi_server import FakeVapiServer
+from metrics import MetricsRegistry
+from voice_backends import BrowserAudioVoice
+
+API_KEY = "relay-key"
+# Resident memory may wobble by allocator noise between waves
+RSS_TOLERANCE_KB = 4096
+
+
+class _EchoCall(WebSocketHandler):
+    """Stand-in for a Vapi call's audio socket: echoes audio and reports a transcript every 50 frames."""
+
+    def open(self, call_id):
+        self.frames = 0
+
+    def on_message(self, message):
+        if isinstance(message, bytes):
+            self.write_message(message, binary=True)
+            self.frames += len(message) // (FRAME_SAMPLES * 2)
+            if self.frames % 50 == 0:
+                self.write_message(json.dumps({"type": "transcript", "role": "user", "transcriptType": "final",
+                                               "transcript": f"{self.frames} frames"}))
+
+
+def _start_echo_server():
+    ready = threading.Event()
+    ports = []
+
+    def run():
+        asyncio.set_event_loop(asyncio.new_event_loop())
+        server = Application([(r"/calls/(.*)", _EchoCall)]).listen(0, "127.0.0.1")
+        ports.append(next(iter(server._sockets.values())).getsockname()[1])
+        ready.set()
+        asyncio.get_event_loop().run_forever()
+
+    threading.Thread(target=run, name="echo-upstream", daemon=True).start()
+    ready.wait()
+    return f"ws://127.0.0.1:{ports[0]}/calls"
+
+
+def _rss_kb():
+    try:
+        with open("/proc/self/status", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _relay_cpu_seconds():
+    # CPU time of the relay's thread, where all the per-frame work happens
+    for thread in threading.enumerate():
+        if thread.name == "audio-relay":
+            try:
+                return time.clock_gettime(time.pthread_getcpuclockid(thread.ident))
+            except (AttributeError, OSError):
+                return None
+    return None
+
+
+async def _browser(url, seconds, frame):
+    """Stream ``seconds`` of audio in real-time frames; returns (frames sent, bytes echoed back)."""
+    socket = await websocket_connect(url)
+    received = 0
+
+    async def read():
+        nonlocal received
+        while True:
+            message = await socket.read_message()
+            if message is None:
+                return
+            received += len(message)
+
+    reader = asyncio.ensure_future(read())
+    frames = int(seconds / FRAME_SECONDS)
+    began = time.monotonic()
+    for number in range(frames):
+        # Paced against the clock, like a microphone, not against the previous send
+        delay = began + number * FRAME_SECONDS - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        await socket.write_message(frame, binary=True)
+    # Let the last echoes come back before hanging up
+    await asyncio.sleep(0.5)
+    socket.close()
+    await asyncio.wait([reader], timeout=2)
+    return frames, received
+
+
+def run_relay_test(streams, seconds, waves):
+    registry = MetricsRegistry()
+    relay = AudioRelay(port=0, host="127.0.0.1", max_streams=streams, registry=registry).start()
+    server = FakeVapiServer(websocket_url=_start_echo_server()).start()
+    voice = BrowserAudioVoice(relay, api_url=server.url)
+    client = voice.get(API_KEY)
+    frame = (np.sin(np.arange(FRAME_SAMPLES) / 8) * 8000).astype(np.int16).tobytes()
+    messages = []
+    sent = received = 0
+    rss = []
+    cpu_before = _relay_cpu_seconds()
+    began = time.perf_counter()
+
+    async def wave():
+        calls = []
+        for _ in range(streams):
+            call = client.new_call(on_message=messages.append)
+            await asyncio.get_event_loop().run_in_executor(None, lambda call=call: call.start(assistant={}))
+            calls.append(call)
+        results = await asyncio.gather(*[_browser(call.browser_url, seconds, frame) for call in calls])
+        for call in calls:
+            call.stop()
+        return results
+
+    for _ in range(waves):
+        for frames, echoed in asyncio.run(wave()):
+            sent += frames
+            received += echoed // len(frame)
+        deadline = time.monotonic() + 5
+        while relay.stats()["streams"] and time.monotonic() < deadline:
+            time.sleep(0.05)
+        rss.append(_rss_kb())
+
+    elapsed = time.perf_counter() - began
+    cpu_after = _relay_cpu_seconds()
+    stats = relay.stats()
+    summary = {(row["phase"], row.get("direction")): row for row in registry.summary()}
+
+    def p95_ms(phase, direction):
+        row = summary.get((phase, direction))
+        return None if row is None or row["p95"] is None else round(row["p95"] * 1000, 2)
+
+    server.stop()
+    return {
+        "streams": streams,
+        "waves": waves,
+        "seconds": round(elapsed, 1),
+        "frames_sent": sent,
+        "frames_echoed": received,
+        "transcript_messages": len(messages),
+        "uplink_jitter_p95_ms": p95_ms("audio_jitter", "uplink"),
+        "downlink_jitter_p95_ms": p95_ms("audio_jitter", "downlink"),
+        "uplink_queue_delay_p95_ms": p95_ms("audio_queue_delay", "uplink"),
+        "downlink_queue_delay_p95_ms": p95_ms("audio_queue_delay", "downlink"),
+        "relay_cpu_per_stream_pct": (
+            round((cpu_after - cpu_before) / elapsed / streams * 100, 3) if cpu_before is not None else None),
+        "ring_buffer_kb": stats["buffer_bytes"] // 1024,
+        "streams_left": stats["streams"],
+        "rings_free": relay.pool.available,
+        "rss_kb": rss,
+    }
+
+
+def check(result):
+    problems = []
+    if result["frames_echoed"] < result["frames_sent"]:
+        problems.append(f"{result['frames_sent'] - result['frames_echoed']} frames lost")
+    if result["streams_left"] or result["rings_free"] != result["streams"]:
+        problems.append("streams were not released")
+    rss = [value for value in result["rss_kb"][1:] if value is not None]
+    if len(rss) > 1 and rss[-1] - rss[0] > RSS_TOLERANCE_KB:
+        problems.append(f"resident memory grew {rss[-1] - rss[0]} KB after the first wave")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--streams", type=int, default=50, help="concurrent calls")
+    parser.add_argument("--seconds", type=float, default=10, help="audio per call")
+    parser.add_argument("--waves", type=int, default=3)
+    args = parser.parse_args()
+
+    result = run_relay_test(args.streams, args.seconds, args.waves)
+    print(json.dumps(result, indent=2))
+    problems = check(result)
+    for problem in problems:
+        print(problem)
+    if problems:
+        sys.exit(1)
+    print("Audio was relayed in full and resident memory stayed flat")
+
+
+if __name__ == "__main__":
+    main()
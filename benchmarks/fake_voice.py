@@ -0,0 +1,104 @@
+"""In-process stand-in for the Daily/Vapi voice layer, for benchmarks only.
+
+``install()`` registers fake ``daily`` and ``vapi_python.daily_call`` modules in
+``sys.modules`` so calls can be started and stopped without audio devices or a
+network. REST calls still go to ``fake_vapi_server.FakeVapiServer``.
+"""
+
+import random
+import sys
+import threading
+import time
+import types
+
+import vapi_clients
+
+# Simulated time to join and leave the call room
+JOIN_SECONDS = 0.0
+LEAVE_SECONDS = 0.0
+# Share of joins and leaves that raise, to exercise cleanup paths
+JOIN_FAILURE_RATE = 0.0
+LEAVE_FAILURE_RATE = 0.0
+
+_random = random.Random(0)
+_counts_lock = threading.Lock()
+
+
+class _Resource:
+    """Stands in for an audio stream, PyAudio or the Daily client; counts how many are still open."""
+    open = 0
+
+    def __init__(self):
+        with _counts_lock:
+            _Resource.open += 1
+        self.closed = False
+
+    def _close(self):
+        if not self.closed:
+            self.closed = True
+            with _counts_lock:
+                _Resource.open -= 1
+
+    close = terminate = release = _close
+
+
+class FakeDailyCall:
+    created = 0
+    joined = 0
+    left = 0
+
+    def __init__(self):
+        self.url = None
+        # Same private names as vapi_python's DailyCall, which PooledVapi releases
+        self._DailyCall__input_audio_stream = _Resource()
+        self._DailyCall__output_audio_stream = _Resource()
+        self._DailyCall__audio_interface = _Resource()
+        self._DailyCall__call_client = _Resource()
+        with _counts_lock:
+            FakeDailyCall.created += 1
+
+    def join(self, url):
+        if JOIN_SECONDS:
+            time.sleep(JOIN_SECONDS)
+        if JOIN_FAILURE_RATE and _random.random() < JOIN_FAILURE_RATE:
+            raise RuntimeError("Simulated join failure")
+        self.url = url
+        with _counts_lock:
+            FakeDailyCall.joined += 1
+
+    def leave(self):
+        if LEAVE_SECONDS:
+            time.sleep(LEAVE_SECONDS)
+        with _counts_lock:
+            FakeDailyCall.left += 1
+        if LEAVE_FAILURE_RATE and _random.random() < LEAVE_FAILURE_RATE:
+            raise RuntimeError("Simulated leave failure")
+
+    def on_app_message(self, message, sender):
+        pass
+
+    def send_app_message(self, message):
+        pass
+
+
+def open_resources():
+    """Audio and Daily resources created by fake calls and not yet released."""
+    return _Resource.open
+
+
+def install(join_seconds=0.0, leave_seconds=0.0, join_failure_rate=0.0, leave_failure_rate=0.0):
+    global JOIN_SECONDS, LEAVE_SECONDS, JOIN_FAILURE_RATE, LEAVE_FAILURE_RATE
+    JOIN_SECONDS, LEAVE_SECONDS = join_seconds, leave_seconds
+    JOIN_FAILURE_RATE, LEAVE_FAILURE_RATE = join_failure_rate, leave_failure_rate
+
+    daily = types.ModuleType("daily")
+    daily.Daily = types.SimpleNamespace(init=lambda: None)
+    daily_call = types.ModuleType("vapi_python.daily_call")
+    daily_call.DailyCall = FakeDailyCall
+    vapi_python = sys.modules.get("vapi_python") or types.ModuleType("vapi_python")
+    vapi_python.daily_call = daily_call
+    sys.modules.update({"daily": daily, "vapi_python": vapi_python, "vapi_python.daily_call": daily_call})
+    # FakeDailyCall mirrors the private names of a supported release, whatever is installed
+    vapi_clients._vapi_python_version = lambda: vapi_clients.VAPI_PYTHON_VERSIONS[0]
+    vapi_clients._listening_call_class.cache_clear()
+    return FakeDailyCall
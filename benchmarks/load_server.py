@@ -0,0 +1,59 @@
+"""Run an entry point under the Streamlit server with stand-in Vapi services.
+
+The REST API is served by ``FakeVapiServer`` and the voice layer is replaced
+in-process by ``fake_voice``, so calls go through the full app code path
+without audio devices or network access. Used by ``load_test.py``:
+
+    python benchmarks/load_server.py --port 8599 --join-seconds 0.2
+"""
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default="main.py")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--join-seconds", type=float, default=0.2, help="simulated time to join a call")
+    parser.add_argument("--leave-seconds", type=float, default=0.05, help="simulated time to leave a call")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    from fake_vapi_server import FakeVapiServer
+    import fake_voice
+
+    fake_voice.install(args.join_seconds, args.leave_seconds)
+    server = FakeVapiServer().start()
+    os.environ.update(VAPI_API_KEY=os.environ.get("VAPI_API_KEY", "load-test-key"), VAPI_API_URL=server.url)
+    os.environ.setdefault("VAPI_PREWARM", "0")
+    # Synthetic interviews go to scratch files, never the real history or question bank
+    scratch = tempfile.mkdtemp(prefix="load-server-")
+    shutil.copy(os.path.join(ROOT, "data", "questions.jsonl"), os.path.join(scratch, "questions.jsonl"))
+    os.environ.update(
+        TRANSCRIPT_DIR=os.path.join(scratch, "transcripts"),
+        HISTORY_DB=os.path.join(scratch, "history.db"),
+        QUESTION_BANK=os.path.join(scratch, "questions.jsonl"),
+    )
+    os.chdir(ROOT)
+
+    from streamlit.web import cli
+    sys.argv = [
+        "streamlit", "run", os.path.join(ROOT, args.script),
+        "--server.port", str(args.port),
+        "--server.headless", "true",
+        "--server.fileWatcherType", "none",
+        "--browser.gatherUsageStats", "false",
+    ]
+    sys.exit(cli.main())
+
+
+if __name__ == "__main__":
+    main()
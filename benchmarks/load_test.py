@@ -0,0 +1,359 @@
+"""Concurrent-session load test for a running Streamlit entry point.
+
+Each simulated browser opens Streamlit's websocket and speaks its protocol the
+way the frontend does: full reruns with widget states, button triggers inside
+fragments, and the periodic fragment reruns requested by ``run_every``. Every
+session loops configure -> start -> hold -> stop. For each concurrency level
+the report gives cycle throughput, start/stop/rerun latency percentiles, and
+the server's CPU use and peak RSS (read from ``/proc``, Linux only).
+
+By default the app is started with ``load_server.py`` (stand-in Vapi services):
+
+    python benchmarks/load_test.py --sessions 1 10 25 50 --cycles 3 --hold 2
+    python benchmarks/load_test.py --url http://127.0.0.1:8501 --pid 1234   # existing server
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from tornado.websocket import websocket_connect
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+BUTTONS = {
+    "main.py": ("Start Interview", "End Interview"),
+    "app.py": ("Start Call", "Stop Call"),
+}
+STATUS_CLASSES = {"status-active": "ACTIVE", "status-inactive": "INACTIVE", "status-pending": "PENDING"}
+STEP_TIMEOUT = 60
+# A page that shows no progress for this long is reloaded with a full rerun
+STALL_TIMEOUT = 10
+
+
+class SimulatedBrowser:
+    """One Streamlit session driven over the websocket."""
+
+    def __init__(self, url):
+        self.ws_url = url.replace("http", "ws", 1).rstrip("/") + "/_stcore/stream"
+        self.ws = None
+        self.buttons = {}
+        self.selectboxes = {}
+        self.widget_values = {}
+        self.status = None
+        self.status_text = None
+        self.exceptions = []
+        self.finished = asyncio.Event()
+        self.status_changed = asyncio.Event()
+        self._auto_reruns = {}
+        self._reader = None
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.ws_url, subprotocols=["streamlit"])
+        self._reader = asyncio.ensure_future(self._read())
+
+    async def close(self):
+        for task in self._auto_reruns.values():
+            task.cancel()
+        if self._reader is not None:
+            self._reader.cancel()
+        if self.ws is not None:
+            self.ws.close()
+
+    async def _read(self):
+        while True:
+            data = await self.ws.read_message()
+            if data is None:
+                return
+            msg = ForwardMsg()
+            msg.ParseFromString(data)
+            self._handle(msg)
+
+    def _handle(self, msg):
+        kind = msg.WhichOneof("type")
+        if kind == "new_session" and not msg.new_session.fragment_ids_this_run:
+            # A full run starts; the frontend drops auto-reruns from the previous run
+            for task in self._auto_reruns.values():
+                task.cancel()
+            self._auto_reruns = {}
+        elif kind == "auto_rerun":
+            fragment_id = msg.auto_rerun.fragment_id
+            if fragment_id not in self._auto_reruns:
+                self._auto_reruns[fragment_id] = asyncio.ensure_future(
+                    self._auto_rerun(msg.auto_rerun.interval, fragment_id))
+        elif kind == "delta" and msg.delta.WhichOneof("type") == "new_element":
+            self._element(msg.delta.new_element, msg.delta.fragment_id)
+        elif kind == "script_finished":
+            self.finished.set()
+
+    def _element(self, element, fragment_id):
+        kind = element.WhichOneof("type")
+        if kind == "button":
+            self.buttons[element.button.label] = (element.button.id, fragment_id)
+        elif kind == "exception":
+            self.exceptions.append(f"{element.exception.type}: {element.exception.message}")
+        elif kind == "selectbox":
+            self.selectboxes[element.selectbox.label] = (element.selectbox.id, list(element.selectbox.options))
+        elif kind == "markdown" and "Status:" in element.markdown.body:
+            self.status_text = re.sub("<[^>]+>", "", element.markdown.body).split(":", 1)[-1].strip()
+            for css_class, status in STATUS_CLASSES.items():
+                if css_class in element.markdown.body and status != self.status:
+                    self.status = status
+                    self.status_changed.set()
+
+    async def _auto_rerun(self, interval, fragment_id):
+        while True:
+            await asyncio.sleep(interval)
+            self._send_rerun(fragment_id=fragment_id, auto=True)
+
+    def _send_rerun(self, trigger=None, fragment_id="", auto=False):
+        msg = BackMsg()
+        state = msg.rerun_script
+        state.query_string = ""
+        state.page_script_hash = ""
+        if fragment_id:
+            state.fragment_id = fragment_id
+            state.is_auto_rerun = auto
+        for widget_id, index in self.widget_values.items():
+            widget = state.widget_states.widgets.add()
+            widget.id = widget_id
+            widget.int_value = index
+        if trigger is not None:
+            widget = state.widget_states.widgets.add()
+            widget.id = trigger
+            widget.trigger_value = True
+        self.ws.write_message(msg.SerializeToString(), binary=True)
+
+    async def rerun(self, trigger=None, fragment_id=""):
+        self.finished.clear()
+        self._send_rerun(trigger, fragment_id)
+        await asyncio.wait_for(self.finished.wait(), STEP_TIMEOUT)
+
+    async def configure(self):
+        """Pick a random value in every select box."""
+        for widget_id, options in self.selectboxes.values():
+            self.widget_values[widget_id] = random.randrange(len(options))
+        await self.rerun()
+
+    async def click(self, label):
+        if label not in self.buttons:
+            # The run that renders it may have been dropped (see wait_for_status)
+            await self.rerun()
+        widget_id, fragment_id = self.buttons[label]
+        await self.rerun(trigger=widget_id, fragment_id=fragment_id)
+
+    async def wait_for_status(self, status):
+        """Wait until the page shows ``status``; returns how many stalls were recovered.
+
+        Under load the server can drop the output of a run when a fragment's
+        auto-rerun arrives just as that run finishes, leaving the page stale with
+        nothing left to poll. A user would reload; we send a full rerun.
+        """
+        stalls = 0
+        deadline = time.perf_counter() + STEP_TIMEOUT
+        while self.status != status:
+            self.status_changed.clear()
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+            try:
+                await asyncio.wait_for(self.status_changed.wait(), min(STALL_TIMEOUT, remaining))
+            except asyncio.TimeoutError:
+                if time.perf_counter() >= deadline:
+                    continue
+                stalls += 1
+                self._send_rerun()
+        return stalls
+
+
+async def run_session(url, script, cycles, hold, samples):
+    start_label, stop_label = BUTTONS[script]
+    browser = SimulatedBrowser(url)
+    await browser.connect()
+    step = "load"
+    try:
+        t = time.perf_counter()
+        await browser.rerun()
+        samples["rerun"].append(time.perf_counter() - t)
+        for _ in range(cycles):
+            step = "configure"
+            t = time.perf_counter()
+            await browser.configure()
+            samples["rerun"].append(time.perf_counter() - t)
+
+            step = "start"
+            t = time.perf_counter()
+            await browser.click(start_label)
+            samples["stalls"] += await browser.wait_for_status("ACTIVE")
+            samples["start"].append(time.perf_counter() - t)
+
+            await asyncio.sleep(hold)
+
+            step = "stop"
+            t = time.perf_counter()
+            await browser.click(stop_label)
+            samples["stalls"] += await browser.wait_for_status("INACTIVE")
+            samples["stop"].append(time.perf_counter() - t)
+            samples["cycles"] += 1
+    except (asyncio.TimeoutError, KeyError) as e:
+        samples["errors"].append(f"{step}: {type(e).__name__} {e} (status {browser.status_text}) {browser.exceptions[-1:]}")
+    finally:
+        await browser.close()
+
+
+class ProcessSampler:
+    """CPU and peak RSS of a process, read from /proc."""
+
+    def __init__(self, pid):
+        self.pid = pid
+        self.ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+        self.peak_rss = 0
+        self._cpu_start = None
+        self._wall_start = None
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        # utime and stime are fields 14 and 15 of the full line
+        return (int(fields[11]) + int(fields[12])) / self.ticks
+
+    def _rss(self):
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def start(self):
+        if not self.pid or not os.path.exists(f"/proc/{self.pid}"):
+            return
+        self._cpu_start, self._wall_start = self._cpu_seconds(), time.perf_counter()
+        self.peak_rss = self._rss()
+
+    def sample(self):
+        if self._cpu_start is not None:
+            self.peak_rss = max(self.peak_rss, self._rss())
+
+    def result(self):
+        if self._cpu_start is None:
+            return {"cpu_percent": None, "peak_rss_mb": None}
+        wall = time.perf_counter() - self._wall_start
+        return {
+            "cpu_percent": round(100 * (self._cpu_seconds() - self._cpu_start) / wall, 1),
+            "peak_rss_mb": round(self.peak_rss / 2 ** 20, 1),
+        }
+
+
+def _percentiles(values):
+    if not values:
+        return None
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[int(q * (len(ordered) - 1))] * 1000, 1)
+    return {"p50_ms": pick(0.5), "p95_ms": pick(0.95), "p99_ms": pick(0.99),
+            "mean_ms": round(statistics.mean(values) * 1000, 1)}
+
+
+async def run_level(url, script, sessions, cycles, hold, pid):
+    samples = {"rerun": [], "start": [], "stop": [], "cycles": 0, "stalls": 0, "errors": []}
+    sampler = ProcessSampler(pid)
+    sampler.start()
+
+    async def sample_forever():
+        while True:
+            sampler.sample()
+            await asyncio.sleep(0.25)
+
+    monitor = asyncio.ensure_future(sample_forever())
+    started = time.perf_counter()
+    await asyncio.gather(*(run_session(url, script, cycles, hold, samples) for _ in range(sessions)))
+    elapsed = time.perf_counter() - started
+    monitor.cancel()
+
+    return dict({
+        "sessions": sessions,
+        "cycles": samples["cycles"],
+        "seconds": round(elapsed, 2),
+        "cycles_per_second": round(samples["cycles"] / elapsed, 2),
+        "rerun": _percentiles(samples["rerun"]),
+        "start": _percentiles(samples["start"]),
+        "stop": _percentiles(samples["stop"]),
+        "stalls": samples["stalls"],
+        "errors": samples["errors"][:5],
+        "error_count": len(samples["errors"]),
+    }, **sampler.result())
+
+
+def _wait_until_healthy(url, timeout=60):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(url.rstrip("/") + "/_stcore/health", timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            time.sleep(0.3)
+    raise RuntimeError(f"Streamlit server at {url} did not become healthy")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--script", default="main.py", choices=sorted(BUTTONS))
+    parser.add_argument("--sessions", type=int, nargs="+", default=[1, 5, 10, 25])
+    parser.add_argument("--cycles", type=int, default=3, help="start/stop cycles per session")
+    parser.add_argument("--hold", type=float, default=2.0, help="seconds to keep each call active")
+    parser.add_argument("--url", help="use an already running server instead of starting one")
+    parser.add_argument("--pid", type=int, help="server process to sample CPU/RSS from (with --url)")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--join-seconds", type=float, default=0.2)
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args()
+
+    server = None
+    url, pid = args.url, args.pid
+    if url is None:
+        env = dict(os.environ)
+        # Measure the node itself rather than the default admission caps
+        env.setdefault("MAX_CALLS_PER_NODE", str(max(args.sessions) * 2))
+        env.setdefault("MAX_CALLS_PER_KEY", str(max(args.sessions) * 2))
+        server = subprocess.Popen(
+            [sys.executable, os.path.join(BENCH_DIR, "load_server.py"), "--script", args.script,
+             "--port", str(args.port), "--join-seconds", str(args.join_seconds)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        url, pid = f"http://127.0.0.1:{args.port}", server.pid
+    try:
+        _wait_until_healthy(url)
+        levels = [asyncio.run(run_level(url, args.script, n, args.cycles, args.hold, pid)) for n in args.sessions]
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    if args.json:
+        print(json.dumps(levels, indent=2))
+        return
+    print(f"{args.script}: {args.cycles} cycles per session, {args.hold:g}s hold")
+    print(f"{'sessions':>8} {'cycles/s':>9} {'start p50/p99 ms':>18} {'stop p50/p99 ms':>17} "
+          f"{'rerun p99 ms':>13} {'cpu %':>7} {'rss MB':>7} {'stalls':>7} {'errors':>7}")
+    for level in levels:
+        start, stop, rerun = level["start"] or {}, level["stop"] or {}, level["rerun"] or {}
+        print(f"{level['sessions']:>8} {level['cycles_per_second']:>9} "
+              f"{start.get('p50_ms', '-'):>8}/{start.get('p99_ms', '-'):<9} "
+              f"{stop.get('p50_ms', '-'):>8}/{stop.get('p99_ms', '-'):<8} "
+              f"{rerun.get('p99_ms', '-'):>13} {level['cpu_percent'] or '-':>7} "
+              f"{level['peak_rss_mb'] or '-':>7} {level['stalls']:>7} {level['error_count']:>7}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,194 @@
+"""End-to-end interview throughput on the simulated voice backend.
+
+Each session runs whole interviews the way ``main.py`` does: plan questions,
+compile the assistant, record the interview in the call state, transcript
+writer and history, get admitted by the ``SessionManager``, connect, then
+listen until the replayed interview ends and stop. Calls come from
+``voice_backends.SimulatedVoice``, which replays the scripts in
+``data/interviews`` (or ``--scripts``) ``--speedup`` times faster than real
+time, so no network or audio is involved:
+
+    python benchmarks/replay_test.py --sessions 100 --duration 60 --speedup 50
+
+Every other interview is paced against a time limit shorter than any script,
+so the ``InterviewPacer`` sends its notices and stops it; the rest get a limit
+that fits their script. It reports completed interviews per minute and start
+latency, then checks that every interview's transcript and history row were
+written in full (up to the hard stop, for the interviews that ran out of time)
+and that exactly the short-limit interviews were stopped.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from call_executor import ACTIVE, FAILED, IDLE, CallLifecycle, make_executor
+from call_session import connector
+from call_state import CallStateStore
+from history import COMPLETED, InterviewHistory
+from metrics import CallTimer, MetricsRegistry
+from pacing import InterviewPacer, TimerWheel
+from session_manager import SessionManager
+from state_store import MemoryStore
+from transcripts import TranscriptWriter
+from voice_backends import DEFAULT_SCRIPTS, SimulatedVoice, load_scripts
+import interviews
+import prompts
+import question_bank
+
+API_KEY = "replay-key"
+
+
+def _wait(lifecycle, states, timeout):
+    deadline = time.monotonic() + timeout
+    while lifecycle.poll() not in states:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Call stuck in {lifecycle.state}")
+        time.sleep(0.005)
+    return lifecycle.state
+
+
+def run_replay(sessions, duration, speedup, scripts_path=DEFAULT_SCRIPTS, bank_path=question_bank.DEFAULT_SOURCE):
+    workdir = tempfile.mkdtemp(prefix="replay-")
+    voice = SimulatedVoice(load_scripts(scripts_path), speedup=speedup)
+    lengths = [max(turn.offset + turn.duration for turn in script.turns) for script in voice.scripts]
+    longest, shortest = max(lengths), min(lengths)
+    # Interview time limits that fit every script, and that every script runs over
+    executor = make_executor()
+    manager = SessionManager(max_calls=sessions, max_calls_per_key=sessions)
+    call_state = CallStateStore(MemoryStore())
+    transcripts = TranscriptWriter(os.path.join(workdir, "transcripts"))
+    history = InterviewHistory(os.path.join(workdir, "history.db"))
+    bank = question_bank.load(bank_path) if bank_path else None
+    asked = question_bank.QuestionHistory(call_state.store)
+    registry = MetricsRegistry()
+    fits, overruns = longest * 1.5, shortest / 2
+    # On the replay's compressed clock, with notices scaled so a short limit still gets all of them
+    pacer = InterviewPacer(TimerWheel(tick=0.05), notice_seconds=shortest / 8, wrap_up_seconds=shortest / 16,
+                           speedup=speedup)
+    finished, starts, errors = [], [], []
+    lock = threading.Lock()
+    deadline = time.monotonic() + duration
+
+    def session(number):
+        lifecycle = CallLifecycle(executor)
+        cycle = 0
+        while time.monotonic() < deadline:
+            cycle += 1
+            config = interviews.make_config(
+                interview_type=prompts.INTERVIEW_TYPES[(number + cycle) % len(prompts.INTERVIEW_TYPES)],
+                interview_level=prompts.INTERVIEW_LEVELS[cycle % len(prompts.INTERVIEW_LEVELS)],
+            )
+            candidate = f"candidate-{number}"
+            try:
+                questions = interviews.plan_questions(bank, asked, candidate, config)
+                interview = interviews.prepare(config, questions)
+                interview_id = call_state.create(config.interview_type, config.interview_level,
+                                                 config.interview_duration, config.company_type)
+                call_state.attach(interview_id, lifecycle)
+                meta = interviews.interview_meta(interview_id, interview, started_at=time.time())
+                transcript = transcripts.attach(interview_id, lifecycle, meta=meta)
+                history.attach(interview_id, lifecycle, meta, candidate=candidate,
+                               transcript_path=transcripts.path(interview_id))
+                overrun = cycle % 2 == 0
+                pace = pacer.attach(lifecycle, overruns if overrun else fits, len(questions))
+                if questions:
+                    asked.record(candidate, questions)
+
+                clicked = time.perf_counter()
+                manager.submit(f"replay-{number}", API_KEY, lifecycle,
+                               connector(voice, {"assistant": interview.assistant},
+                                         on_message=pace.listen(transcript.add_message),
+                                         timer=CallTimer(registry, app="replay"), clicked=clicked))
+                if _wait(lifecycle, (ACTIVE, FAILED), 30) == FAILED:
+                    raise RuntimeError(lifecycle.error)
+                started = time.perf_counter() - clicked
+                call = lifecycle.call
+                if not call.ended.wait(longest / speedup + 30):
+                    raise RuntimeError("Replay didn't finish")
+                lifecycle.stop()
+                if _wait(lifecycle, (IDLE, FAILED), 30) == FAILED:
+                    raise RuntimeError(lifecycle.error)
+                with lock:
+                    starts.append(started)
+                    finished.append((interview_id, call.script, pace, overrun))
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+                lifecycle.stop()
+
+    threads = [threading.Thread(target=session, args=(n,), name=f"replay-{n}") for n in range(sessions)]
+    began = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - began
+
+    # Transcripts and history are written in the background; let them catch up before checking
+    transcripts.flush()
+    history.flush()
+    incomplete, mispaced = [], []
+    for interview_id, script, pace, overrun in finished:
+        expected = [turn.text for turn in script.turns]
+        with open(transcripts.path(interview_id), "r", encoding="utf-8") as f:
+            written = [item["text"] for item in map(json.loads, f) if "text" in item]
+        if overrun:
+            # Cut short by the pacer: what was said up to the stop
+            expected = expected[:len(written)] if len(written) < len(expected) else None
+        record = history.get(interview_id)
+        if written != expected or record is None or record["outcome"] != COMPLETED:
+            incomplete.append(interview_id)
+        if pace.hard_stopped != overrun:
+            mispaced.append(interview_id)
+    executor.shutdown(wait=True)
+    history.close()
+    return {
+        "sessions": sessions,
+        "speedup": speedup,
+        "seconds": round(elapsed, 1),
+        "interviews": len(finished),
+        "per_minute": round(len(finished) * 60 / elapsed, 1),
+        "start_p50_ms": round(statistics.median(starts) * 1000, 1) if starts else None,
+        "start_p95_ms": round(sorted(starts)[int(0.95 * (len(starts) - 1))] * 1000, 1) if starts else None,
+        "errors": len(errors),
+        "error_samples": sorted(set(errors))[:5],
+        "incomplete": len(incomplete),
+        "pacing_notices": pacer.counts["notices"],
+        "hard_stops": pacer.counts["hard_stops"],
+        "expected_hard_stops": sum(1 for *_, overrun in finished if overrun),
+        "mispaced": len(mispaced),
+        "workdir": workdir,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=50, help="interviews running at once")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to keep starting interviews")
+    parser.add_argument("--speedup", type=float, default=50)
+    parser.add_argument("--scripts", default=DEFAULT_SCRIPTS, help="interview script or directory of scripts")
+    parser.add_argument("--question-bank", default=question_bank.DEFAULT_SOURCE, help="'' to skip question plans")
+    args = parser.parse_args()
+
+    result = run_replay(args.sessions, args.duration, args.speedup, args.scripts, args.question_bank)
+    print(json.dumps(result, indent=2))
+    if result["errors"] or result["incomplete"] or not result["interviews"]:
+        sys.exit(1)
+    # A stopped interview had its half-way, time-left and wrap-up notices first
+    if (result["mispaced"] or result["hard_stops"] != result["expected_hard_stops"]
+            or result["pacing_notices"] < 3 * result["expected_hard_stops"]):
+        print("Interviews were not held to their time limits")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Soak test for the call-session engine: thousands of start/stop cycles at flat resource use.
+
+Drives the engine both apps use (``SessionManager`` admission, ``CallLifecycle``
+and ``PooledVapi`` via ``call_session.connector``) against ``FakeVapiServer``
+and the in-process fake voice layer. Some joins and leaves fail, some starts
+are cancelled mid-connect and some stops are repeated. After a warm-up, every
+``--sample-every`` cycles it waits for the engine to settle and records
+memory (tracemalloc), live call objects, unreleased audio/Daily resources,
+threads and open file descriptors. It exits 1 if any of them grow:
+
+    python benchmarks/soak_test.py --cycles 5000
+"""
+
+import argparse
+import gc
+import os
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Threads and descriptors may wobble by a pooled connection or worker
+HANDLE_TOLERANCE = 2
+SETTLE_TIMEOUT = 5
+
+
+def _wait(lifecycle, states, timeout=10):
+    deadline = time.monotonic() + timeout
+    while lifecycle.poll() not in states:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Call stuck in {lifecycle.state}")
+        time.sleep(0.0005)
+    return lifecycle.state
+
+
+def _open_fds():
+    try:
+        return len(os.listdir("/proc/self/fd"))
+    except OSError:
+        return None
+
+
+def run_soak(cycles, sessions, sample_every, warmup, cancel_rate, join_failure_rate, leave_failure_rate, seed=0):
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    import fake_voice
+    from fake_vapi_server import FakeVapiServer
+    from call_executor import ACTIVE, FAILED, IDLE, CallLifecycle, make_executor
+    from call_session import connector
+    from session_manager import SessionManager
+    from vapi_clients import PooledVapi, VapiClient
+
+    fake_voice.install(join_failure_rate=join_failure_rate, leave_failure_rate=leave_failure_rate)
+    rng = random.Random(seed)
+    server = FakeVapiServer().start()
+    client = VapiClient("soak-key", server.url)
+    executor = make_executor()
+    manager = SessionManager(max_calls=sessions, max_calls_per_key=sessions)
+    lifecycles = [CallLifecycle(executor) for _ in range(sessions)]
+    assistant = {"firstMessage": "Hello", "context": "Soak test", "model": "gpt-4o", "voice": "jennifer-playht"}
+    counts = {"active": 0, "start_failed": 0, "stop_failed": 0, "cancelled": 0, "repeat_stops": 0}
+    samples = []
+
+    def settle():
+        # Abandoned starts and timed-out stops finish on the executor; wait for them
+        deadline = time.monotonic() + SETTLE_TIMEOUT
+        while fake_voice.open_resources() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        # The fake server keeps every call body; that is not the engine's memory
+        server.state.calls.clear()
+        gc.collect()
+
+    def sample(cycle):
+        settle()
+        samples.append({
+            "cycle": cycle,
+            "memory_kb": tracemalloc.get_traced_memory()[0] / 1024,
+            "live_calls": sum(1 for o in gc.get_objects() if isinstance(o, PooledVapi)),
+            "open_resources": fake_voice.open_resources(),
+            # The call pool starts workers on demand up to its bound, so they are counted apart
+            "pool_threads": sum(1 for t in threading.enumerate() if t.name.startswith("vapi-call")),
+            "threads": sum(1 for t in threading.enumerate() if not t.name.startswith("vapi-call")),
+            "fds": _open_fds(),
+            "manager_active": manager.stats()["active"],
+        })
+        print("  ".join(f"{k}={v:.0f}" if isinstance(v, float) else f"{k}={v}" for k, v in samples[-1].items()),
+              flush=True)
+
+    tracemalloc.start()
+    started = time.perf_counter()
+    try:
+        for cycle in range(1, cycles + 1):
+            session = cycle % sessions
+            lifecycle = lifecycles[session]
+            manager.submit(f"soak-{session}", "soak-key", lifecycle,
+                           connector(client, {"assistant": assistant}))
+            if rng.random() < cancel_rate:
+                lifecycle.stop()
+                counts["cancelled"] += 1
+            state = _wait(lifecycle, (IDLE, ACTIVE, FAILED))
+            if state == ACTIVE:
+                counts["active"] += 1
+                lifecycle.stop()
+                if rng.random() < 0.1:
+                    # Stop is idempotent: a second click while stopping does nothing
+                    if lifecycle.stop():
+                        raise AssertionError("Repeated stop started a second teardown")
+                    counts["repeat_stops"] += 1
+                if _wait(lifecycle, (IDLE, FAILED)) == FAILED:
+                    counts["stop_failed"] += 1
+            elif state == FAILED:
+                counts["start_failed"] += 1
+            # Acknowledge a failure so the next cycle starts from idle
+            lifecycle.stop()
+            if lifecycle.call is not None or lifecycle.state != IDLE:
+                raise AssertionError(f"Lifecycle kept a call after cycle {cycle}: {lifecycle.state}")
+            if cycle == warmup or (cycle > warmup and (cycle - warmup) % sample_every == 0) or cycle == cycles:
+                sample(cycle)
+    finally:
+        elapsed = time.perf_counter() - started
+        tracemalloc.stop()
+        executor.shutdown(wait=True)
+        client.close()
+        server.stop()
+    return {"cycles": cycles, "seconds": elapsed, "counts": counts, "samples": samples,
+            "pool_size": executor._max_workers}
+
+
+def check(result, max_growth_kb):
+    """Failure messages for a soak run; empty if resource use stayed flat."""
+    samples = result["samples"]
+    if len(samples) < 2:
+        return ["Too few samples; run more cycles than --warmup"]
+    first, last = samples[0], samples[-1]
+    failures = []
+    for s in samples:
+        if s["live_calls"] or s["open_resources"] or s["manager_active"]:
+            failures.append(f"cycle {s['cycle']}: {s['live_calls']} live calls, {s['open_resources']} "
+                            f"unreleased resources, {s['manager_active']} admitted sessions while idle")
+    growth = last["memory_kb"] - first["memory_kb"]
+    if growth > max_growth_kb:
+        failures.append(f"memory grew {growth:.0f} KB over {last['cycle'] - first['cycle']} cycles")
+    if last["pool_threads"] > result["pool_size"]:
+        failures.append(f"{last['pool_threads']} call pool threads for a pool of {result['pool_size']}")
+    for key in ("threads", "fds"):
+        if first[key] is not None and last[key] - first[key] > HANDLE_TOLERANCE:
+            failures.append(f"{key} grew from {first[key]} to {last[key]}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=8, help="browser sessions taking turns")
+    parser.add_argument("--warmup", type=int, default=200, help="cycles before the first sample")
+    parser.add_argument("--sample-every", type=int, default=500)
+    parser.add_argument("--cancel-rate", type=float, default=0.1, help="share of starts cancelled mid-connect")
+    parser.add_argument("--join-failure-rate", type=float, default=0.05)
+    parser.add_argument("--leave-failure-rate", type=float, default=0.05)
+    parser.add_argument("--max-growth-kb", type=float, default=256.0)
+    args = parser.parse_args()
+
+    result = run_soak(args.cycles, args.sessions, args.sample_every, args.warmup, args.cancel_rate,
+                      args.join_failure_rate, args.leave_failure_rate)
+    print(f"{result['cycles']} cycles in {result['seconds']:.1f}s: "
+          + ", ".join(f"{v} {k.replace('_', ' ')}" for k, v in result["counts"].items()))
+    failures = check(result, args.max_growth_kb)
+    for failure in failures:
+        print(f"LEAK: {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+    print("Resource use stayed flat")
+
+
+if __name__ == "__main__":
+    main()
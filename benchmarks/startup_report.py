@@ -0,0 +1,107 @@
+"""Import-time and rerun-time report for the Streamlit entry points.
+
+Each module is imported in a fresh interpreter so timings include everything it
+pulls in. Reruns are driven through Streamlit's headless ``AppTest`` harness
+with ``VAPI_PREWARM=0``, and the report checks whether the voice stack
+(``vapi_python``/``daily``) was imported by an idle page.
+
+    python benchmarks/startup_report.py [--reruns 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_TARGETS = [
+    "streamlit",
+    "dotenv",
+    "requests",
+    "vapi_python",
+    "daily",
+    "prompts",
+    "vapi_clients",
+    "config",
+]
+
+VOICE_MODULES = ("vapi_python", "daily", "pyaudio")
+
+
+def measure_import(module):
+    """Seconds to import ``module`` in a fresh interpreter, or None if it is not installed."""
+    code = (
+        "import time, importlib\n"
+        "t = time.perf_counter()\n"
+        f"importlib.import_module({module!r})\n"
+        "print(time.perf_counter() - t)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def measure_reruns(script, reruns):
+    from streamlit.testing.v1 import AppTest
+
+    os.environ["VAPI_PREWARM"] = "0"
+    at = AppTest.from_file(os.path.join(ROOT, script), default_timeout=30)
+
+    t = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - t
+
+    timings = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - t)
+
+    return {
+        "first_run_ms": first * 1000,
+        "rerun_mean_ms": statistics.mean(timings) * 1000,
+        "rerun_p95_ms": sorted(timings)[int(0.95 * (len(timings) - 1))] * 1000,
+        "errors": [str(e.value) for e in at.exception],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="print a JSON report")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    report = {"imports_ms": {}, "reruns": {}}
+    for module in IMPORT_TARGETS:
+        seconds = measure_import(module)
+        report["imports_ms"][module] = None if seconds is None else seconds * 1000
+
+    for script in ("main.py", "app.py"):
+        report["reruns"][script] = measure_reruns(script, args.reruns)
+    report["voice_stack_imported_by_idle_page"] = sorted(m for m in VOICE_MODULES if m in sys.modules)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    print("Import time (fresh interpreter)")
+    for module, ms in report["imports_ms"].items():
+        print(f"  {module:<14} {'not installed' if ms is None else f'{ms:8.1f} ms'}")
+    print(f"\nScript runs ({args.reruns} reruns)")
+    for script, r in report["reruns"].items():
+        print(f"  {script:<8} first {r['first_run_ms']:7.1f} ms   "
+              f"rerun mean {r['rerun_mean_ms']:6.1f} ms   p95 {r['rerun_p95_ms']:6.1f} ms")
+        for error in r["errors"]:
+            print(f"           error: {error}")
+    imported = report["voice_stack_imported_by_idle_page"]
+    print(f"\nVoice stack imported by idle page: {', '.join(imported) if imported else 'no'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,372 @@
+"""Benchmark suite for the Streamlit entry points, with baseline comparison.
+
+Drives ``main.py`` and ``app.py`` through Streamlit's headless ``AppTest``
+harness against ``FakeVapiServer`` and an in-process fake voice layer, and
+measures:
+
+- prompt building across every template combination
+- opening and sampling a synthetic 100k-question bank
+- script rerun time of an idle page
+- start and stop latency (button click until the call is active / idle)
+- memory per session
+
+Results are written as JSON. ``--save-baseline`` stores them as the baseline;
+``--compare`` fails (exit 1) if any metric is more than ``--threshold`` worse:
+
+    python benchmarks/suite.py --save-baseline
+    python benchmarks/suite.py --compare --threshold 0.2
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_THRESHOLD = 0.2
+
+ENTRY_POINTS = {
+    "main.py": ("Start Interview", "End Interview"),
+    "app.py": ("Start Call", "Stop Call"),
+}
+
+# Metrics below this size are dominated by timer noise and are not compared
+MIN_COMPARABLE = {"ms": 1.0, "kb": 64.0}
+
+
+def _percentile(values, q):
+    ordered = sorted(values)
+    return ordered[int(q * (len(ordered) - 1))]
+
+
+def _summary(seconds):
+    return {
+        "mean_ms": statistics.mean(seconds) * 1000,
+        "p50_ms": _percentile(seconds, 0.5) * 1000,
+        "p95_ms": _percentile(seconds, 0.95) * 1000,
+    }
+
+
+def bench_prompts(repeats):
+    import prompts
+
+    combos = len(prompts.INTERVIEW_TYPES) * len(prompts.INTERVIEW_LEVELS) * \
+        len(prompts.COMPANY_TYPES) * len(prompts.INTERVIEW_DURATIONS)
+    builds = []
+    for _ in range(repeats):
+        t = time.perf_counter()
+        registry = prompts.PromptRegistry()
+        builds.append(time.perf_counter() - t)
+
+    keys = [(t, l, c, d) for t in prompts.INTERVIEW_TYPES for l in prompts.INTERVIEW_LEVELS
+            for c in prompts.COMPANY_TYPES for d in prompts.INTERVIEW_DURATIONS]
+    t = time.perf_counter()
+    for key in keys * 10:
+        registry.get(*key)
+    lookup = (time.perf_counter() - t) / (len(keys) * 10)
+
+    t = time.perf_counter()
+    for i, key in enumerate(keys):
+        registry.get(*key, job_description=f"Job description {i}")
+    variant = (time.perf_counter() - t) / len(keys)
+
+    return {
+        "combinations": combos,
+        "build_all_ms": statistics.mean(builds) * 1000,
+        "per_combination_us": statistics.mean(builds) / combos * 1e6,
+        "lookup_us": lookup * 1e6,
+        "job_description_compile_us": variant * 1e6,
+    }
+
+
+def bench_question_bank(size, draws):
+    import random
+    import question_bank
+    import prompts
+
+    rng = random.Random(0)
+    skills = [f"skill {i}" for i in range(500)]
+
+    def questions():
+        for i in range(size):
+            yield {
+                "text": f"Synthetic question {i}?",
+                "roles": rng.sample(prompts.INTERVIEW_TYPES, rng.randint(0, 2)),
+                "levels": rng.sample(prompts.INTERVIEW_LEVELS, rng.randint(0, 2)),
+                "companies": rng.sample(prompts.COMPANY_TYPES, rng.randint(0, 1)),
+                "skills": rng.sample(skills, 2),
+                "difficulty": rng.randint(1, 5),
+            }
+
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-questions-"), "questions.qbank")
+    t = time.perf_counter()
+    question_bank.build(questions(), path)
+    build = time.perf_counter() - t
+    t = time.perf_counter()
+    bank = question_bank.QuestionBank(path)
+    opened = time.perf_counter() - t
+
+    # A returning candidate: every draw excludes the questions asked before it
+    samples, asked = [], []
+    for i in range(draws):
+        t = time.perf_counter()
+        drawn = bank.sample(
+            prompts.INTERVIEW_TYPES[i % len(prompts.INTERVIEW_TYPES)], "mid_level", "startup", 8,
+            exclude=asked, skills=skills[i % 50:i % 50 + 3]
+        )
+        samples.append(time.perf_counter() - t)
+        asked = (asked + [q.key for q in drawn])[-question_bank.HISTORY_LIMIT:]
+    bank.close()
+    return {"questions": size, "build_s": build, "open_ms": opened * 1000, "sample": _summary(samples)}
+
+
+def bench_history(size, pages):
+    import random
+    import history
+    import prompts
+
+    rng = random.Random(0)
+    path = os.path.join(tempfile.mkdtemp(prefix="bench-history-"), "history.db")
+    store = history.InterviewHistory(path, flush_batch=size + 1)
+    started = time.time() - size * 60
+    # Written the way the app writes them: queued, then flushed in batches
+    t = time.perf_counter()
+    for i in range(size):
+        store.record(
+            f"bench-{i}", candidate=history.candidate_id(f"candidate-{rng.randrange(size // 10)}"),
+            interview_type=rng.choice(prompts.INTERVIEW_TYPES), interview_level=rng.choice(prompts.INTERVIEW_LEVELS),
+            interview_duration=rng.choice(prompts.INTERVIEW_DURATIONS), company_type=rng.choice(prompts.COMPANY_TYPES),
+            started_at=started + i * 60, outcome=history.COMPLETED, duration_seconds=rng.uniform(300, 3600)
+        )
+        if (i + 1) % history.FLUSH_BATCH == 0:
+            store.flush()
+    store.flush()
+    write = time.perf_counter() - t
+
+    def walk(**filters):
+        # Page down through the results the way the history view does
+        timings, cursor = [], None
+        for _ in range(pages):
+            t = time.perf_counter()
+            page = store.page(cursor=cursor, **filters)
+            timings.append(time.perf_counter() - t)
+            cursor = page.next_cursor
+            if cursor is None:
+                break
+        return _summary(timings)
+
+    results = {
+        "rows": size,
+        "write_s": write,
+        "all": walk(),
+        "type_level": walk(interview_type="sales", interview_level="leadership"),
+        "candidate": walk(candidate="candidate-7"),
+        "since": walk(since=started + size * 30),
+    }
+    # What the dashboard reads: daily rollups, whatever the number of interviews
+    timings = []
+    for group_by in (None,) + history.ROLLUP_GROUPS:
+        for _ in range(pages // 4):
+            t = time.perf_counter()
+            store.trends(group_by)
+            timings.append(time.perf_counter() - t)
+    results["trends"] = _summary(timings)
+    store.close()
+    return results
+
+
+def _new_app(script):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(ROOT, script), default_timeout=30)
+
+
+def _click(at, label):
+    [b for b in at.button if b.label == label][0].click().run()
+
+
+def _wait_for(lifecycle, states, timeout=10):
+    deadline = time.perf_counter() + timeout
+    while lifecycle.poll() not in states:
+        if time.perf_counter() > deadline:
+            raise RuntimeError(f"Call stuck in {lifecycle.state}: {lifecycle.error}")
+        time.sleep(0.0005)
+
+
+def bench_reruns(script, reruns):
+    at = _new_app(script)
+    t = time.perf_counter()
+    at.run()
+    first = time.perf_counter() - t
+    timings = []
+    for _ in range(reruns):
+        t = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - t)
+    result = dict(_summary(timings), first_run_ms=first * 1000)
+    result["errors"] = [str(e.value) for e in at.exception]
+    return result
+
+
+def bench_lifecycle(script, cycles):
+    from call_executor import ACTIVE, IDLE, FAILED
+
+    start_label, stop_label = ENTRY_POINTS[script]
+    at = _new_app(script)
+    at.run()
+    starts, stops = [], []
+    for _ in range(cycles):
+        t = time.perf_counter()
+        _click(at, start_label)
+        _wait_for(at.session_state.call_lifecycle, (ACTIVE, FAILED))
+        starts.append(time.perf_counter() - t)
+        at.run()
+
+        t = time.perf_counter()
+        _click(at, stop_label)
+        _wait_for(at.session_state.call_lifecycle, (IDLE, FAILED))
+        stops.append(time.perf_counter() - t)
+        at.run()
+    return {"start": _summary(starts), "stop": _summary(stops), "error": at.session_state.call_lifecycle.error}
+
+
+def bench_memory(script, sessions):
+    # Shared caches are warmed by the first session and not counted
+    _new_app(script).run()
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    apps = [_new_app(script).run() for _ in range(sessions)]
+    gc.collect()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del apps
+    return {"per_session_kb": (after - before) / sessions / 1024}
+
+
+def run_suite(reruns=30, cycles=20, sessions=20, prompt_repeats=5):
+    from fake_vapi_server import FakeVapiServer
+    import fake_voice
+
+    fake_voice.install()
+    server = FakeVapiServer().start()
+    # Everything the apps write goes to scratch files, never the real history or question bank
+    scratch = tempfile.mkdtemp(prefix="bench-suite-")
+    shutil.copy(os.path.join(ROOT, "data", "questions.jsonl"), os.path.join(scratch, "questions.jsonl"))
+    os.environ.update(
+        VAPI_API_KEY="benchmark-key",
+        VAPI_API_URL=server.url,
+        VAPI_PREWARM="0",
+        TRANSCRIPT_DIR=os.path.join(scratch, "transcripts"),
+        HISTORY_DB=os.path.join(scratch, "history.db"),
+        QUESTION_BANK=os.path.join(scratch, "questions.jsonl"),
+    )
+    try:
+        results = {"prompts": bench_prompts(prompt_repeats), "question_bank": bench_question_bank(100000, 200),
+                   "history": bench_history(200000, 50)}
+        for script in ENTRY_POINTS:
+            results[script] = {
+                "rerun": bench_reruns(script, reruns),
+                "lifecycle": bench_lifecycle(script, cycles),
+                "memory": bench_memory(script, sessions),
+            }
+    finally:
+        server.stop()
+    return results
+
+
+def _commit():
+    result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+    return result.stdout.strip() or None
+
+
+def flatten(results, prefix=""):
+    """{"main.py.rerun.mean_ms": 12.3, ...} for every numeric, comparable metric."""
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool) and key.endswith(("_ms", "_us", "_kb")):
+            flat[name] = value
+    return flat
+
+
+def compare(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """Rows of (metric, baseline, current, change) and the names of regressed metrics.
+
+    Every metric is lower-is-better. Tiny values are reported but never fail.
+    """
+    rows, regressions = [], []
+    now, before = flatten(current["results"]), flatten(baseline["results"])
+    for name in sorted(now):
+        if name not in before or not before[name]:
+            continue
+        change = (now[name] - before[name]) / before[name]
+        rows.append((name, before[name], now[name], change))
+        unit = name.rsplit("_", 1)[-1]
+        floor = MIN_COMPARABLE.get(unit, 0.0)
+        if change > threshold and max(now[name], before[name]) >= floor:
+            regressions.append(name)
+    return rows, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reruns", type=int, default=30)
+    parser.add_argument("--cycles", type=int, default=20, help="start/stop cycles per entry point")
+    parser.add_argument("--sessions", type=int, default=20, help="sessions for the memory measurement")
+    parser.add_argument("--output", help="write the results JSON here")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--compare", action="store_true", help="compare against the baseline; exit 1 on regression")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed slowdown as a fraction (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, BENCH_DIR)
+    report = {
+        "commit": _commit(),
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "results": run_suite(args.reruns, args.cycles, args.sessions),
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"Baseline saved to {args.baseline}")
+
+    if not args.compare:
+        print(text)
+        return
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows, regressions = compare(report, baseline, args.threshold)
+    print(f"Comparing {report['commit']} against baseline {baseline.get('commit')} "
+          f"(threshold {args.threshold:.0%})")
+    for name, before, now, change in rows:
+        flag = "  REGRESSION" if name in regressions else ""
+        print(f"  {name:<45} {before:10.2f} -> {now:10.2f}  {change:+7.1%}{flag}")
+    if regressions:
+        print(f"\n{len(regressions)} metric(s) regressed beyond {args.threshold:.0%}")
+        sys.exit(1)
+    print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
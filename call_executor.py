@@ -0,0 +1,235 @@
+"""Non-blocking call start/stop on a bounded, process-wide thread pool.
+
+Button callbacks submit work to a ``CallLifecycle`` and return immediately; the
+UI polls ``CallLifecycle.poll()`` for the current state. Each phase has its own
+timeout, after which the call is given up on and, if it ever finishes
+connecting, stopped in the background.
+
+Every call object that reaches the lifecycle is stopped exactly once, whether
+the call ends normally, fails, times out or is cancelled mid-connect; the
+lifecycle never holds on to a call it has given up on.
+"""
+
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+IDLE = "idle"
+QUEUED = "queued"
+CONNECTING = "connecting"
+ACTIVE = "active"
+STOPPING = "stopping"
+FAILED = "failed"
+
+# Allowed moves between states; anything else is a bug
+TRANSITIONS = {
+    IDLE: (QUEUED, CONNECTING),
+    QUEUED: (CONNECTING, IDLE),
+    CONNECTING: (ACTIVE, FAILED, IDLE),
+    ACTIVE: (STOPPING,),
+    STOPPING: (IDLE, FAILED),
+    FAILED: (QUEUED, CONNECTING, IDLE),
+}
+
+DEFAULT_MAX_WORKERS = 16
+START_TIMEOUT = 30
+STOP_TIMEOUT = 15
+
+
+class InvalidTransition(RuntimeError):
+    pass
+
+
+def make_executor(max_workers=DEFAULT_MAX_WORKERS):
+    """Thread pool shared by every session's call lifecycle."""
+    return ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="vapi-call")
+
+
+class CallLifecycle:
+    """State machine for one session's call: idle -> connecting -> active -> stopping -> idle.
+
+    ``connect`` callables passed to ``start`` run on the executor and must
+    return a started call object with a ``stop()`` method, and must not leave
+    anything running when they raise. A call waiting for admission sits in
+    ``queued`` until ``start`` is called. Listeners added with ``add_listener``
+    are called with the new state after every transition. ``stop`` can be called
+    in any state and any number of times.
+
+    A call object may have an ``ended`` event, set when the call ends on the
+    far side (a finished script, a closed audio socket); ``poll`` then stops it
+    like a hang-up from this side.
+    """
+
+    def __init__(self, executor, start_timeout=START_TIMEOUT, stop_timeout=STOP_TIMEOUT):
+        self.executor = executor
+        self.start_timeout = start_timeout
+        self.stop_timeout = stop_timeout
+        self.state = IDLE
+        self.error = None
+        self.call = None
+        self.started_at = None
+        self._future = None
+        self._deadline = None
+        # Bumped on every transition so late callbacks from an abandoned phase are ignored
+        self._generation = 0
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    @property
+    def busy(self):
+        return self.state in (QUEUED, CONNECTING, STOPPING)
+
+    @property
+    def active(self):
+        return self.state == ACTIVE
+
+    def add_listener(self, listener):
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _enter(self, state):
+        # Caller holds the lock
+        if state not in TRANSITIONS[self.state]:
+            raise InvalidTransition(f"Call state {self.state} cannot change to {state}")
+        self.state = state
+
+    def _notify(self, state):
+        for listener in list(self._listeners):
+            listener(state)
+
+    def queue(self):
+        """Mark the call as waiting for admission. Returns False if a call is already in progress."""
+        with self._lock:
+            if self.state not in (IDLE, FAILED):
+                return False
+            self._enter(QUEUED)
+            self.error = None
+        self._notify(QUEUED)
+        return True
+
+    def start(self, connect):
+        """Begin connecting in the background. Returns False if a call is already in progress."""
+        with self._lock:
+            if self.state not in (IDLE, QUEUED, FAILED):
+                return False
+            self._generation += 1
+            generation = self._generation
+            self._enter(CONNECTING)
+            self.error, self.call, self.started_at = None, None, None
+            self._deadline = time.monotonic() + self.start_timeout
+            future = self._future = self.executor.submit(connect)
+        self._notify(CONNECTING)
+        future.add_done_callback(lambda f: self._on_started(generation, f))
+        return True
+
+    def stop(self):
+        """Leave the queue, cancel a pending start, begin stopping the active call, or clear a failure.
+
+        Returns False if there was nothing to do (already idle or stopping).
+        """
+        future = None
+        with self._lock:
+            if self.state in (QUEUED, CONNECTING):
+                self._abandon()
+                self._enter(IDLE)
+            elif self.state == ACTIVE:
+                self._generation += 1
+                generation = self._generation
+                call = self.call
+                self._enter(STOPPING)
+                self._deadline = time.monotonic() + self.stop_timeout
+                future = self._future = self._release(call)
+            elif self.state == FAILED:
+                self._enter(IDLE)
+                self.error = None
+            else:
+                return False
+            state = self.state
+        self._notify(state)
+        if future is not None:
+            future.add_done_callback(lambda f: self._on_stopped(generation, f))
+        return True
+
+    def poll(self):
+        """Apply phase timeouts, stop a call that ended on the far side, and return the current state."""
+        with self._lock:
+            timed_out = self.state in (CONNECTING, STOPPING) and time.monotonic() > self._deadline
+            if timed_out:
+                if self.state == CONNECTING:
+                    self.error = f"Timed out connecting after {self.start_timeout:g}s"
+                else:
+                    # The stop keeps running in the background and releases the call when it returns
+                    self.error = f"Timed out ending the call after {self.stop_timeout:g}s"
+                    self.call = None
+                self._abandon()
+                self._enter(FAILED)
+            state = self.state
+            ended = getattr(self.call, "ended", None) if state == ACTIVE else None
+        if timed_out:
+            self._notify(FAILED)
+        if ended is not None and ended.is_set() and self.stop():
+            return self.state
+        return state
+
+    def _abandon(self):
+        # Caller holds the lock. A start that is still queued is dropped; one that
+        # is already running is stopped by _on_started once it returns.
+        self._generation += 1
+        if self._future is not None:
+            self._future.cancel()
+        self._future = None
+
+    def _release(self, call):
+        """Stop ``call`` on the executor, or right here if the executor has shut down."""
+        try:
+            return self.executor.submit(call.stop)
+        except RuntimeError:
+            future = Future()
+            try:
+                call.stop()
+                future.set_result(None)
+            except Exception as e:
+                future.set_exception(e)
+            return future
+
+    def _on_started(self, generation, future):
+        if future.cancelled():
+            return
+        error = future.exception()
+        call = None if error else future.result()
+        with self._lock:
+            current = generation == self._generation and self.state == CONNECTING
+            if current:
+                self._future = None
+                if error:
+                    self._enter(FAILED)
+                    self.error = f"Error starting call: {error}"
+                else:
+                    self._enter(ACTIVE)
+                    self.call, self.started_at = call, time.time()
+            state = self.state
+        if current:
+            self._notify(state)
+        elif call is not None:
+            # Connected after being cancelled or timing out; release it
+            self._release(call)
+
+    def _on_stopped(self, generation, future):
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            if generation != self._generation or self.state != STOPPING:
+                return
+            # The call is dropped even if stop() failed; stop() frees what it can before raising
+            self.call = None
+            self._future = None
+            if error:
+                self._enter(FAILED)
+                self.error = f"Error stopping call: {error}"
+            else:
+                self._enter(IDLE)
+            state = self.state
+        self._notify(state)
@@ -0,0 +1,51 @@
+"""The call-session engine shared by ``app.py`` and ``main.py``.
+
+A session's call is a ``CallLifecycle`` (the state machine); ``connector``
+builds the ``connect`` step it runs on the executor, and ``sync_session``
+mirrors the lifecycle into the session keys the pages read. Teardown is
+guaranteed at every step: ``PooledVapi.start`` releases a call that fails to
+join, and the lifecycle stops every call it has been handed.
+"""
+
+import time
+
+from vapi_clients import VapiError
+
+# Statuses the API answers a call with when its saved assistant is gone or no longer valid
+STALE_ASSISTANT_STATUSES = (400, 404)
+
+
+def connector(client, start_kwargs, on_message=None, timer=None, clicked=None, fallback=None):
+    """``connect`` callable for ``CallLifecycle.start`` that opens a call on ``client``.
+
+    ``start_kwargs`` are passed to ``PooledVapi.start``. It may be a callable
+    instead, run on the executor, when working them out needs the network
+    (e.g. creating a server-side assistant). If the API rejects them as a
+    stale saved assistant, ``fallback`` (a callable, if given) supplies the
+    kwargs for one more try. ``clicked`` is the ``perf_counter`` time of the
+    button click, for the queue-wait metric.
+    """
+    def attempt(kwargs):
+        call = client.new_call(on_message=on_message, timer=timer)
+        call.start(**kwargs)
+        return call
+
+    def connect():
+        if timer is not None and clicked is not None:
+            timer.observe("queue_wait", time.perf_counter() - clicked)
+        kwargs = start_kwargs() if callable(start_kwargs) else start_kwargs
+        try:
+            return attempt(kwargs)
+        except VapiError as e:
+            if fallback is None or e.status not in STALE_ASSISTANT_STATUSES:
+                raise
+        return attempt(fallback())
+    return connect
+
+
+def sync_session(session_state, lifecycle):
+    """Apply the lifecycle's timeouts and copy its state into ``session_state``."""
+    lifecycle.poll()
+    session_state.call_active = lifecycle.active
+    session_state.vapi_instance = lifecycle.call
+    session_state.call_started_at = lifecycle.started_at
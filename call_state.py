@@ -0,0 +1,181 @@
+"""Interview records kept in a shared state store so any replica can serve them.
+
+Each interview gets an ID (carried in the page URL) and a record with its
+settings, call state and the replica that owns the live call. The live call
+itself can only run in the owning process; other replicas report on it and
+stop it by leaving a stop request that the owner's watcher acts on. If the
+owner stops heartbeating, the interview is reported as interrupted and can be
+restarted with the same settings from any replica.
+"""
+
+import os
+import socket
+import threading
+import time
+import uuid
+
+from call_executor import IDLE, QUEUED, CONNECTING, ACTIVE, STOPPING, FAILED
+
+REPLICA_ID = os.getenv("REPLICA_ID") or f"{socket.gethostname()}-{os.getpid()}"
+HEARTBEAT_INTERVAL = 5
+STALE_AFTER = 3 * HEARTBEAT_INTERVAL
+RECORD_TTL = 24 * 60 * 60
+
+RECORD_PREFIX = "interview:"
+STOP_PREFIX = "interview-stop:"
+
+# States that need a live call (or a pending one) on the owning replica
+LIVE_STATES = (QUEUED, CONNECTING, ACTIVE, STOPPING)
+
+
+class _Listener:
+    # Compares equal per (store, interview) so re-attaching doesn't stack listeners
+    def __init__(self, store, interview_id, lifecycle):
+        self.store = store
+        self.interview_id = interview_id
+        self.lifecycle = lifecycle
+
+    def __eq__(self, other):
+        return isinstance(other, _Listener) and (other.store, other.interview_id) == (self.store, self.interview_id)
+
+    def __call__(self, state):
+        try:
+            self.store.record_state(self.interview_id, self.lifecycle)
+        except Exception:
+            # A backend outage must not break the call itself; the next heartbeat catches up
+            pass
+        if state in (IDLE, FAILED):
+            self.store.detach(self.interview_id)
+            self.lifecycle.remove_listener(self)
+
+
+class CallStateStore:
+    """Reads and writes interview records in a ``state_store`` backend."""
+
+    def __init__(self, store, replica_id=REPLICA_ID, ttl=RECORD_TTL, stale_after=STALE_AFTER):
+        self.store = store
+        self.replica_id = replica_id
+        self.ttl = ttl
+        self.stale_after = stale_after
+        # Lifecycles of interviews whose call runs in this process
+        self._local = {}
+        self._lock = threading.Lock()
+        # Only the owning replica writes a record, so a process-wide lock keeps
+        # heartbeats from overwriting a concurrent state change
+        self._write_lock = threading.Lock()
+        self._watcher = None
+
+    def create(self, interview_type, interview_level, interview_duration, company_type):
+        """Store a new idle interview record and return its ID."""
+        interview_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        self.store.set(RECORD_PREFIX + interview_id, {
+            "interview_id": interview_id,
+            "interview_type": interview_type,
+            "interview_level": interview_level,
+            "interview_duration": interview_duration,
+            "company_type": company_type,
+            "replica": self.replica_id,
+            "state": IDLE,
+            "call_id": None,
+            "started_at": None,
+            "error": None,
+            "created_at": now,
+            "heartbeat_at": now,
+        }, ttl=self.ttl)
+        return interview_id
+
+    def get(self, interview_id):
+        """The interview record, with ``stale`` set if its owner stopped heartbeating mid-call."""
+        record = self.store.get(RECORD_PREFIX + interview_id)
+        if record is None:
+            return None
+        record["stale"] = (
+            record["state"] in LIVE_STATES
+            and record["replica"] != self.replica_id
+            and time.time() - record["heartbeat_at"] > self.stale_after
+        ) or (
+            # This replica restarted and no longer has the call
+            record["state"] in LIVE_STATES
+            and record["replica"] == self.replica_id
+            and self.local_lifecycle(interview_id) is None
+        )
+        record["stop_requested"] = self.store.get(STOP_PREFIX + interview_id) is not None
+        return record
+
+    def list(self):
+        records = (self.get(key[len(RECORD_PREFIX):]) for key in self.store.keys(RECORD_PREFIX))
+        return [record for record in records if record is not None]
+
+    def update(self, interview_id, **fields):
+        with self._write_lock:
+            record = self.store.get(RECORD_PREFIX + interview_id)
+            if record is None:
+                return
+            record.update(fields)
+            self.store.set(RECORD_PREFIX + interview_id, record, ttl=self.ttl)
+
+    def record_state(self, interview_id, lifecycle):
+        call = lifecycle.call
+        self.update(
+            interview_id,
+            state=lifecycle.state,
+            call_id=getattr(call, "call_id", None),
+            started_at=lifecycle.started_at,
+            error=lifecycle.error,
+            replica=self.replica_id,
+            heartbeat_at=time.time()
+        )
+
+    def attach(self, interview_id, lifecycle):
+        """Register a lifecycle running here so its transitions are written to the store."""
+        with self._lock:
+            self._local[interview_id] = lifecycle
+        self.store.delete(STOP_PREFIX + interview_id)
+        lifecycle.add_listener(_Listener(self, interview_id, lifecycle))
+
+    def detach(self, interview_id):
+        with self._lock:
+            self._local.pop(interview_id, None)
+
+    def local_lifecycle(self, interview_id):
+        with self._lock:
+            return self._local.get(interview_id)
+
+    def request_stop(self, interview_id):
+        """Ask whichever replica owns the call to stop it."""
+        lifecycle = self.local_lifecycle(interview_id)
+        if lifecycle is not None:
+            lifecycle.stop()
+            return
+        self.store.set(STOP_PREFIX + interview_id, {"requested_by": self.replica_id, "requested_at": time.time()},
+                       ttl=self.ttl)
+
+    def sync(self):
+        """Heartbeat local interviews and act on stop requests from other replicas."""
+        with self._lock:
+            local = list(self._local.items())
+        now = time.time()
+        for interview_id, lifecycle in local:
+            if self.store.get(STOP_PREFIX + interview_id) is not None:
+                self.store.delete(STOP_PREFIX + interview_id)
+                lifecycle.stop()
+            else:
+                self.update(interview_id, heartbeat_at=now)
+
+    def start_watcher(self, interval=HEARTBEAT_INTERVAL):
+        if self._watcher is not None:
+            return self._watcher
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.sync()
+                except Exception:
+                    # Keep heartbeating through transient backend errors
+                    pass
+
+        self._watcher = threading.Thread(target=run, name="call-state-watcher", daemon=True)
+        self._watcher.start()
+        return self._watcher
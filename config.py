@@ -0,0 +1,73 @@
+"""Settings and static assets loaded once per process.
+
+Streamlit re-executes the entry scripts on every interaction; anything here is
+computed on the first run only.
+"""
+
+import functools
+import os
+from collections import namedtuple
+
+from dotenv import load_dotenv
+
+STATIC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "static")
+STYLESHEET = "style.css"
+
+Settings = namedtuple("Settings", ["api_key", "api_url", "prewarm", "max_calls", "max_calls_per_key", "state_url",
+                                   "transcript_dir", "metrics_file", "metrics_port", "job_description_budget",
+                                   "question_bank", "phone_number_id", "history_db", "voice_backend"])
+
+
+@functools.lru_cache(maxsize=None)
+def load_settings():
+    # Imported here, not at the top, so importing config stays cheap. The question bank's and the
+    # API's defaults are left to the code that builds them: question_bank pulls in numpy and
+    # vapi_clients requests, which the pages that don't need them shouldn't pay for on a cold start
+    from history import DEFAULT_PATH as DEFAULT_HISTORY_DB
+    from prompt_compiler import DEFAULT_JOB_DESCRIPTION_BUDGET
+    from session_manager import DEFAULT_MAX_CALLS, DEFAULT_MAX_CALLS_PER_KEY
+    from transcripts import DEFAULT_DIRECTORY as DEFAULT_TRANSCRIPT_DIR
+
+    # Load environment variables
+    load_dotenv()
+    return Settings(
+        api_key=os.getenv("VAPI_API_KEY"),
+        # None for vapi_clients.DEFAULT_API_URL
+        api_url=os.getenv("VAPI_API_URL") or None,
+        # Set VAPI_PREWARM=0 to skip importing the voice stack until the first call
+        prewarm=os.getenv("VAPI_PREWARM", "1").lower() not in ("0", "false", "no"),
+        # Admission caps for live calls on this node
+        max_calls=int(os.getenv("MAX_CALLS_PER_NODE", DEFAULT_MAX_CALLS)),
+        max_calls_per_key=int(os.getenv("MAX_CALLS_PER_KEY", DEFAULT_MAX_CALLS_PER_KEY)),
+        # Where interview records live; use sqlite:// or redis:// to share them between replicas
+        state_url=os.getenv("STATE_BACKEND_URL", "memory://"),
+        transcript_dir=os.getenv("TRANSCRIPT_DIR", DEFAULT_TRANSCRIPT_DIR),
+        # Call latency metrics in OpenMetrics format: a file rewritten periodically, and/or a /metrics port
+        metrics_file=os.getenv("METRICS_FILE") or None,
+        metrics_port=int(os.getenv("METRICS_PORT") or 0),
+        # Pasted job descriptions are condensed to this many tokens before going into the prompt
+        job_description_budget=int(os.getenv("JOB_DESCRIPTION_TOKEN_BUDGET") or DEFAULT_JOB_DESCRIPTION_BUDGET),
+        # Question bank (JSONL or .qbank) the interview's questions are drawn from; None (unset) for
+        # question_bank.DEFAULT_SOURCE, empty to disable
+        question_bank=os.getenv("QUESTION_BANK"),
+        # Vapi phone number that batch-launched interviews call candidates from
+        phone_number_id=os.getenv("VAPI_PHONE_NUMBER_ID") or None,
+        # SQLite file every interview is recorded in for the history view; empty to disable
+        history_db=os.getenv("HISTORY_DB", DEFAULT_HISTORY_DB) or None,
+        # What places the calls: vapi:// for real ones, simulated://[scripts]?speedup=N to replay interviews
+        voice_backend=os.getenv("VOICE_BACKEND") or "vapi://"
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def stylesheet_html(static_serving):
+    """HTML that applies the page CSS.
+
+    With static serving on, the browser fetches and caches ``static/style.css``
+    and each rerun only sends a one-line ``<link>``. Otherwise the file is
+    inlined, read from disk once per process.
+    """
+    if static_serving:
+        return f'<link rel="stylesheet" href="app/static/{STYLESHEET}">'
+    with open(os.path.join(STATIC_DIR, STYLESHEET), "r", encoding="utf-8") as f:
+        return f"<style>\n{f.read()}</style>"
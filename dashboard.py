@@ -0,0 +1,117 @@
+import streamlit as st
+from config import load_settings, stylesheet_html
+from history import InterviewHistory, ROLLUP_MEASURES
+from prompts import INTERVIEW_TYPES, INTERVIEW_LEVELS, COMPANY_TYPES
+import datetime
+import pandas as pd
+
+# Load environment variables (once per process)
+settings = load_settings()
+
+# Set page config
+st.set_page_config(
+    page_title="Interview Analytics",
+    page_icon="📊",
+    layout="wide"
+)
+
+# Custom CSS
+st.markdown(stylesheet_html(st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
+
+# Read side of the interview history the interview app writes
+@st.cache_resource
+def get_history():
+    if not settings.history_db:
+        return None
+    return InterviewHistory(settings.history_db)
+
+history = get_history()
+
+GROUPS = {"Interview Type": "interview_type", "Experience Level": "interview_level", "Company Type": "company_type"}
+PERIODS = {"Last 7 Days": 7, "Last 30 Days": 30, "Last 90 Days": 90, "Last Year": 365, "All Time": None}
+
+def label(value):
+    return "FAANG" if value == "faang" else value.replace("_", " ").title()
+
+# Chart data only depends on the rollups, so it is recomputed only when ``version`` says new ones landed
+@st.cache_data(max_entries=64)
+def chart_data(version, group_by, since, interview_type, interview_level, company_type):
+    rows = history.trends(group_by, since=since, interview_type=interview_type,
+                          interview_level=interview_level, company_type=company_type)
+    frame = pd.DataFrame(rows, columns=["day", "grp"] + ROLLUP_MEASURES)
+    frame["grp"] = frame["grp"].map(label)
+    totals = frame[ROLLUP_MEASURES].sum()
+
+    def ratio(numerator, denominator, scale=1.0):
+        # Days with nothing to divide by are gaps in the chart, not zeros
+        return frame[numerator] * scale / frame[denominator].where(frame[denominator] > 0)
+
+    frame["failure_rate"] = ratio("failed", "interviews", 100)
+    frame["minutes"] = ratio("duration_sum", "timed", 1 / 60)
+    frame["score"] = ratio("score_sum", "scored")
+    charts = {
+        name: frame.pivot(index="day", columns="grp", values=column)
+        for name, column in [("volume", "interviews"), ("failure_rate", "failure_rate"),
+                             ("minutes", "minutes"), ("score", "score")]
+    }
+    return totals.to_dict(), charts
+
+st.title("📊 Interview Analytics")
+
+if history is None:
+    st.info("Interview history is disabled. Set HISTORY_DB to record interviews.")
+    st.stop()
+
+col1, col2, col3, col4, col5 = st.columns(5)
+with col1:
+    group_by = GROUPS[st.selectbox("Compare By:", list(GROUPS))]
+with col2:
+    period = PERIODS[st.selectbox("Period:", list(PERIODS), index=1)]
+with col3:
+    interview_type = st.selectbox("Interview Type:", [None] + INTERVIEW_TYPES,
+                                  format_func=lambda x: "Any" if x is None else label(x))
+with col4:
+    interview_level = st.selectbox("Experience Level:", [None] + INTERVIEW_LEVELS,
+                                   format_func=lambda x: "Any" if x is None else label(x))
+with col5:
+    company_type = st.selectbox("Company Type:", [None] + COMPANY_TYPES,
+                                format_func=lambda x: "Any" if x is None else label(x))
+
+# Checks for new rollups every half minute; unchanged ones are served from the cache
+@st.fragment(run_every=30)
+def trends():
+    since = None
+    if period is not None:
+        since = (datetime.datetime.now(datetime.timezone.utc).date() - datetime.timedelta(days=period - 1)).isoformat()
+    totals, charts = chart_data(history.rollup_version(), group_by, since,
+                                interview_type, interview_level, company_type)
+    if not totals["interviews"] and not totals["scored"]:
+        st.info("No finished interviews in this period yet")
+        return
+
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Interviews", f"{totals['interviews']:,.0f}")
+    col2.metric("Completed", f"{totals['completed'] / totals['interviews']:.0%}" if totals["interviews"] else "–")
+    col3.metric("Failed", f"{totals['failed'] / totals['interviews']:.1%}" if totals["interviews"] else "–")
+    col4.metric("Average Length", f"{totals['duration_sum'] / totals['timed'] / 60:.1f} min" if totals["timed"] else "–")
+    col5.metric("Average Score", f"{totals['score_sum'] / totals['scored']:.1f}" if totals["scored"] else "–")
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.subheader("Interviews per Day")
+        st.line_chart(charts["volume"])
+        st.subheader("Average Length (Minutes)")
+        st.line_chart(charts["minutes"])
+    with col2:
+        st.subheader("Failure Rate (%)")
+        st.line_chart(charts["failure_rate"])
+        st.subheader("Average Score")
+        st.line_chart(charts["score"])
+    st.caption("Days are in UTC. Interviews are counted when they end; scores appear once "
+               "`scoring.py --history` has scored their transcripts.")
+
+trends()
+
+# Footer
+st.markdown("---")
+st.markdown("Built with Streamlit and Vapi AI")
@@ -0,0 +1,151 @@
+"""Minimal local stand-in for a Redis server.
+
+Speaks enough RESP for ``state_store.RedisStore`` (PING, AUTH, SELECT, GET,
+SET with EX, DEL, SCAN, KEYS) so the Redis state backend can be run without
+a real server:
+
+    python fake_redis_server.py --port 6390
+    STATE_BACKEND_URL=redis://127.0.0.1:6390/0 streamlit run main.py
+
+It can also be started in-process with ``FakeRedisServer().start()``.
+"""
+
+import argparse
+import fnmatch
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def _write(self, reply):
+        if reply is None:
+            self.wfile.write(b"$-1\r\n")
+        elif isinstance(reply, int):
+            self.wfile.write(b":%d\r\n" % reply)
+        elif isinstance(reply, list):
+            self.wfile.write(b"*%d\r\n" % len(reply))
+            for item in reply:
+                self._write(item)
+        else:
+            data = reply.encode("utf-8")
+            self.wfile.write(b"$%d\r\n%s\r\n" % (len(data), data))
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            # Inline command, e.g. typed into telnet
+            return line.decode().split()
+        args = []
+        for _ in range(int(line[1:-2])):
+            length = int(self.rfile.readline()[1:-2])
+            args.append(self.rfile.read(length + 2)[:-2].decode("utf-8"))
+        return args
+
+    def handle(self):
+        state = self.server.state
+        while True:
+            args = self._read_command()
+            if args is None:
+                return
+            if not args:
+                continue
+            try:
+                reply = state.execute(args[0].upper(), args[1:])
+            except Exception as e:
+                self.wfile.write(f"-ERR {e}\r\n".encode())
+            else:
+                if reply == "OK" or reply == "PONG":
+                    self.wfile.write(f"+{reply}\r\n".encode())
+                else:
+                    self._write(reply)
+            self.wfile.flush()
+
+
+class _State:
+    def __init__(self):
+        self.data = {}
+        self._lock = threading.Lock()
+
+    def _live(self, key, now):
+        # Caller holds the lock
+        item = self.data.get(key)
+        if item is not None and item[1] is not None and item[1] < now:
+            del self.data[key]
+            return None
+        return item
+
+    def execute(self, command, args):
+        now = time.time()
+        with self._lock:
+            if command == "PING":
+                return "PONG"
+            if command in ("AUTH", "SELECT"):
+                return "OK"
+            if command == "GET":
+                item = self._live(args[0], now)
+                return None if item is None else item[0]
+            if command == "SET":
+                expires_at = None
+                if len(args) >= 4 and args[2].upper() == "EX":
+                    expires_at = now + int(args[3])
+                self.data[args[0]] = (args[1], expires_at)
+                return "OK"
+            if command == "DEL":
+                return sum(1 for key in args if self.data.pop(key, None) is not None)
+            if command in ("SCAN", "KEYS"):
+                pattern = "*"
+                if command == "KEYS":
+                    pattern = args[0]
+                elif "MATCH" in [a.upper() for a in args]:
+                    pattern = args[[a.upper() for a in args].index("MATCH") + 1]
+                keys = [k for k in list(self.data) if self._live(k, now) and fnmatch.fnmatchcase(k, pattern)]
+                # One full pass per SCAN; cursor 0 tells the client it is done
+                return keys if command == "KEYS" else ["0", keys]
+        raise ValueError(f"unknown command '{command}'")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class FakeRedisServer:
+    """Runs the fake server on a background thread; ``url`` is usable as ``STATE_BACKEND_URL``."""
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self._server = _Server((host, port), _Handler)
+        self.state = self._server.state = _State()
+        self.url = f"redis://{host}:{self._server.server_address[1]}/0"
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+
+    server = FakeRedisServer(args.host, args.port)
+    print(f"Fake Redis server listening on {server.url}")
+    try:
+        server._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
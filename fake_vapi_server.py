@@ -0,0 +1,163 @@
+"""Minimal local stand-in for the Vapi REST API.
+
+Implements just enough of ``/assistant``, ``/call/web`` and ``/call`` (outbound
+phone calls, and calls over the WebSocket audio transport) to exercise the app
+without network access:
+
+    python fake_vapi_server.py --port 8787
+    VAPI_API_URL=http://127.0.0.1:8787 streamlit run main.py
+
+It can also be started in-process with ``FakeVapiServer().start()``.
+"""
+
+import argparse
+import json
+import random
+import threading
+import uuid
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, body, headers=None):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _read_json(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}")
+
+    def _authorized(self):
+        if not self.headers.get("Authorization", "").startswith("Bearer "):
+            self._send(401, {"message": "Missing API key"})
+            return False
+        return True
+
+    def do_GET(self):
+        state = self.server.state
+        state.record("GET", self.path)
+        if not self._authorized():
+            return
+        path = self.path.split("?")[0]
+        if path == "/assistant":
+            self._send(200, list(state.assistants.values()))
+        elif path.startswith("/assistant/") and path[len("/assistant/"):] in state.assistants:
+            self._send(200, state.assistants[path[len("/assistant/"):]])
+        else:
+            self._send(404, {"message": "Not found"})
+
+    def do_POST(self):
+        state = self.server.state
+        state.record("POST", self.path)
+        if not self._authorized():
+            return
+        body = self._read_json()
+        if body.get("assistantId") and body["assistantId"] not in state.assistants:
+            self._send(400, {"message": "Couldn't find assistant"})
+            return
+        if self.path == "/assistant":
+            assistant_id = str(uuid.uuid4())
+            state.assistants[assistant_id] = dict(body, id=assistant_id)
+            self._send(201, {"id": assistant_id})
+        elif self.path == "/call/web":
+            call_id = str(uuid.uuid4())
+            state.calls[call_id] = body
+            self._send(201, {"id": call_id, "webCallUrl": f"{state.base_url}/rooms/{call_id}"})
+        elif self.path == "/call":
+            if state.should_fail():
+                # Alternate between rate limiting and an overloaded server
+                if state.requests["POST /call"] % 2:
+                    self._send(429, {"message": "Too many requests"}, {"Retry-After": "1"})
+                else:
+                    self._send(503, {"message": "Service unavailable"})
+                return
+            if body.get("transport"):
+                call_id = str(uuid.uuid4())
+                state.calls[call_id] = body
+                self._send(201, {"id": call_id, "status": "queued", "transport": dict(
+                    body["transport"], websocketCallUrl=f"{state.websocket_url}/{call_id}")})
+                return
+            if not body.get("phoneNumberId") or not (body.get("customer") or {}).get("number"):
+                self._send(400, {"message": "phoneNumberId and customer.number are required"})
+                return
+            call_id = str(uuid.uuid4())
+            state.calls[call_id] = body
+            self._send(201, {"id": call_id, "status": "queued"})
+        else:
+            self._send(404, {"message": "Not found"})
+
+
+class _State:
+    def __init__(self, error_rate=0.0):
+        self.assistants = {}
+        self.calls = {}
+        self.requests = Counter()
+        self.base_url = ""
+        # Where WebSocket-transport calls say their audio is (nothing listens there unless a test does)
+        self.websocket_url = "ws://127.0.0.1:9/calls"
+        # Share of phone-call requests answered with 429/503, to exercise client retries
+        self.error_rate = error_rate
+        self._random = random.Random(0)
+        self._lock = threading.Lock()
+
+    def should_fail(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def record(self, method, path):
+        with self._lock:
+            self.requests[f"{method} {path.split('?')[0]}"] += 1
+
+
+class FakeVapiServer:
+    """Runs the fake API on a background thread; ``url`` is usable as ``api_url``."""
+
+    def __init__(self, host="127.0.0.1", port=0, error_rate=0.0, websocket_url=None):
+        self._httpd = ThreadingHTTPServer((host, port), _Handler)
+        self._httpd.daemon_threads = True
+        self.state = self._httpd.state = _State(error_rate)
+        self.url = f"http://{host}:{self._httpd.server_address[1]}"
+        self.state.base_url = self.url
+        if websocket_url:
+            self.state.websocket_url = websocket_url.rstrip("/")
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8787)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of phone-call requests that fail")
+    args = parser.parse_args()
+
+    server = FakeVapiServer(args.host, args.port, args.error_rate)
+    print(f"Fake Vapi API listening on {server.url}")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,447 @@
+"""Durable interview history in SQLite (WAL mode).
+
+Every interview started from the page gets one row: its settings, the
+candidate (hashed), when it was started, connected and ended, how it ended
+and where its transcript is. Rows are written by one background thread in
+batched transactions, so recording never waits on the disk in a button
+callback. Reads page through the history with keyset pagination on
+``(started_at, id)``, which stays fast however many rows there are, and the
+indexes cover the per-candidate, per-role and per-date views.
+
+Daily totals per interview type, level and company type are kept in the
+``rollups`` table by triggers, in the same transaction as the interview rows
+they summarise: each interview is counted once when it finishes, and its
+score when ``scoring.py --history`` writes one. Dashboards read those instead
+of the raw rows, so their cost depends on the number of days shown, not on
+the number of interviews. ``rollup_version`` goes up whenever a rollup
+changes, for caching what is drawn from them.
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque, namedtuple
+
+from call_executor import ACTIVE, IDLE, FAILED
+
+DEFAULT_PATH = "interview_history.db"
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 500
+PAGE_SIZE = 20
+
+log = logging.getLogger(__name__)
+
+# Outcomes
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+CANCELLED = "cancelled"
+FAILED_OUTCOME = "failed"
+OUTCOMES = (IN_PROGRESS, COMPLETED, CANCELLED, FAILED_OUTCOME)
+
+COLUMNS = [
+    "interview_id", "candidate", "interview_type", "interview_level", "interview_duration", "company_type",
+    "replica", "started_at", "connected_at", "ended_at", "duration_seconds", "outcome", "error",
+    "transcript_path",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interviews (
+    id INTEGER PRIMARY KEY,
+    interview_id TEXT NOT NULL UNIQUE,
+    candidate TEXT,
+    interview_type TEXT NOT NULL,
+    interview_level TEXT NOT NULL,
+    interview_duration TEXT NOT NULL,
+    company_type TEXT NOT NULL,
+    replica TEXT,
+    started_at REAL NOT NULL,
+    connected_at REAL,
+    ended_at REAL,
+    duration_seconds REAL,
+    outcome TEXT NOT NULL,
+    error TEXT,
+    transcript_path TEXT
+);
+CREATE INDEX IF NOT EXISTS interviews_started ON interviews (started_at);
+CREATE INDEX IF NOT EXISTS interviews_candidate ON interviews (candidate, started_at);
+CREATE INDEX IF NOT EXISTS interviews_type ON interviews (interview_type, started_at);
+CREATE INDEX IF NOT EXISTS interviews_type_level ON interviews (interview_type, interview_level, started_at);
+"""
+
+# Later writes for an interview fill in fields without clearing the ones already stored
+_UPSERT = (
+    f"INSERT INTO interviews ({', '.join(COLUMNS)}) VALUES ({', '.join('?' for _ in COLUMNS)}) "
+    "ON CONFLICT (interview_id) DO UPDATE SET "
+    + ", ".join(f"{c} = coalesce(excluded.{c}, {c})" for c in COLUMNS if c != "interview_id")
+)
+# Changes to an interview written in an earlier batch; SQLite checks NOT NULL before an
+# upsert's conflict, so these can't go through _UPSERT
+_UPDATE = (
+    "UPDATE interviews SET "
+    + ", ".join(f"{c} = coalesce(?, {c})" for c in COLUMNS if c != "interview_id")
+    + " WHERE interview_id = ?"
+)
+
+# Totals for one UTC day and (type, level, company). Durations are summed over the
+# interviews that connected ("timed"), scores over the ones scored so far
+ROLLUPS = """
+CREATE TABLE IF NOT EXISTS rollups (
+    day TEXT NOT NULL,
+    interview_type TEXT NOT NULL,
+    interview_level TEXT NOT NULL,
+    company_type TEXT NOT NULL,
+    interviews INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    cancelled INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    timed INTEGER NOT NULL DEFAULT 0,
+    duration_sum REAL NOT NULL DEFAULT 0,
+    scored INTEGER NOT NULL DEFAULT 0,
+    score_sum REAL NOT NULL DEFAULT 0,
+    PRIMARY KEY (day, interview_type, interview_level, company_type)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rollup_version (id INTEGER PRIMARY KEY CHECK (id = 0), version INTEGER NOT NULL);
+INSERT OR IGNORE INTO rollup_version VALUES (0, 0);
+"""
+ROLLUP_MEASURES = ["interviews", "completed", "cancelled", "failed", "timed", "duration_sum", "scored", "score_sum"]
+ROLLUP_GROUPS = ("interview_type", "interview_level", "company_type")
+
+
+def _rollup_trigger(name, event, when, **measures):
+    # Adds the given measure expressions to the rollup row of NEW's day and group
+    columns = ", ".join(measures)
+    return f"""
+CREATE TRIGGER IF NOT EXISTS {name} AFTER {event} ON interviews WHEN {when}
+BEGIN
+    INSERT INTO rollups (day, {", ".join(ROLLUP_GROUPS)}, {columns})
+    VALUES (date(new.started_at, 'unixepoch'), {", ".join(f"new.{g}" for g in ROLLUP_GROUPS)},
+            {", ".join(measures.values())})
+    ON CONFLICT (day, {", ".join(ROLLUP_GROUPS)}) DO UPDATE SET
+        {", ".join(f"{m} = {m} + excluded.{m}" for m in measures)};
+    UPDATE rollup_version SET version = version + 1;
+END;
+"""
+
+
+_FINISHED = dict(
+    interviews="1",
+    completed=f"new.outcome = '{COMPLETED}'",
+    cancelled=f"new.outcome = '{CANCELLED}'",
+    failed=f"new.outcome = '{FAILED_OUTCOME}'",
+    timed="new.duration_seconds IS NOT NULL",
+    duration_sum="coalesce(new.duration_seconds, 0)",
+)
+
+# Each migration brings the database up one PRAGMA user_version
+MIGRATIONS = [
+    # 1: scores, and rollups backfilled from the interviews already recorded
+    "ALTER TABLE interviews ADD COLUMN score REAL;"
+    + ROLLUPS
+    + f"""
+INSERT INTO rollups (day, {", ".join(ROLLUP_GROUPS)}, {", ".join(ROLLUP_MEASURES)})
+SELECT date(started_at, 'unixepoch'), {", ".join(ROLLUP_GROUPS)},
+       sum(outcome != '{IN_PROGRESS}'), sum(outcome = '{COMPLETED}'), sum(outcome = '{CANCELLED}'),
+       sum(outcome = '{FAILED_OUTCOME}'), sum(outcome != '{IN_PROGRESS}' AND duration_seconds IS NOT NULL),
+       total(CASE WHEN outcome != '{IN_PROGRESS}' THEN duration_seconds END), count(score), total(score)
+FROM interviews GROUP BY 1, 2, 3, 4;
+"""
+    # A short interview can be started and finished in the same batch, so its row is inserted finished
+    + _rollup_trigger(
+        "rollup_inserted", "INSERT", f"new.outcome != '{IN_PROGRESS}' OR new.score IS NOT NULL",
+        **{m: f"CASE WHEN new.outcome != '{IN_PROGRESS}' THEN {e} ELSE 0 END" for m, e in _FINISHED.items()},
+        scored="new.score IS NOT NULL", score_sum="coalesce(new.score, 0)"
+    )
+    + _rollup_trigger(
+        "rollup_finished", "UPDATE OF outcome", f"old.outcome = '{IN_PROGRESS}' AND new.outcome != '{IN_PROGRESS}'",
+        **_FINISHED
+    )
+    # Re-scoring replaces the old score in the totals
+    + _rollup_trigger(
+        "rollup_scored", "UPDATE OF score", "new.score IS NOT old.score",
+        scored="(old.score IS NULL) - (new.score IS NULL)",
+        score_sum="coalesce(new.score, 0) - coalesce(old.score, 0)"
+    ),
+]
+
+Page = namedtuple("Page", ["rows", "next_cursor"])
+_FILTERS = ("candidate", "interview_type", "interview_level", "company_type", "outcome")
+
+
+def candidate_id(candidate):
+    """Hash of a candidate's name or email, so neither is stored."""
+    if not candidate or not candidate.strip():
+        return None
+    return hashlib.sha256(candidate.strip().lower().encode("utf-8")).hexdigest()[:32]
+
+
+def connect(path):
+    conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    # WAL keeps committed transactions safe across a crash without a sync on every commit
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    _migrate(conn)
+    return conn
+
+
+def _migrate(conn):
+    # The write lock makes a second process (or connection) wait, then find the work done
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        for number, migration in enumerate(MIGRATIONS[version:], version + 1):
+            for statement in _statements(migration):
+                conn.execute(statement)
+            conn.execute(f"PRAGMA user_version = {number}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def _statements(script):
+    # sqlite3.complete_statement knows where a trigger body's own semicolons end
+    statements, current = [], ""
+    for line in script.splitlines(keepends=True):
+        current += line
+        if sqlite3.complete_statement(current):
+            statements.append(current.strip())
+            current = ""
+    return [s for s in statements if s]
+
+
+class _Listener:
+    # Compares equal per (history, interview) so re-attaching doesn't stack listeners
+    def __init__(self, history, interview_id, lifecycle):
+        self.history = history
+        self.interview_id = interview_id
+        self.lifecycle = lifecycle
+        self.connected_at = None
+
+    def __eq__(self, other):
+        return isinstance(other, _Listener) and (other.history, other.interview_id) == (self.history, self.interview_id)
+
+    def __call__(self, state):
+        if state == ACTIVE:
+            self.connected_at = self.lifecycle.started_at or time.time()
+            self.history.record(self.interview_id, connected_at=self.connected_at)
+        elif state in (IDLE, FAILED):
+            ended_at = time.time()
+            if state == FAILED:
+                outcome = FAILED_OUTCOME
+            else:
+                outcome = COMPLETED if self.connected_at is not None else CANCELLED
+            self.history.record(
+                self.interview_id, ended_at=ended_at, outcome=outcome, error=self.lifecycle.error,
+                duration_seconds=ended_at - self.connected_at if self.connected_at is not None else None
+            )
+            self.lifecycle.remove_listener(self)
+
+
+class InterviewHistory:
+    """Batched writer and paginated reader for the ``interviews`` table."""
+
+    def __init__(self, path=DEFAULT_PATH, flush_interval=FLUSH_INTERVAL, flush_batch=FLUSH_BATCH, registry=None):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        # A ``metrics.MetricsRegistry`` that counts rows SQLite rejects
+        self.registry = registry
+        self._pending = deque()
+        self._pending_lock = threading.Lock()
+        self._wake = threading.Event()
+        # Readers share one connection; the writer thread has its own, and WAL lets them overlap
+        self._conn = connect(path)
+        self._read_lock = threading.Lock()
+        self._write_conn = None
+        self._write_lock = threading.Lock()
+        self._thread = None
+
+    def record(self, interview_id, **fields):
+        """Queue an insert or update of an interview's row. Unknown column names raise ``KeyError``."""
+        unknown = set(fields) - set(COLUMNS)
+        if unknown:
+            raise KeyError(f"Unknown history fields: {', '.join(sorted(unknown))}")
+        with self._pending_lock:
+            self._pending.append(dict(fields, interview_id=interview_id))
+            full = len(self._pending) >= self.flush_batch
+        if full:
+            self._wake.set()
+        self._start()
+
+    def attach(self, interview_id, lifecycle, meta, candidate=None, replica=None, transcript_path=None):
+        """Record a new interview and its outcome once the call ends.
+
+        ``meta`` holds the interview settings (see ``interviews.interview_meta``).
+        """
+        self.record(
+            interview_id, candidate=candidate_id(candidate), replica=replica, transcript_path=transcript_path,
+            started_at=meta.get("started_at") or time.time(), outcome=IN_PROGRESS,
+            **{k: meta[k] for k in ("interview_type", "interview_level", "interview_duration", "company_type")}
+        )
+        lifecycle.add_listener(_Listener(self, interview_id, lifecycle))
+
+    def flush(self):
+        """Write every queued change in one transaction. Returns the number of interviews written.
+
+        If SQLite rejects the batch (e.g. a row breaks a constraint), the rows
+        are written one by one and the rejected ones logged and counted.
+        """
+        with self._pending_lock:
+            batch, self._pending = list(self._pending), deque()
+        if not batch:
+            return 0
+        # One row per interview: later changes win, fields they leave out are kept
+        rows = {}
+        for change in batch:
+            row = rows.setdefault(change["interview_id"], {})
+            row.update((k, v) for k, v in change.items() if v is not None)
+        rows = list(rows.values())
+        try:
+            self._write(rows)
+            return len(rows)
+        except sqlite3.OperationalError:
+            # Locked or out of disk: put the changes back in front of newer ones for the next flush
+            self._requeue(batch)
+            raise
+        except sqlite3.Error:
+            pass
+        written = 0
+        for i, row in enumerate(rows):
+            try:
+                self._write([row])
+                written += 1
+            except sqlite3.OperationalError:
+                # Each merged row is a change of its own
+                self._requeue(rows[i:])
+                raise
+            except sqlite3.Error as e:
+                # Would fail every retry
+                log.warning("Dropped history row for interview %s: %s", row["interview_id"], e)
+                if self.registry is not None:
+                    self.registry.count("history_rejected_rows")
+        return written
+
+    def _write(self, rows):
+        # Only a batch with an interview's first write (``attach``) can insert its row
+        inserts = [[row.get(c) for c in COLUMNS] for row in rows if "started_at" in row]
+        updates = [
+            [row.get(c) for c in COLUMNS if c != "interview_id"] + [row["interview_id"]]
+            for row in rows if "started_at" not in row
+        ]
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = connect(self.path)
+            with self._write_conn:
+                self._write_conn.executemany(_UPSERT, inserts)
+                self._write_conn.executemany(_UPDATE, updates)
+
+    def _requeue(self, changes):
+        with self._pending_lock:
+            self._pending.extendleft(reversed(changes))
+
+    def page(self, cursor=None, limit=PAGE_SIZE, since=None, until=None, **filters):
+        """Newest-first page of interviews, optionally filtered by column value and ``started_at`` range.
+
+        Pass the returned ``next_cursor`` back in to get the following page;
+        it is None on the last one. ``candidate`` filters take the name or email.
+        """
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in _FILTERS:
+                raise KeyError(f"Can't filter history by {column}")
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(candidate_id(value) if column == "candidate" else value)
+        if since is not None:
+            clauses.append("started_at >= ?")
+            params.append(since)
+        if until is not None:
+            clauses.append("started_at < ?")
+            params.append(until)
+        if cursor is not None:
+            # Seek past the last row shown instead of OFFSET, which would rescan every earlier row
+            clauses.append("(started_at, id) < (?, ?)")
+            params.extend(cursor)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = f"SELECT * FROM interviews {where} ORDER BY started_at DESC, id DESC LIMIT ?"
+        with self._read_lock:
+            rows = [dict(row) for row in self._conn.execute(sql, params + [limit + 1])]
+        next_cursor = (rows[limit - 1]["started_at"], rows[limit - 1]["id"]) if len(rows) > limit else None
+        return Page(rows[:limit], next_cursor)
+
+    def set_scores(self, scores):
+        """Store ``{interview_id: score}``; the rollups pick them up. Returns how many interviews were found."""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = connect(self.path)
+            with self._write_conn:
+                cursor = self._write_conn.executemany(
+                    "UPDATE interviews SET score = ? WHERE interview_id = ?",
+                    [(score, interview_id) for interview_id, score in scores.items()]
+                )
+        return cursor.rowcount
+
+    def rollup_version(self):
+        """Goes up with every change to the rollups."""
+        with self._read_lock:
+            return self._conn.execute("SELECT version FROM rollup_version").fetchone()[0]
+
+    def trends(self, group_by=None, since=None, **filters):
+        """Daily rollup totals, summed per ``group_by`` column (or overall), oldest day first.
+
+        ``since`` is a ``YYYY-MM-DD`` UTC day; filters take interview type,
+        level or company type values.
+        """
+        if group_by is not None and group_by not in ROLLUP_GROUPS:
+            raise KeyError(f"Can't group rollups by {group_by}")
+        clauses, params = [], []
+        for column, value in filters.items():
+            if column not in ROLLUP_GROUPS:
+                raise KeyError(f"Can't filter rollups by {column}")
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if since is not None:
+            clauses.append("day >= ?")
+            params.append(since)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        group = group_by or "'all'"
+        sql = (f"SELECT day, {group} AS grp, {', '.join(f'sum({m}) AS {m}' for m in ROLLUP_MEASURES)} "
+               f"FROM rollups {where} GROUP BY day, grp ORDER BY day")
+        with self._read_lock:
+            return [dict(row) for row in self._conn.execute(sql, params)]
+
+    def get(self, interview_id):
+        with self._read_lock:
+            row = self._conn.execute("SELECT * FROM interviews WHERE interview_id = ?", (interview_id,)).fetchone()
+        return None if row is None else dict(row)
+
+    def _start(self):
+        with self._write_lock:
+            if self._thread is not None:
+                return
+
+            def run():
+                while True:
+                    self._wake.wait(self.flush_interval)
+                    self._wake.clear()
+                    try:
+                        self.flush()
+                    except sqlite3.OperationalError:
+                        # Locked or out of disk: flush re-queued the batch; retry next round
+                        pass
+
+            self._thread = threading.Thread(target=run, name="history-writer", daemon=True)
+            self._thread.start()
+
+    def close(self):
+        self.flush()
+        with self._read_lock:
+            self._conn.close()
+        with self._write_lock:
+            if self._write_conn is not None:
+                self._write_conn.close()
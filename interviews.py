@@ -0,0 +1,77 @@
+"""Interview configuration shared by the Streamlit page and the batch launcher.
+
+Turns the chosen role, level, company type and duration (plus an optional job
+description and candidate) into the assistant payload that is sent to Vapi,
+with a question plan drawn from the question bank.
+"""
+
+from collections import namedtuple
+
+import question_bank
+from prompts import INTERVIEW_TYPES, INTERVIEW_LEVELS, INTERVIEW_DURATIONS, COMPANY_TYPES, registry
+
+InterviewConfig = namedtuple("InterviewConfig", [
+    "interview_type", "interview_level", "interview_duration", "company_type", "job_description"
+])
+Interview = namedtuple("Interview", ["config", "compiled", "questions", "assistant"])
+
+DEFAULT_CONFIG = InterviewConfig("software_engineer", "mid_level", "30_minutes", "enterprise", "")
+
+_CHOICES = {
+    "interview_type": INTERVIEW_TYPES,
+    "interview_level": INTERVIEW_LEVELS,
+    "interview_duration": INTERVIEW_DURATIONS,
+    "company_type": COMPANY_TYPES,
+}
+
+
+def make_config(**fields):
+    """``InterviewConfig`` from ``fields``, with defaults for missing or empty ones.
+
+    Raises ``ValueError`` for a value that is not one of the template choices.
+    """
+    config = DEFAULT_CONFIG._replace(**{k: v for k, v in fields.items() if v})
+    for field, choices in _CHOICES.items():
+        if getattr(config, field) not in choices:
+            raise ValueError(f"Unknown {field} {getattr(config, field)!r}; expected one of {', '.join(choices)}")
+    return config
+
+
+def duration_seconds(config):
+    return int(config.interview_duration.split("_")[0]) * 60
+
+
+def plan_questions(bank, history, candidate, config):
+    """Questions for ``candidate``'s interview, skipping ones they have been asked before.
+
+    Without a ``candidate`` there is no history to skip.
+    """
+    if bank is None:
+        return []
+    return bank.sample(
+        config.interview_type, config.interview_level, config.company_type,
+        question_bank.QUESTIONS_PER_DURATION[config.interview_duration],
+        exclude=history.asked(candidate) if candidate else [], skills=bank.skills_in(config.job_description)
+    )
+
+
+def prepare(config, questions=(), job_description_budget=None):
+    """The compiled assistant for ``config`` with ``questions`` added to its context."""
+    compiled = registry.get(
+        config.interview_type, config.interview_level, config.company_type, config.interview_duration,
+        config.job_description, job_description_budget
+    )
+    return Interview(config, compiled, list(questions), question_bank.with_questions(compiled.assistant, questions))
+
+
+def interview_meta(interview_id, interview, **extra):
+    """Header of an interview's transcript and batch records."""
+    config = interview.config
+    return dict({
+        "interview_id": interview_id,
+        "interview_type": config.interview_type,
+        "interview_level": config.interview_level,
+        "interview_duration": config.interview_duration,
+        "company_type": config.company_type,
+        "questions": [question.key for question in interview.questions],
+    }, **extra)
@@ -1,12 +1,27 @@
-import os
 import streamlit as st
-from vapi_python import Vapi
-from dotenv import load_dotenv
+from voice_backends import open_backend
+from config import load_settings, stylesheet_html
+from metrics import CallTimer
+import metrics
+from call_executor import IDLE, CallLifecycle, make_executor
+from call_session import connector, sync_session
+from session_manager import SessionBusy, SessionManager, current_session_id, streamlit_session_alive
+from call_state import CallStateStore, LIVE_STATES
+from state_store import open_store
+from transcripts import TranscriptWriter
+from history import InterviewHistory
+from pacing import InterviewPacer
+from widgets import call_controls, live_transcript, remote_interview
+from prompts import INTERVIEW_TYPES, INTERVIEW_LEVELS, INTERVIEW_DURATIONS, COMPANY_TYPES, registry
+import assistant_cache
+import question_bank
+import interviews
+import datetime
 import time
-import json
+import os
 
-# Load environment variables
-load_dotenv()
+# Load environment variables (once per process)
+settings = load_settings()
 
 # Set page config
 st.set_page_config(
@@ -16,46 +31,96 @@ st.set_page_config(
 )
 
 # Custom CSS
-st.markdown("""
-<style>
-    .main-title {
-        font-size: 42px;
-        font-weight: bold;
-        color: #1E88E5;
-        text-align: center;
-        margin-bottom: 30px;
-    }
-    .sub-title {
-        font-size: 24px;
-        color: #424242;
-        text-align: center;
-        margin-bottom: 20px;
-    }
-    .status-active {
-        color: #4CAF50;
-        font-weight: bold;
-    }
-    .status-inactive {
-        color: #F44336;
-        font-weight: bold;
-    }
-    .container {
-        background-color: #f5f5f5;
-        padding: 20px;
-        border-radius: 10px;
-        margin-bottom: 20px;
-    }
-    .interview-question {
-        font-weight: bold;
-        margin-top: 10px;
-    }
-    .interview-note {
-        font-style: italic;
-        color: #666;
-        margin-bottom: 15px;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(stylesheet_html(st.get_option("server.enableStaticServing")), unsafe_allow_html=True)
+
+# Warm Vapi clients (or the call simulator) shared by every session in this process
+@st.cache_resource
+def get_client_pool():
+    pool = open_backend(settings.voice_backend, settings.api_url)
+    if settings.api_key and settings.prewarm:
+        # Pre-warm in the background at app boot so the first click is fast
+        pool.warm_async(settings.api_key)
+    return pool
+
+client_pool = get_client_pool()
+
+# Server-side assistant ID cache (enabled with VAPI_ASSISTANT_CACHE=1)
+@st.cache_resource
+def get_assistant_cache():
+    return assistant_cache.from_env()
+
+# Call start/stop runs on a bounded thread pool shared by every session
+@st.cache_resource
+def get_call_executor():
+    return make_executor()
+
+# Admission control and orphan reaping for every live call on this node
+@st.cache_resource
+def get_session_manager():
+    manager = SessionManager(
+        max_calls=settings.max_calls,
+        max_calls_per_key=settings.max_calls_per_key,
+        is_alive=streamlit_session_alive
+    )
+    manager.start_reaper()
+    return manager
+
+session_manager = get_session_manager()
+
+# Call latency histograms, exported in OpenMetrics format when configured
+@st.cache_resource
+def get_call_metrics():
+    if settings.metrics_file:
+        metrics.registry.start_exporter(settings.metrics_file)
+    if settings.metrics_port:
+        metrics.registry.serve(settings.metrics_port)
+    return metrics.registry
+
+call_metrics = get_call_metrics()
+
+# Interview records shared with the other replicas behind the load balancer
+@st.cache_resource
+def get_call_state():
+    call_state = CallStateStore(open_store(settings.state_url))
+    call_state.start_watcher()
+    return call_state
+
+call_state = get_call_state()
+
+# One writer thread appends every interview's transcript to disk
+@st.cache_resource
+def get_transcript_writer():
+    return TranscriptWriter(settings.transcript_dir, registry=call_metrics)
+
+transcript_writer = get_transcript_writer()
+
+# Holds every interview on this node to its chosen duration (simulated calls run on a compressed clock)
+@st.cache_resource
+def get_pacer():
+    return InterviewPacer(speedup=getattr(client_pool, "speedup", 1.0))
+
+pacer = get_pacer()
+
+# Every interview's settings, timing and outcome, written to SQLite in batches off the request path
+@st.cache_resource
+def get_history():
+    if not settings.history_db:
+        return None
+    return InterviewHistory(settings.history_db, registry=call_metrics)
+
+history = get_history()
+
+# Indexed interview questions, memory-mapped once per process
+@st.cache_resource
+def get_question_bank():
+    source = question_bank.DEFAULT_SOURCE if settings.question_bank is None else settings.question_bank
+    if not source or not os.path.exists(source):
+        return None
+    return question_bank.load(source)
+
+question_bank_index = get_question_bank()
+# Questions each candidate has been asked, kept with the interview records so every replica sees them
+question_history = question_bank.QuestionHistory(call_state.store)
 
 # Initialize session state variables
 if 'call_active' not in st.session_state:
@@ -68,19 +133,80 @@ if 'interview_level' not in st.session_state:
     st.session_state.interview_level = "mid_level"
 if 'interview_duration' not in st.session_state:
     st.session_state.interview_duration = "30_minutes"
+if 'company_type' not in st.session_state:
+    st.session_state.company_type = "enterprise"
+if 'job_description' not in st.session_state:
+    st.session_state.job_description = ""
+if 'candidate' not in st.session_state:
+    st.session_state.candidate = ""
+if 'interview_id' not in st.session_state:
+    st.session_state.interview_id = None
+if 'call_started_at' not in st.session_state:
+    st.session_state.call_started_at = None
+if 'call_lifecycle' not in st.session_state:
+    st.session_state.call_lifecycle = CallLifecycle(get_call_executor())
+if 'question_plan' not in st.session_state:
+    st.session_state.question_plan = None
+if 'interview_pace' not in st.session_state:
+    st.session_state.interview_pace = None
+if 'history_cursors' not in st.session_state:
+    st.session_state.history_cursors = [None]
+if 'history_filters' not in st.session_state:
+    st.session_state.history_filters = None
+
+def sync_call_state():
+    # Mirror the background lifecycle into the session keys the rest of the page reads
+    sync_session(st.session_state, st.session_state.call_lifecycle)
+
+def resume_interview():
+    # Pick up the interview in the URL, e.g. after a reload or when the load
+    # balancer sends this browser to a different replica
+    interview_id = st.query_params.get("interview")
+    if not interview_id or interview_id == st.session_state.interview_id:
+        return
+    record = call_state.get(interview_id)
+    if record is None:
+        del st.query_params["interview"]
+        return
+    # The call runs in this process: take it over from the old browser session
+    lifecycle = call_state.local_lifecycle(interview_id)
+    if lifecycle is not None:
+        try:
+            session_manager.reassign(lifecycle, current_session_id())
+        except SessionBusy:
+            st.warning("End the interview in progress before opening another one.")
+            return
+        st.session_state.call_lifecycle = lifecycle
+    st.session_state.interview_id = interview_id
+    st.session_state.interview_type = record["interview_type"]
+    st.session_state.interview_level = record["interview_level"]
+    st.session_state.interview_duration = record["interview_duration"]
+    st.session_state.company_type = record["company_type"]
+
+def remote_call():
+    # True while this session's interview has a live call on another replica
+    interview_id = st.session_state.interview_id
+    if interview_id is None or call_state.local_lifecycle(interview_id) is not None:
+        return False
+    record = call_state.get(interview_id)
+    return record is not None and record["state"] in LIVE_STATES and not record["stale"]
+
+resume_interview()
+sync_call_state()
 
 # Title and description
 st.markdown('<div class="main-title">AI Interview Assistant</div>', unsafe_allow_html=True)
 st.markdown('<div class="sub-title">Practice your interview skills with an AI interviewer</div>', unsafe_allow_html=True)
 
 # API Key input
-api_key = os.getenv("VAPI_API_KEY")
+api_key = settings.api_key
 if not api_key:
     api_key = st.text_input("Enter your Vapi API Key:", type="password", 
                            help="Get your API key from the Vapi dashboard")
 
-# Interview configuration section
-if not st.session_state.call_active:
+# Interview configuration section, hidden while a call is in progress
+call_active = st.session_state.call_lifecycle.state in LIVE_STATES or remote_call()
+if not call_active:
     st.markdown('<div class="container">', unsafe_allow_html=True)
     st.subheader("Interview Configuration")
 
@@ -89,311 +215,353 @@ if not st.session_state.call_active:
     with col1:
         interview_type = st.selectbox(
             "Interview Type:", 
-            options=[
-                "software_engineer", 
-                "data_scientist", 
-                "product_manager", 
-                "marketing", 
-                "sales", 
-                "customer_service"
-            ],
+            options=INTERVIEW_TYPES,
             format_func=lambda x: x.replace("_", " ").title(),
-            index=0
+            index=INTERVIEW_TYPES.index(st.session_state.interview_type)
         )
-        
+    
         interview_level = st.selectbox(
             "Experience Level:", 
-            options=[
-                "entry_level", 
-                "mid_level", 
-                "senior_level", 
-                "leadership"
-            ],
+            options=INTERVIEW_LEVELS,
             format_func=lambda x: x.replace("_", " ").title(),
-            index=1
+            index=INTERVIEW_LEVELS.index(st.session_state.interview_level)
         )
 
     with col2:
         interview_duration = st.selectbox(
             "Interview Duration:", 
-            options=[
-                "15_minutes", 
-                "30_minutes", 
-                "45_minutes", 
-                "60_minutes"
-            ],
+            options=INTERVIEW_DURATIONS,
             format_func=lambda x: x.replace("_", " ").title(),
-            index=1
+            index=INTERVIEW_DURATIONS.index(st.session_state.interview_duration)
         )
-        
+    
         company_type = st.selectbox(
             "Company Type:", 
-            options=[
-                "startup", 
-                "mid_size", 
-                "enterprise", 
-                "faang"
-            ],
+            options=COMPANY_TYPES,
             format_func=lambda x: "FAANG" if x == "faang" else x.replace("_", " ").title(),
-            index=2
+            index=COMPANY_TYPES.index(st.session_state.company_type)
         )
 
     # Custom context input
     st.subheader("Additional Context (Optional)")
     job_description = st.text_area(
         "Job Description or Additional Details:",
+        value=st.session_state.job_description,
         placeholder="Paste job description or provide additional context for the interview...",
         height=100
     )
-    
-    st.markdown('</div>', unsafe_allow_html=True)
+    candidate = st.text_input(
+        "Your Name or Email (Optional):",
+        value=st.session_state.candidate,
+        help="Used only to avoid repeating questions you have already been asked"
+    )
 
-# Interview templates based on role
-interview_templates = {
-    "software_engineer": {
-        "entry_level": "You are conducting an entry-level software engineering interview. Focus on basic programming concepts, data structures, algorithms, and problem-solving skills. Ask questions about the candidate's educational background and any projects they've worked on.",
-        "mid_level": "You are conducting a mid-level software engineering interview. Focus on more advanced programming concepts, system design fundamentals, and practical experience. Ask about previous work experience, technical challenges they've overcome, and how they approach problem-solving.",
-        "senior_level": "You are conducting a senior-level software engineering interview. Focus on advanced system design, architecture decisions, technical leadership, and mentoring abilities. Ask about complex projects they've led, technical decisions they've made, and how they handle team dynamics.",
-        "leadership": "You are conducting an engineering leadership interview. Focus on technical vision, team management, project planning, and cross-functional collaboration. Ask about their leadership style, how they've grown engineering teams, and how they balance technical and management responsibilities."
-    },
-    "data_scientist": {
-        "entry_level": "You are conducting an entry-level data science interview. Focus on statistics fundamentals, basic machine learning concepts, and data manipulation skills. Ask about their educational background, projects, and familiarity with tools like Python, R, SQL, and basic ML libraries.",
-        "mid_level": "You are conducting a mid-level data science interview. Focus on applied machine learning, feature engineering, model evaluation, and business impact. Ask about previous projects, how they've translated business problems into data problems, and their experience with production ML systems.",
-        "senior_level": "You are conducting a senior-level data science interview. Focus on advanced modeling techniques, research experience, and technical leadership in data science teams. Ask about novel approaches they've developed, how they've mentored junior data scientists, and their vision for data science in organizations.",
-        "leadership": "You are conducting a data science leadership interview. Focus on data strategy, team building, cross-functional collaboration, and business impact at scale. Ask about how they've built data science teams, implemented data governance, and aligned data science initiatives with business goals."
-    },
-    "product_manager": {
-        "entry_level": "You are conducting an entry-level product management interview. Focus on product thinking, user empathy, and basic product development processes. Ask about their understanding of product management, any relevant projects, and how they approach user problems.",
-        "mid_level": "You are conducting a mid-level product management interview. Focus on product strategy, prioritization frameworks, cross-functional collaboration, and metrics. Ask about products they've managed, how they've made prioritization decisions, and how they measure success.",
-        "senior_level": "You are conducting a senior-level product management interview. Focus on product vision, strategy development, team leadership, and business impact. Ask about complex product challenges they've solved, how they've influenced organizational strategy, and their approach to product innovation.",
-        "leadership": "You are conducting a product leadership interview. Focus on product organization structure, developing product culture, executive communication, and strategic thinking. Ask about how they've built product teams, aligned product roadmaps with company strategy, and navigated complex stakeholder environments."
-    },
-    "marketing": {
-        "entry_level": "You are conducting an entry-level marketing interview. Focus on marketing fundamentals, digital marketing channels, content creation, and analytical skills. Ask about their understanding of marketing principles, any campaigns they've worked on, and their familiarity with marketing tools.",
-        "mid_level": "You are conducting a mid-level marketing interview. Focus on campaign management, channel strategy, audience targeting, and performance analysis. Ask about marketing campaigns they've led, how they've optimized channel performance, and their approach to marketing analytics.",
-        "senior_level": "You are conducting a senior-level marketing interview. Focus on marketing strategy, brand development, team leadership, and cross-channel integration. Ask about comprehensive marketing strategies they've developed, how they've built brand equity, and their approach to marketing innovation.",
-        "leadership": "You are conducting a marketing leadership interview. Focus on marketing organization structure, brand vision, marketing technology stack, and business growth strategy. Ask about how they've built marketing teams, aligned marketing with business objectives, and navigated changing market conditions."
-    },
-    "sales": {
-        "entry_level": "You are conducting an entry-level sales interview. Focus on communication skills, basic sales techniques, customer service orientation, and learning agility. Ask about their understanding of the sales process, any sales experience they have, and how they handle objections.",
-        "mid_level": "You are conducting a mid-level sales interview. Focus on sales methodology, account management, negotiation skills, and consistent quota achievement. Ask about their sales process, how they manage customer relationships, and specific examples of deals they've closed.",
-        "senior_level": "You are conducting a senior-level sales interview. Focus on strategic account planning, complex deal navigation, team leadership, and consistent overperformance. Ask about major accounts they've managed, how they've navigated complex sales cycles, and their approach to sales leadership.",
-        "leadership": "You are conducting a sales leadership interview. Focus on sales organization structure, sales strategy development, coaching methodology, and revenue growth. Ask about how they've built and developed sales teams, their approach to territory planning, and how they've driven sustainable revenue growth."
-    },
-    "customer_service": {
-        "entry_level": "You are conducting an entry-level customer service interview. Focus on communication skills, empathy, problem-solving abilities, and patience. Ask about their understanding of customer service principles, how they handle difficult situations, and their approach to helping customers.",
-        "mid_level": "You are conducting a mid-level customer service interview. Focus on conflict resolution, customer retention strategies, process improvement, and team collaboration. Ask about challenging customer situations they've resolved, how they've improved customer service processes, and their approach to customer satisfaction.",
-        "senior_level": "You are conducting a senior-level customer service interview. Focus on customer service strategy, team leadership, quality assurance, and cross-functional collaboration. Ask about customer service teams they've led, how they've improved service metrics, and their approach to customer experience management.",
-        "leadership": "You are conducting a customer service leadership interview. Focus on customer service organization structure, service culture development, technology integration, and business impact. Ask about how they've built customer service teams, implemented service technologies, and aligned service strategy with business objectives."
-    }
-}
-
-# Company type contexts
-company_contexts = {
-    "startup": "This is for a fast-paced startup environment where versatility, ownership, and comfort with ambiguity are highly valued. The company has limited resources but offers significant growth opportunities and impact.",
-    "mid_size": "This is for a mid-sized company with established processes but still room for innovation and growth. The company values both specialized expertise and cross-functional collaboration.",
-    "enterprise": "This is for a large enterprise with complex organizational structures, established processes, and significant resources. The company values scalable solutions, attention to detail, and navigating complex stakeholder environments.",
-    "faang": "This is for a FAANG-level tech company (Facebook/Meta, Apple, Amazon, Netflix, Google) or similar tier-1 tech company. The company has extremely high standards, rigorous interview processes, and expects exceptional technical depth and problem-solving abilities."
-}
-
-# Duration adjustments
-duration_contexts = {
-    "15_minutes": "This is a brief screening interview to assess basic qualifications and fit. Focus on high-level questions and keep the conversation moving quickly.",
-    "30_minutes": "This is a standard interview round focused on specific areas of expertise. Balance depth and breadth in your questioning.",
-    "45_minutes": "This is an extended interview allowing for deeper exploration of the candidate's experience and skills. Include both technical and behavioral questions.",
-    "60_minutes": "This is a comprehensive interview covering multiple aspects of the candidate's qualifications. Include technical assessment, behavioral questions, and allow time for the candidate to ask questions."
-}
-
-# Call control section
-st.markdown('<div class="container">', unsafe_allow_html=True)
-st.subheader("Interview Control")
+    interview_config = interviews.make_config(
+        interview_type=interview_type, interview_level=interview_level, interview_duration=interview_duration,
+        company_type=company_type, job_description=job_description
+    )
+
+    def plan_questions():
+        # Sampled once per candidate and configuration, so reruns keep the same questions
+        if question_bank_index is None:
+            return []
+        who = candidate.strip()
+        key = (who, interview_config._replace(job_description=tuple(question_bank_index.skills_in(job_description))))
+        plan = st.session_state.question_plan
+        if plan is None or plan[0] != key:
+            questions = interviews.plan_questions(question_bank_index, question_history, who, interview_config)
+            plan = st.session_state.question_plan = (key, questions)
+        return plan[1]
 
-# Display call status
-status_text = "ACTIVE" if st.session_state.call_active else "INACTIVE"
-status_class = "status-active" if st.session_state.call_active else "status-inactive"
-st.markdown(f"Interview Status: <span class='{status_class}'>{status_text}</span>", unsafe_allow_html=True)
+    planned_questions = plan_questions()
+
+    # Size of the prompt the interviewer will get; compiled payloads are cached, so this is cheap per rerun
+    compiled_prompt = registry.get(
+        interview_type, interview_level, company_type, interview_duration, job_description,
+        settings.job_description_budget
+    )
+    condensed = compiled_prompt.job_description
+    prompt_size = f"Prompt size: about {compiled_prompt.prompt_tokens + question_bank.questions_tokens(planned_questions)} tokens"
+    if condensed and condensed.tokens < condensed.original_tokens:
+        prompt_size += f" (job description condensed from {condensed.original_tokens} to {condensed.tokens} tokens)"
+    if planned_questions:
+        prompt_size += f", {len(planned_questions)} planned questions"
+    st.caption(prompt_size)
 
-# Start/Stop call buttons
-col1, col2 = st.columns(2)
+    st.markdown('</div>', unsafe_allow_html=True)
+else:
+    # The settings the call was started with, for the sections below
+    interview_type = st.session_state.interview_type
+    candidate = st.session_state.candidate
 
 def start_interview():
     if not api_key:
         st.error("Please enter your Vapi API Key")
         return
     
+    # Store current interview settings
+    st.session_state.interview_type = interview_type
+    st.session_state.interview_level = interview_level
+    st.session_state.interview_duration = interview_duration
+    st.session_state.company_type = company_type
+    # Hidden widgets lose their values; these refill them once the call is over
+    st.session_state.job_description = job_description
+    st.session_state.candidate = candidate
+    
+    # Record the interview outside this process and put its ID in the URL
+    interview_id = call_state.create(interview_type, interview_level, interview_duration, company_type)
+    st.session_state.interview_id = interview_id
+    st.query_params["interview"] = interview_id
+    call_state.attach(interview_id, st.session_state.call_lifecycle)
+    
+    # Time each phase of the start, from this click to the interviewer's first words
+    timer = CallTimer(call_metrics, app="interview")
+    clicked = time.perf_counter()
+    
+    # Look up the precompiled assistant for this configuration
+    with timer.time("prompt"):
+        interview = interviews.prepare(interview_config, planned_questions, settings.job_description_budget)
+    compiled = interview.compiled
+    meta = interviews.interview_meta(interview_id, interview, started_at=time.time())
+    transcript = transcript_writer.attach(interview_id, st.session_state.call_lifecycle, meta=meta)
+    pace = st.session_state.interview_pace = pacer.attach(
+        st.session_state.call_lifecycle, interviews.duration_seconds(interview_config), len(planned_questions))
+    if history is not None:
+        history.attach(interview_id, st.session_state.call_lifecycle, meta, candidate=candidate,
+                       replica=call_state.replica_id, transcript_path=transcript_writer.path(interview_id))
+    with timer.time("client"):
+        client = client_pool.get(api_key)
+    id_cache = get_assistant_cache() if client_pool.remote_assistants else None
+    if planned_questions:
+        # Remember them so this candidate's next interview gets different questions; a
+        # session ID would only be a dead key in the shared store, so anonymous runs aren't recorded
+        if candidate.strip():
+            question_history.record(candidate.strip(), planned_questions)
+        st.session_state.question_plan = None
+    
+    fallback = None
+    if id_cache and not planned_questions:
+        # Reuse the server-side copy of this assistant instead of sending it inline (runs on the call executor)
+        start_kwargs = lambda: {"assistant_id": id_cache.get_or_create(api_key, compiled, session=client.session)}
+
+        def fallback():
+            # The saved assistant was deleted or rejected; replace it once
+            id_cache.invalidate(api_key, compiled.content_hash)
+            return start_kwargs()
+    else:
+        # A question plan makes every call's context unique, so there is nothing to reuse
+        start_kwargs = {"assistant": interview.assistant}
+    
+    # Starts now if this node has a free slot, otherwise waits in the queue
     try:
-        # Initialize Vapi instance
-        vapi = Vapi(api_key=api_key)
-        st.session_state.vapi_instance = vapi
-        
-        # Store current interview settings
-        st.session_state.interview_type = interview_type
-        st.session_state.interview_level = interview_level
-        st.session_state.interview_duration = interview_duration
-        
-        # Build context for the interview
-        role_context = interview_templates[interview_type][interview_level]
-        company_context = company_contexts[company_type]
-        duration_context = duration_contexts[interview_duration]
-        
-        # Combine contexts
-        full_context = f"""
-        You are an AI interviewer conducting a professional job interview. 
-        
-        {role_context}
-        
-        {company_context}
-        
-        {duration_context}
-        
-        Additional context about the position: {job_description if job_description else "No additional context provided."}
-        
-        Important guidelines:
-        1. Introduce yourself as the interviewer at the beginning.
-        2. Ask one question at a time and wait for the candidate's response.
-        3. Listen carefully to answers and ask relevant follow-up questions.
-        4. Balance technical and behavioral questions appropriate for the role and level.
-        5. Be professional, courteous, and encouraging, but also thorough in your assessment.
-        6. When the interview time is nearly up, let the candidate know and ask if they have any questions.
-        7. Thank the candidate for their time at the end of the interview.
-        
-        Start the interview with a brief introduction and your first question.
-        """
-        
-        # Create custom assistant
-        assistant = {
-            "firstMessage": f"Hello, I'll be conducting your interview today for the {interview_type.replace('_', ' ')} position. Let's get started with the first question.",
-            "context": full_context,
-            "model": "gpt-4o",
-            "voice": "jennifer-playht",
-            "recordingEnabled": True,
-            "interruptionsEnabled": False
-        }
-        
-        st.session_state.vapi_instance.start(assistant=assistant)
-        st.session_state.call_active = True
-        st.success("Interview started successfully!")
-        st.rerun()
-    except Exception as e:
-        st.error(f"Error starting interview: {str(e)}")
+        session_manager.submit(
+            current_session_id(), api_key, st.session_state.call_lifecycle,
+            connector(client, start_kwargs, on_message=pace.listen(transcript.add_message), timer=timer,
+                      clicked=clicked, fallback=fallback),
+            expected_seconds=interviews.duration_seconds(interview_config)
+        )
+    except SessionBusy:
+        st.error("Another interview is already in progress in this browser session")
 
 def stop_interview():
-    if st.session_state.vapi_instance:
-        try:
-            st.session_state.vapi_instance.stop()
-            st.session_state.call_active = False
-            st.session_state.vapi_instance = None
-            st.success("Interview ended successfully!")
-            st.rerun()
-        except Exception as e:
-            st.error(f"Error stopping interview: {str(e)}")
-
-with col1:
-    if not st.session_state.call_active:
-        st.button("Start Interview", on_click=start_interview, type="primary", use_container_width=True)
-
-with col2:
-    if st.session_state.call_active:
-        st.button("End Interview", on_click=stop_interview, type="primary", use_container_width=True)
+    st.session_state.call_lifecycle.stop()
 
-st.markdown('</div>', unsafe_allow_html=True)
+# Call control section, rerun on its own when the interview starts or stops
+@st.fragment
+def interview_control():
+    lifecycle = st.session_state.call_lifecycle
+    sync_call_state()
+    if not call_active and (lifecycle.state in LIVE_STATES or remote_call()):
+        # A call just started: only a full run can hide the configuration section above
+        st.rerun()
 
-# Interview guidance section
-if st.session_state.call_active:
     st.markdown('<div class="container">', unsafe_allow_html=True)
-    st.subheader("Interview in Progress")
-    st.markdown("""
-    Your interview is active. Speak into your microphone to respond to the interviewer's questions.
-    
-    Tips for a successful interview:
-    - Speak clearly and at a moderate pace
-    - Use specific examples from your experience
-    - Structure your answers using the STAR method (Situation, Task, Action, Result)
-    - Ask clarifying questions if needed
-    - Be authentic in your responses
-    
-    Click "End Interview" when you're finished with the conversation.
-    """)
+    st.subheader("Interview Control")
+
+    # The call belongs to another replica: report on it and allow stopping it
+    if remote_call():
+        remote_interview(call_state, st.session_state.interview_id)
+        st.markdown('</div>', unsafe_allow_html=True)
+        return
+    record = call_state.get(st.session_state.interview_id) if st.session_state.interview_id else None
+    if record is not None and record["stale"]:
+        st.warning("This interview was interrupted because its server went away. "
+                   "Start again to continue with the same settings.")
+
+    pace = st.session_state.interview_pace
+    if lifecycle.state == IDLE and pace is not None and pace.hard_stopped:
+        st.info(f"The interview reached its {round(pace.duration / 60)}-minute limit and was ended automatically.")
+
+    transcript_note = None
+    if lifecycle.state == IDLE and st.session_state.interview_id:
+        transcript_path = transcript_writer.path(st.session_state.interview_id)
+        if os.path.exists(transcript_path):
+            transcript_note = f"Transcript saved to {transcript_path}"
+
+    # Interview status and Start/Stop buttons
+    call_controls("Interview Status", lifecycle, session_manager, current_session_id(),
+                  "Start Interview", "End Interview", start_interview, stop_interview, idle_note=transcript_note)
+
     st.markdown('</div>', unsafe_allow_html=True)
-else:
-    st.markdown('<div class="container">', unsafe_allow_html=True)
-    st.subheader("Interview Preparation Tips")
-    
-    # Show different tips based on the selected role
-    if interview_type == "software_engineer":
-        st.markdown("""
-        ### Software Engineering Interview Tips
-        
-        <div class="interview-question">Technical Preparation:</div>
-        <div class="interview-note">Review data structures, algorithms, system design, and coding fundamentals relevant to your level.</div>
-        
-        <div class="interview-question">Common Questions:</div>
-        - Explain a challenging technical problem you've solved
-        - How do you approach debugging a complex issue?
-        - Describe your experience with [relevant technologies]
-        - How do you stay updated with the latest developments in software engineering?
-        
-        <div class="interview-question">Questions to Ask:</div>
-        - What does the development process look like?
-        - How is code reviewed in the team?
-        - What are the biggest technical challenges the team is facing?
-        """, unsafe_allow_html=True)
-    elif interview_type == "data_scientist":
-        st.markdown("""
-        ### Data Science Interview Tips
-        
-        <div class="interview-question">Technical Preparation:</div>
-        <div class="interview-note">Review statistics, machine learning algorithms, feature engineering, and data manipulation techniques.</div>
-        
-        <div class="interview-question">Common Questions:</div>
-        - Describe a data science project you've worked on from start to finish
-        - How do you validate your models?
-        - How do you handle missing or imbalanced data?
-        - Explain a complex concept to a non-technical stakeholder
-        
-        <div class="interview-question">Questions to Ask:</div>
-        - What data infrastructure is in place?
-        - How is data science integrated with the product development process?
-        - What metrics matter most to the business?
-        """, unsafe_allow_html=True)
-    elif interview_type == "product_manager":
+
+    # Interview guidance while the call is in progress; live_call reruns the page once it ends
+    if lifecycle.state in LIVE_STATES:
+        st.markdown('<div class="container">', unsafe_allow_html=True)
+        st.subheader("Interview in Progress")
         st.markdown("""
-        ### Product Management Interview Tips
-        
-        <div class="interview-question">Preparation:</div>
-        <div class="interview-note">Review product development processes, prioritization frameworks, and metrics analysis.</div>
+        Your interview is active. Speak into your microphone to respond to the interviewer's questions.
         
-        <div class="interview-question">Common Questions:</div>
-        - How do you prioritize features?
-        - Describe a product you launched from concept to completion
-        - How do you gather and incorporate user feedback?
-        - Tell me about a time you had to make a difficult product decision
+        Tips for a successful interview:
+        - Speak clearly and at a moderate pace
+        - Use specific examples from your experience
+        - Structure your answers using the STAR method (Situation, Task, Action, Result)
+        - Ask clarifying questions if needed
+        - Be authentic in your responses
         
-        <div class="interview-question">Questions to Ask:</div>
-        - How is product success measured?
-        - How do product, design, and engineering collaborate?
-        - What's the product development process like?
-        """, unsafe_allow_html=True)
+        Click "End Interview" when you're finished with the conversation.
+        """)
+        transcript = transcript_writer.buffer(st.session_state.interview_id)
+        if transcript is not None:
+            st.markdown("**Live Transcript**")
+            live_transcript(transcript)
+        st.markdown('</div>', unsafe_allow_html=True)
+
+interview_control()
+
+def label(value):
+    return "FAANG" if value == "faang" else value.replace("_", " ").title()
+
+# Past interviews, one page at a time; reruns on its own so paging doesn't rebuild the page
+@st.fragment
+def interview_history():
+    col1, col2 = st.columns(2)
+    with col1:
+        who = st.text_input("Candidate:", value=candidate, key="history_candidate",
+                            help="Name or email the interviews were started with; empty for everyone")
+        history_type = st.selectbox("Interview Type:", [None] + INTERVIEW_TYPES, key="history_type",
+                                    format_func=lambda x: "Any" if x is None else label(x))
+    with col2:
+        since = st.date_input("Started On or After:", value=None, key="history_since")
+        history_level = st.selectbox("Experience Level:", [None] + INTERVIEW_LEVELS, key="history_level",
+                                     format_func=lambda x: "Any" if x is None else label(x))
+
+    # New filters start again from the newest interview
+    filters = {"candidate": who.strip(), "interview_type": history_type, "interview_level": history_level}
+    since = time.mktime(since.timetuple()) if since else None
+    if st.session_state.history_filters != (filters, since):
+        st.session_state.history_filters = (filters, since)
+        st.session_state.history_cursors = [None]
+
+    cursors = st.session_state.history_cursors
+    page = history.page(cursor=cursors[-1], since=since, **filters)
+    if not page.rows:
+        st.info("No interviews recorded yet" if len(cursors) == 1 else "No more interviews")
     else:
-        st.markdown("""
-        ### Interview Tips
-        
-        <div class="interview-question">General Preparation:</div>
-        <div class="interview-note">Research the company, prepare your elevator pitch, and review your experience relevant to the role.</div>
-        
-        <div class="interview-question">Common Questions:</div>
-        - Tell me about yourself
-        - Why are you interested in this role?
-        - Describe a challenging situation and how you handled it
-        - What are your strengths and weaknesses?
-        
-        <div class="interview-question">Questions to Ask:</div>
-        - What does success look like in this role?
-        - How would you describe the company culture?
-        - What are the biggest challenges facing the team right now?
-        """, unsafe_allow_html=True)
+        st.dataframe([
+            {
+                "Started": datetime.datetime.fromtimestamp(row["started_at"]).strftime("%Y-%m-%d %H:%M"),
+                "Type": label(row["interview_type"]),
+                "Level": label(row["interview_level"]),
+                "Company": label(row["company_type"]),
+                "Length": label(row["interview_duration"]),
+                "Minutes": round(row["duration_seconds"] / 60, 1) if row["duration_seconds"] is not None else None,
+                "Outcome": label(row["outcome"]),
+                "Score": row["score"],
+                "Transcript": row["transcript_path"],
+            }
+            for row in page.rows
+        ], hide_index=True, use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.button("Newer", disabled=len(cursors) == 1, use_container_width=True, on_click=cursors.pop)
+    with col2:
+        st.button("Older", disabled=page.next_cursor is None, use_container_width=True,
+                  on_click=cursors.append, args=(page.next_cursor,))
+
+if history is not None:
+    with st.expander("Interview History"):
+        interview_history()
+
+# Interview preparation tips
+st.markdown('<div class="container">', unsafe_allow_html=True)
+st.subheader("Interview Preparation Tips")
+
+# Show different tips based on the selected role
+if interview_type == "software_engineer":
+    st.markdown("""
+    ### Software Engineering Interview Tips
     
-    st.markdown('</div>', unsafe_allow_html=True)
+    <div class="interview-question">Technical Preparation:</div>
+    <div class="interview-note">Review data structures, algorithms, system design, and coding fundamentals relevant to your level.</div>
+    
+    <div class="interview-question">Common Questions:</div>
+    - Explain a challenging technical problem you've solved
+    - How do you approach debugging a complex issue?
+    - Describe your experience with [relevant technologies]
+    - How do you stay updated with the latest developments in software engineering?
+    
+    <div class="interview-question">Questions to Ask:</div>
+    - What does the development process look like?
+    - How is code reviewed in the team?
+    - What are the biggest technical challenges the team is facing?
+    """, unsafe_allow_html=True)
+elif interview_type == "data_scientist":
+    st.markdown("""
+    ### Data Science Interview Tips
+    
+    <div class="interview-question">Technical Preparation:</div>
+    <div class="interview-note">Review statistics, machine learning algorithms, feature engineering, and data manipulation techniques.</div>
+    
+    <div class="interview-question">Common Questions:</div>
+    - Describe a data science project you've worked on from start to finish
+    - How do you validate your models?
+    - How do you handle missing or imbalanced data?
+    - Explain a complex concept to a non-technical stakeholder
+    
+    <div class="interview-question">Questions to Ask:</div>
+    - What data infrastructure is in place?
+    - How is data science integrated with the product development process?
+    - What metrics matter most to the business?
+    """, unsafe_allow_html=True)
+elif interview_type == "product_manager":
+    st.markdown("""
+    ### Product Management Interview Tips
+    
+    <div class="interview-question">Preparation:</div>
+    <div class="interview-note">Review product development processes, prioritization frameworks, and metrics analysis.</div>
+    
+    <div class="interview-question">Common Questions:</div>
+    - How do you prioritize features?
+    - Describe a product you launched from concept to completion
+    - How do you gather and incorporate user feedback?
+    - Tell me about a time you had to make a difficult product decision
+    
+    <div class="interview-question">Questions to Ask:</div>
+    - How is product success measured?
+    - How do product, design, and engineering collaborate?
+    - What's the product development process like?
+    """, unsafe_allow_html=True)
+else:
+    st.markdown("""
+    ### Interview Tips
+    
+    <div class="interview-question">General Preparation:</div>
+    <div class="interview-note">Research the company, prepare your elevator pitch, and review your experience relevant to the role.</div>
+    
+    <div class="interview-question">Common Questions:</div>
+    - Tell me about yourself
+    - Why are you interested in this role?
+    - Describe a challenging situation and how you handled it
+    - What are your strengths and weaknesses?
+    
+    <div class="interview-question">Questions to Ask:</div>
+    - What does success look like in this role?
+    - How would you describe the company culture?
+    - What are the biggest challenges facing the team right now?
+    """, unsafe_allow_html=True)
+
+st.markdown('</div>', unsafe_allow_html=True)
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,261 @@
+"""Call latency histograms with an OpenMetrics export.
+
+Each phase of starting and stopping a call is timed and counted into a
+fixed-bucket histogram (log-spaced, about 12% wide), which costs one bisect and
+one increment per observation. Percentiles are estimated from the buckets.
+
+Phases: ``client`` (getting the pooled client), ``prompt`` (assembling the
+assistant config), ``queue_wait`` (waiting for a call slot), ``start`` (the
+``start()`` handshake: web call creation plus joining the room),
+``first_message`` (from ``start()`` to the assistant's first message) and
+``stop``.
+
+Counters (``count``) track events worth alerting on, such as history rows
+or transcript lines that could not be stored.
+
+The registry is rendered in the OpenMetrics text format and can be written to
+a file periodically (e.g. for node_exporter's textfile collector) or served
+over HTTP at ``/metrics``.
+"""
+
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRIC_NAME = "vapi_call_phase_seconds"
+QUANTILES = (0.5, 0.95, 0.99)
+EXPORT_INTERVAL = 15
+# 1 ms to ~5 minutes, each bucket 1.25x the previous
+BUCKETS = tuple(round(0.001 * 1.25 ** i, 6) for i in range(57))
+COUNTER_PREFIX = "vapi_"
+COUNTER_HELP = {
+    "history_rejected_rows": "Interview history rows SQLite refused to store.",
+    "transcript_dropped_lines": "Transcript lines overwritten in memory before they reached the disk.",
+}
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def quantile(self, q):
+        """Estimate of the ``q`` quantile, interpolated within its bucket."""
+        with self._lock:
+            counts, count = list(self.counts), self.count
+        if count == 0:
+            return None
+        rank = q * count
+        seen = 0
+        for index, bucket_count in enumerate(counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[index - 1] if index > 0 else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else self.buckets[-1]
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.buckets[-1]
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.count, self.sum
+
+
+class MetricsRegistry:
+    """Histograms keyed by phase and labels, shared by the whole process."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+        self._exporter = None
+        self._server = None
+
+    def histogram(self, phase, **labels):
+        key = (phase, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def observe(self, phase, seconds, **labels):
+        self.histogram(phase, **labels).observe(seconds)
+
+    def count(self, name, n=1, **labels):
+        """Add ``n`` to the counter ``name``."""
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + n
+
+    def counter(self, name, **labels):
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    @contextmanager
+    def time(self, phase, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(phase, time.perf_counter() - started, **labels)
+
+    def summary(self):
+        """{phase: {labels..., count, p50, p95, p99}} for quick inspection."""
+        with self._lock:
+            items = list(self._histograms.items())
+        rows = []
+        for (phase, labels), histogram in sorted(items):
+            row = dict(labels, phase=phase, count=histogram.count)
+            for q in QUANTILES:
+                value = histogram.quantile(q)
+                row[f"p{int(q * 100)}"] = None if value is None else round(value, 4)
+            rows.append(row)
+        return rows
+
+    def render(self):
+        """All histograms in the OpenMetrics text format."""
+        with self._lock:
+            items = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+        lines = [
+            f"# TYPE {METRIC_NAME} histogram",
+            f"# UNIT {METRIC_NAME} seconds",
+            f"# HELP {METRIC_NAME} Duration of each phase of starting and stopping a call, and audio timing of browser calls.",
+        ]
+        quantile_lines = []
+        for (phase, labels), histogram in items:
+            counts, count, total = histogram.snapshot()
+            label_text = ",".join([f'phase="{phase}"'] + [f'{k}="{v}"' for k, v in labels])
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{METRIC_NAME}_bucket{{{label_text},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{METRIC_NAME}_bucket{{{label_text},le="+Inf"}} {count}')
+            lines.append(f"{METRIC_NAME}_count{{{label_text}}} {count}")
+            lines.append(f"{METRIC_NAME}_sum{{{label_text}}} {total:.6f}")
+            for q in QUANTILES:
+                value = histogram.quantile(q)
+                if value is not None:
+                    quantile_lines.append(f'{METRIC_NAME}_quantile{{{label_text},quantile="{q:g}"}} {value:.6f}')
+        # Bucket-estimated percentiles, so dashboards don't have to compute them
+        lines += [
+            f"# TYPE {METRIC_NAME}_quantile gauge",
+            f"# HELP {METRIC_NAME}_quantile Estimated percentiles of {METRIC_NAME}, in seconds.",
+        ] + quantile_lines
+        for name in sorted({name for (name, _), _ in counters}):
+            lines.append(f"# TYPE {COUNTER_PREFIX}{name} counter")
+            if name in COUNTER_HELP:
+                lines.append(f"# HELP {COUNTER_PREFIX}{name} {COUNTER_HELP[name]}")
+            for (counter_name, labels), value in counters:
+                if counter_name == name:
+                    label_text = ",".join(f'{k}="{v}"' for k, v in labels)
+                    lines.append(f"{COUNTER_PREFIX}{name}_total{{{label_text}}} {value}" if label_text
+                                 else f"{COUNTER_PREFIX}{name}_total {value}")
+        lines.append("# EOF")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path):
+        # Atomic so a scraper never reads a half-written file
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, path)
+
+    def start_exporter(self, path, interval=EXPORT_INTERVAL):
+        """Rewrite ``path`` every ``interval`` seconds on a daemon thread."""
+        if self._exporter is not None:
+            return self._exporter
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.write(path)
+                except OSError:
+                    pass
+
+        self._exporter = threading.Thread(target=run, name="metrics-exporter", daemon=True)
+        self._exporter.start()
+        return self._exporter
+
+    def serve(self, port, host="0.0.0.0"):
+        """Serve ``/metrics`` on a daemon thread. Returns the bound port."""
+        if self._server is not None:
+            return self._server.server_address[1]
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, format, *args):
+                pass
+
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_response(404)
+                    self.end_headers()
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/openmetrics-text; version=1.0.0; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True).start()
+        return self._server.server_address[1]
+
+
+def _from_assistant(message):
+    if isinstance(message, (bytes, str)):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return False
+    return isinstance(message, dict) and message.get("role") == "assistant"
+
+
+class CallTimer:
+    """Times the phases of one call into a registry under fixed labels."""
+
+    def __init__(self, registry, **labels):
+        self.registry = registry
+        self.labels = labels
+        self.started = None
+        self._heard = False
+
+    def time(self, phase):
+        return self.registry.time(phase, **self.labels)
+
+    def observe(self, phase, seconds):
+        self.registry.observe(phase, seconds, **self.labels)
+
+    def start(self):
+        """Mark the beginning of the start handshake."""
+        self.started = time.perf_counter()
+        self._heard = False
+
+    def message(self, message):
+        """Record ``first_message`` on the first message from the assistant."""
+        if self._heard or self.started is None or not _from_assistant(message):
+            return
+        self._heard = True
+        self.observe("first_message", time.perf_counter() - self.started)
+
+
+registry = MetricsRegistry()
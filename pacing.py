@@ -0,0 +1,250 @@
+"""Server-side pacing of interviews against the duration the candidate chose.
+
+The chosen duration only reaches the interviewer as prose in its prompt
+(``prompts.duration_contexts``), and nothing held a call to it. An
+``InterviewPacer`` does. Once a call is active it tells the interviewer how
+much time is left half way through and ``NOTICE_SECONDS`` before the end,
+with how many of the planned questions it has asked. It asks the interviewer
+to wrap up ``WRAP_UP_SECONDS`` before the end, and stops the call at the
+limit, so a runaway call gives up its slot.
+
+Notices are system messages added to the call's conversation without
+prompting a reply, so the interviewer takes them into account on its next
+turn. Every call on the node is timed by one ``TimerWheel`` thread.
+"""
+
+import math
+import threading
+import time
+
+from call_executor import ACTIVE, CONNECTING, FAILED, IDLE, QUEUED
+from transcripts import parse_message
+
+TICK = 1.0
+WHEEL_SLOTS = 512
+HALF_WAY = 0.5
+NOTICE_SECONDS = 300
+WRAP_UP_SECONDS = 120
+
+
+def control_message(text):
+    """A system message for the interviewer that doesn't make it speak up."""
+    return {"type": "add-message", "message": {"role": "system", "content": text}, "triggerResponseEnabled": False}
+
+
+class _Timer:
+    __slots__ = ("due", "callback", "cancelled")
+
+    def __init__(self, due, callback):
+        self.due = due
+        self.callback = callback
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class TimerWheel:
+    """Hashed timing wheel: one thread fires every timer on the node, to within one ``tick``.
+
+    ``schedule`` and ``cancel`` are O(1), and each tick only looks at the
+    timers in one slot, so a node's thousands of waiting timers cost nothing
+    between their ticks. Callbacks run on the wheel's thread and must not block.
+    """
+
+    def __init__(self, tick=TICK, slots=WHEEL_SLOTS):
+        self.tick = tick
+        self._slots = [[] for _ in range(slots)]
+        self._origin = time.monotonic()
+        self._current = 0   # next tick to fire
+        self._count = 0
+        self._wake = threading.Condition()
+        self._thread = None
+
+    def _now_tick(self):
+        return int((time.monotonic() - self._origin) / self.tick)
+
+    def __len__(self):
+        return self._count
+
+    def schedule(self, delay, callback):
+        """Call ``callback()`` in ``delay`` seconds (rounded up to a tick). Returns a timer with ``cancel()``."""
+        with self._wake:
+            if not self._count:
+                # Idle until now: skip the empty ticks rather than walk them
+                self._current = max(self._current, self._now_tick())
+            due = max(math.ceil((time.monotonic() - self._origin + delay) / self.tick), self._current)
+            timer = _Timer(due, callback)
+            self._slots[due % len(self._slots)].append(timer)
+            self._count += 1
+            self._wake.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="timer-wheel", daemon=True)
+                self._thread.start()
+        return timer
+
+    def _run(self):
+        while True:
+            with self._wake:
+                while True:
+                    wait = self._origin + self._current * self.tick - time.monotonic() if self._count else None
+                    if wait is not None and wait <= 0:
+                        break
+                    self._wake.wait(wait)
+                slot = self._slots[self._current % len(self._slots)]
+                # Timers further out stay for a later turn of the wheel
+                fired = [timer for timer in slot if timer.due <= self._current]
+                if fired:
+                    slot[:] = [timer for timer in slot if timer.due > self._current]
+                    self._count -= len(fired)
+                self._current += 1
+            for timer in fired:
+                if timer.cancelled:
+                    continue
+                try:
+                    timer.callback()
+                except Exception:
+                    # One call's failure must not stop every other call's timers
+                    pass
+
+
+class _Pace:
+    """One interview's clock and question count, as a lifecycle listener.
+
+    Listeners can hear about a lifecycle's previous call late, so a pace only
+    acts on transitions after its own call was queued or began connecting.
+    """
+
+    def __init__(self, pacer, lifecycle, duration, planned_questions):
+        self.pacer = pacer
+        self.lifecycle = lifecycle
+        self.duration = duration
+        self.planned_questions = planned_questions
+        self.asked = 0
+        self.hard_stopped = False
+        self._call = None
+        self._submitted = False
+        self._finished = False
+        self._timers = []
+        self._lock = threading.Lock()
+
+    def listen(self, handler=None):
+        """Message handler that counts the interviewer's questions, then passes messages on to ``handler``."""
+
+        def on_message(message):
+            fragment = parse_message(message)
+            if fragment is not None and fragment["final"] and fragment["role"] == "assistant" \
+                    and "?" in fragment["text"]:
+                self.asked += 1
+            if handler is not None:
+                handler(message)
+
+        return on_message
+
+    def __call__(self, state):
+        if state in (QUEUED, CONNECTING):
+            self._submitted = True
+        elif not self._submitted:
+            return
+        elif state == ACTIVE:
+            self._start()
+        elif state in (IDLE, FAILED):
+            with self._lock:
+                self._finished = True
+                self._cancel_locked()
+            self.lifecycle.remove_listener(self)
+
+    def _start(self):
+        pacer, duration = self.pacer, self.duration
+        milestones = [
+            (duration * HALF_WAY, self._time_left),
+            (duration - pacer.notice_seconds, self._time_left),
+            (duration - pacer.wrap_up_seconds, self._wrap_up),
+        ]
+        # Only milestones that fit, in order, without repeats (short interviews skip the early ones)
+        plan, last = [], 0.0
+        for at, action in sorted(milestones, key=lambda milestone: milestone[0]):
+            if at > last:
+                plan.append((at, action))
+                last = at
+        plan.append((duration, self._stop))
+        with self._lock:
+            # Listeners can run late: the call may already be over
+            if self._finished:
+                return
+            self._cancel_locked()
+            self._call = self.lifecycle.call
+            # Timed from the start of the call, not from when this listener got to run
+            elapsed = self._elapsed() / pacer.speedup
+            self._timers = [pacer.wheel.schedule(max(at / pacer.speedup - elapsed, 0), action) for at, action in plan]
+
+    def _cancel_locked(self):
+        for timer in self._timers:
+            timer.cancel()
+        self._timers = []
+
+    def _current(self):
+        # Only ever act on the call this pace started with
+        return self.lifecycle.active and self.lifecycle.call is self._call
+
+    def _send(self, text):
+        if self._current() and self._call.send(control_message(text)):
+            self.pacer._count("notices")
+
+    def _remaining(self):
+        return max(round((self.duration - self._elapsed()) / 60), 1)
+
+    def _elapsed(self):
+        started_at = self.lifecycle.started_at
+        return (time.time() - started_at) * self.pacer.speedup if started_at else 0.0
+
+    def _progress(self):
+        if not self.planned_questions:
+            return ""
+        left = max(self.planned_questions - self.asked, 0)
+        return (f" You have asked about {min(self.asked, self.planned_questions)} of the "
+                f"{self.planned_questions} planned questions; prioritise the {left} most important left."
+                if left else " You have covered the planned questions.")
+
+    def _time_left(self):
+        minutes = self._remaining()
+        self._send(f"Interview timing: about {minutes} minute{'s' if minutes != 1 else ''} remain of this "
+                   f"{round(self.duration / 60)}-minute interview.{self._progress()}")
+
+    def _wrap_up(self):
+        minutes = self._remaining()
+        self._send(f"Interview timing: about {minutes} minute{'s' if minutes != 1 else ''} remain. Finish the "
+                   "current question, then wrap up: thank the candidate, give them a moment to ask "
+                   "questions and close the interview. The call ends automatically at the time limit.")
+
+    def _stop(self):
+        # Non-blocking: the lifecycle stops the call on its executor
+        if self._current() and self.lifecycle.stop():
+            self.hard_stopped = True
+            self.pacer._count("hard_stops")
+
+
+class InterviewPacer:
+    """Holds every interview on this node to its chosen duration, on one ``TimerWheel``.
+
+    ``speedup`` compresses the schedule for simulated calls (see
+    ``voice_backends.SimulatedVoice``); messages still speak in real minutes.
+    """
+
+    def __init__(self, wheel=None, notice_seconds=NOTICE_SECONDS, wrap_up_seconds=WRAP_UP_SECONDS, speedup=1.0):
+        self.wheel = wheel if wheel is not None else TimerWheel()
+        self.notice_seconds = notice_seconds
+        self.wrap_up_seconds = wrap_up_seconds
+        self.speedup = speedup
+        self.counts = {"notices": 0, "hard_stops": 0}
+        self._lock = threading.Lock()
+
+    def attach(self, lifecycle, duration_seconds, planned_questions=0):
+        """Pace the next call on ``lifecycle`` once it is active. Returns the pace; see ``_Pace.listen``."""
+        pace = _Pace(self, lifecycle, duration_seconds, planned_questions)
+        lifecycle.add_listener(pace)
+        return pace
+
+    def _count(self, name):
+        with self._lock:
+            self.counts[name] += 1
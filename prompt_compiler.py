@@ -0,0 +1,254 @@
+"""Prompt compaction, offline token counts and job-description compression.
+
+Every token of the assistant context is re-read by the model on every turn of
+the call, so the compiled prompt is kept small:
+
+- ``compact`` strips the template's indentation, collapses whitespace and drops
+  sentences already stated earlier in the prompt
+- ``count_tokens`` estimates the model's token count without a tokenizer
+  download or network access
+- ``compress_job_description`` keeps the parts of a pasted job description that
+  matter to an interview (responsibilities, requirements, skills), drops
+  boilerplate (benefits, equal-opportunity and application text) and fits the
+  rest into a token budget. Results are cached by content hash.
+"""
+
+import functools
+import hashlib
+import re
+import threading
+from collections import OrderedDict, namedtuple
+
+# Tokens a pasted job description may take up in the prompt
+DEFAULT_JOB_DESCRIPTION_BUDGET = 400
+JOB_DESCRIPTION_CACHE_SIZE = 256
+
+CompressedText = namedtuple("CompressedText", ["text", "tokens", "original_tokens"])
+
+# Roughly the pre-tokenizer split of GPT-style BPE vocabularies
+_PIECE = re.compile(r"'(?:s|t|re|ve|m|ll|d)\b| ?[A-Za-z]+| ?\d{1,3}| ?[^\sA-Za-z\d]+|\s+")
+_LONG_WORD = re.compile(r"[A-Za-z]{12,}")
+_SYMBOL_RUN = re.compile(r"[^\sA-Za-z\d]{3,}")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'(])")
+_PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+_NORMALISE = re.compile(r"[^a-z0-9]+")
+_BULLET = re.compile(r"^\s*(?:[-*•●▪‣⁃·>]+|\d+[.)])\s+")
+_TAG = re.compile(r"<[^>]+>")
+
+# Lines without a closing colon are only taken as headings if they are this short
+HEADING_MAX_WORDS = 4
+# Headings of job-description sections, weighted by how much an interviewer needs them
+SECTION_WEIGHTS = [
+    (re.compile(r"responsibilit|what you.?ll do|the role|duties|day.to.day|you will"), 3.0),
+    (re.compile(r"requirement|qualification|what you.?ll (?:need|bring)|must.have|skills|experience|you have"), 3.0),
+    (re.compile(r"nice.to.have|preferred|bonus|plus"), 1.5),
+    (re.compile(r"about (?:us|the (?:company|team))|who we are|our (?:mission|story)"), 0.5),
+    (re.compile(r"benefit|perks|what we offer|compensation|salary|why (?:join|work)"), 0.0),
+]
+# Sentences that carry no interview signal wherever they appear
+BOILERPLATE = re.compile(
+    r"equal (?:employment )?opportunity|without regard to|race, colou?r|e-verify|reasonable accommodation|"
+    r"apply (?:now|today)|click apply|submit (?:your|a) (?:resume|cv|application)|privacy (?:notice|policy)|"
+    r"recruitment agenc|401\(?k\)?|paid time off|\bpto\b|health,? dental|medical,? dental|"
+    r"competitive (?:salary|compensation|pay)|stock options|parental leave",
+    re.IGNORECASE,
+)
+# Words that mark a sentence as describing the work or the candidate
+SIGNAL = re.compile(
+    r"\b(?:experience|years?|proficien\w*|knowledge|familiar\w*|expert\w*|skills?|responsib\w*|own\w*|"
+    r"lead\w*|design\w*|build\w*|develop\w*|manag\w*|mentor\w*|collaborat\w*|stakeholder\w*|strateg\w*|"
+    r"degree|certif\w*|required|must|strong|deep|hands-on|track record)\b|\d+\+",
+    re.IGNORECASE,
+)
+
+
+@functools.lru_cache(maxsize=4096)
+def _line_tokens(line):
+    count = len(_PIECE.findall(line))
+    count += sum(len(word) // 12 for word in _LONG_WORD.findall(line))
+    count += sum((len(run) - 1) // 2 for run in _SYMBOL_RUN.findall(line))
+    return count
+
+
+def count_tokens(text):
+    """Estimate of the number of model tokens in ``text``.
+
+    Splits the way BPE pre-tokenizers do; each piece is one token, except long
+    words and symbol runs, which are counted by length. Line counts are cached,
+    as compiled prompts share most of their lines.
+    """
+    lines = text.split("\n")
+    return sum(_line_tokens(line) for line in lines) + text.count("\n") - text.count("\n\n")
+
+
+def _normalise(sentence):
+    return _NORMALISE.sub(" ", sentence.lower()).strip()
+
+
+@functools.lru_cache(maxsize=4096)
+def _split_line(line):
+    """(list marker, ((sentence, normalised sentence), ...)) of one line.
+
+    Cached because the template lines recur in every compiled combination.
+    """
+    line = " ".join(line.split())
+    bullet = _BULLET.match(line)
+    marker, body = (bullet.group(0), line[bullet.end():]) if bullet else ("", line)
+    return marker, tuple((sentence, _normalise(sentence)) for sentence in _SENTENCE_END.split(body))
+
+
+def compact(text):
+    """``text`` with indentation and runs of whitespace collapsed and repeated sentences removed.
+
+    Paragraphs stay separated by one blank line and list items stay on their
+    own lines. A sentence is dropped if the same sentence (ignoring case and
+    punctuation) appeared earlier in the text.
+    """
+    seen = set()
+    paragraphs = []
+    for block in _PARAGRAPH_BREAK.split(text):
+        lines = []
+        for line in block.splitlines():
+            marker, sentences = _split_line(line)
+            kept = []
+            for sentence, key in sentences:
+                if key and key not in seen:
+                    seen.add(key)
+                    kept.append(sentence)
+            if kept:
+                lines.append(marker + " ".join(kept))
+        if lines:
+            paragraphs.append("\n".join(lines))
+    return "\n\n".join(paragraphs)
+
+
+def _heading_weight(line):
+    """Section weight if ``line`` looks like a heading, else None.
+
+    A heading is a short line ending in a colon, or a line of a few words
+    that names a known section ("Benefits", "What you'll do"). Longer lines
+    are content even if they mention a section ("Must have 5+ years...").
+    """
+    colon = line.rstrip().endswith(":")
+    text = _BULLET.sub("", line).strip().rstrip(":").strip("*#_ ")
+    if not text or len(text) > 60:
+        return None
+    if not colon and (text[-1:] in ".!?" or len(text.split()) > HEADING_MAX_WORDS):
+        return None
+    lowered = text.lower()
+    for pattern, weight in SECTION_WEIGHTS:
+        if pattern.search(lowered):
+            return weight
+    # A short line ending in a colon is a heading we don't recognise
+    return 1.0 if colon else None
+
+
+def _truncate(text, budget):
+    """The start of ``text``, cut at a word boundary to fit ``budget`` tokens (but at least one word)."""
+    words = text.split()
+    while len(words) > 1 and count_tokens(" ".join(words)) > budget:
+        words = words[:-max(1, len(words) // 8)]
+    return " ".join(words)
+
+
+def _units(text):
+    """(heading, sentence, section weight, line number) for every sentence of a job description."""
+    heading, weight = None, 1.0
+    for number, line in enumerate(_TAG.sub(" ", text).splitlines()):
+        line = " ".join(line.split())
+        if not line:
+            continue
+        section = _heading_weight(line)
+        if section is not None:
+            heading, weight = line.strip("*#_ "), section
+            continue
+        bullet = _BULLET.match(line)
+        body = line[bullet.end():] if bullet else line
+        for sentence in _SENTENCE_END.split(body):
+            yield heading, ("- " if bullet else "") + sentence, weight, number
+
+
+def _score(sentence, weight, position):
+    signals = len(SIGNAL.findall(sentence))
+    # Earlier sentences of a posting tend to be the important ones
+    return weight * (1 + signals) - position * 1e-3
+
+
+def _compress(text, budget):
+    original_tokens = count_tokens(text)
+    if original_tokens <= budget:
+        # Already fits: the candidate's own wording is worth more than any trimming
+        return CompressedText(text, original_tokens, original_tokens)
+    seen = set()
+    candidates = []
+    for heading, sentence, weight, line in _units(text):
+        key = _normalise(sentence)
+        if not key or key in seen or weight == 0.0 or BOILERPLATE.search(sentence):
+            continue
+        seen.add(key)
+        candidates.append((heading, sentence, weight, line))
+
+    # Best sentences first, then put the chosen ones back in posting order
+    ranked = sorted(range(len(candidates)), key=lambda i: -_score(candidates[i][1], candidates[i][2], i))
+    chosen, used, headings = set(), 0, set()
+    for i in ranked:
+        heading, sentence, _, _ = candidates[i]
+        cost = count_tokens(sentence) + 1
+        if heading is not None and heading not in headings:
+            cost += count_tokens(heading) + 1
+        if used + cost > budget:
+            continue
+        chosen.add(i)
+        used += cost
+        if heading is not None:
+            headings.add(heading)
+
+    lines, current, previous_line = [], None, None
+    for i in sorted(chosen):
+        heading, sentence, _, line = candidates[i]
+        if heading is not None and heading != current:
+            lines.append(heading if heading.endswith(":") else heading + ":")
+            current = heading
+        if line == previous_line:
+            # Sentences of the same paragraph stay on one line
+            lines[-1] += " " + sentence
+        else:
+            lines.append(sentence)
+        previous_line = line
+    if not lines:
+        # Nothing fits whole (or everything looked like boilerplate): keep the start of the
+        # best sentence, or of the text itself, so a job description is never lost
+        lines = [_truncate(candidates[ranked[0]][1] if candidates else text, budget)]
+    compressed = "\n".join(lines)
+    return CompressedText(compressed, count_tokens(compressed), original_tokens)
+
+
+class JobDescriptionCompressor:
+    """``compress_job_description`` with results kept in a bounded LRU keyed by content hash."""
+
+    def __init__(self, max_entries=JOB_DESCRIPTION_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __call__(self, text, budget=DEFAULT_JOB_DESCRIPTION_BUDGET):
+        text = text.strip()
+        if not text:
+            return CompressedText("", 0, 0)
+        key = (hashlib.sha256(text.encode("utf-8")).hexdigest(), budget)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+
+        entry = _compress(text, budget)
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+
+# Shared by every session in the process
+compress_job_description = JobDescriptionCompressor()
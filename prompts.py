@@ -0,0 +1,231 @@
+"""Interview templates and a process-wide registry of ready-to-send assistant payloads.
+
+Streamlit re-executes ``main.py`` on every interaction, but imported modules are
+only executed once per process, so the template dicts and every precompiled
+role/level/company/duration payload live here instead of in the script.
+"""
+
+import hashlib
+import itertools
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from prompt_compiler import DEFAULT_JOB_DESCRIPTION_BUDGET, compact, compress_job_description, count_tokens
+
+INTERVIEW_TYPES = [
+    "software_engineer",
+    "data_scientist",
+    "product_manager",
+    "marketing",
+    "sales",
+    "customer_service"
+]
+
+INTERVIEW_LEVELS = [
+    "entry_level",
+    "mid_level",
+    "senior_level",
+    "leadership"
+]
+
+INTERVIEW_DURATIONS = [
+    "15_minutes",
+    "30_minutes",
+    "45_minutes",
+    "60_minutes"
+]
+
+COMPANY_TYPES = [
+    "startup",
+    "mid_size",
+    "enterprise",
+    "faang"
+]
+
+# Interview templates based on role
+interview_templates = {
+    "software_engineer": {
+        "entry_level": "You are conducting an entry-level software engineering interview. Focus on basic programming concepts, data structures, algorithms, and problem-solving skills. Ask questions about the candidate's educational background and any projects they've worked on.",
+        "mid_level": "You are conducting a mid-level software engineering interview. Focus on more advanced programming concepts, system design fundamentals, and practical experience. Ask about previous work experience, technical challenges they've overcome, and how they approach problem-solving.",
+        "senior_level": "You are conducting a senior-level software engineering interview. Focus on advanced system design, architecture decisions, technical leadership, and mentoring abilities. Ask about complex projects they've led, technical decisions they've made, and how they handle team dynamics.",
+        "leadership": "You are conducting an engineering leadership interview. Focus on technical vision, team management, project planning, and cross-functional collaboration. Ask about their leadership style, how they've grown engineering teams, and how they balance technical and management responsibilities."
+    },
+    "data_scientist": {
+        "entry_level": "You are conducting an entry-level data science interview. Focus on statistics fundamentals, basic machine learning concepts, and data manipulation skills. Ask about their educational background, projects, and familiarity with tools like Python, R, SQL, and basic ML libraries.",
+        "mid_level": "You are conducting a mid-level data science interview. Focus on applied machine learning, feature engineering, model evaluation, and business impact. Ask about previous projects, how they've translated business problems into data problems, and their experience with production ML systems.",
+        "senior_level": "You are conducting a senior-level data science interview. Focus on advanced modeling techniques, research experience, and technical leadership in data science teams. Ask about novel approaches they've developed, how they've mentored junior data scientists, and their vision for data science in organizations.",
+        "leadership": "You are conducting a data science leadership interview. Focus on data strategy, team building, cross-functional collaboration, and business impact at scale. Ask about how they've built data science teams, implemented data governance, and aligned data science initiatives with business goals."
+    },
+    "product_manager": {
+        "entry_level": "You are conducting an entry-level product management interview. Focus on product thinking, user empathy, and basic product development processes. Ask about their understanding of product management, any relevant projects, and how they approach user problems.",
+        "mid_level": "You are conducting a mid-level product management interview. Focus on product strategy, prioritization frameworks, cross-functional collaboration, and metrics. Ask about products they've managed, how they've made prioritization decisions, and how they measure success.",
+        "senior_level": "You are conducting a senior-level product management interview. Focus on product vision, strategy development, team leadership, and business impact. Ask about complex product challenges they've solved, how they've influenced organizational strategy, and their approach to product innovation.",
+        "leadership": "You are conducting a product leadership interview. Focus on product organization structure, developing product culture, executive communication, and strategic thinking. Ask about how they've built product teams, aligned product roadmaps with company strategy, and navigated complex stakeholder environments."
+    },
+    "marketing": {
+        "entry_level": "You are conducting an entry-level marketing interview. Focus on marketing fundamentals, digital marketing channels, content creation, and analytical skills. Ask about their understanding of marketing principles, any campaigns they've worked on, and their familiarity with marketing tools.",
+        "mid_level": "You are conducting a mid-level marketing interview. Focus on campaign management, channel strategy, audience targeting, and performance analysis. Ask about marketing campaigns they've led, how they've optimized channel performance, and their approach to marketing analytics.",
+        "senior_level": "You are conducting a senior-level marketing interview. Focus on marketing strategy, brand development, team leadership, and cross-channel integration. Ask about comprehensive marketing strategies they've developed, how they've built brand equity, and their approach to marketing innovation.",
+        "leadership": "You are conducting a marketing leadership interview. Focus on marketing organization structure, brand vision, marketing technology stack, and business growth strategy. Ask about how they've built marketing teams, aligned marketing with business objectives, and navigated changing market conditions."
+    },
+    "sales": {
+        "entry_level": "You are conducting an entry-level sales interview. Focus on communication skills, basic sales techniques, customer service orientation, and learning agility. Ask about their understanding of the sales process, any sales experience they have, and how they handle objections.",
+        "mid_level": "You are conducting a mid-level sales interview. Focus on sales methodology, account management, negotiation skills, and consistent quota achievement. Ask about their sales process, how they manage customer relationships, and specific examples of deals they've closed.",
+        "senior_level": "You are conducting a senior-level sales interview. Focus on strategic account planning, complex deal navigation, team leadership, and consistent overperformance. Ask about major accounts they've managed, how they've navigated complex sales cycles, and their approach to sales leadership.",
+        "leadership": "You are conducting a sales leadership interview. Focus on sales organization structure, sales strategy development, coaching methodology, and revenue growth. Ask about how they've built and developed sales teams, their approach to territory planning, and how they've driven sustainable revenue growth."
+    },
+    "customer_service": {
+        "entry_level": "You are conducting an entry-level customer service interview. Focus on communication skills, empathy, problem-solving abilities, and patience. Ask about their understanding of customer service principles, how they handle difficult situations, and their approach to helping customers.",
+        "mid_level": "You are conducting a mid-level customer service interview. Focus on conflict resolution, customer retention strategies, process improvement, and team collaboration. Ask about challenging customer situations they've resolved, how they've improved customer service processes, and their approach to customer satisfaction.",
+        "senior_level": "You are conducting a senior-level customer service interview. Focus on customer service strategy, team leadership, quality assurance, and cross-functional collaboration. Ask about customer service teams they've led, how they've improved service metrics, and their approach to customer experience management.",
+        "leadership": "You are conducting a customer service leadership interview. Focus on customer service organization structure, service culture development, technology integration, and business impact. Ask about how they've built customer service teams, implemented service technologies, and aligned service strategy with business objectives."
+    }
+}
+
+# Company type contexts
+company_contexts = {
+    "startup": "This is for a fast-paced startup environment where versatility, ownership, and comfort with ambiguity are highly valued. The company has limited resources but offers significant growth opportunities and impact.",
+    "mid_size": "This is for a mid-sized company with established processes but still room for innovation and growth. The company values both specialized expertise and cross-functional collaboration.",
+    "enterprise": "This is for a large enterprise with complex organizational structures, established processes, and significant resources. The company values scalable solutions, attention to detail, and navigating complex stakeholder environments.",
+    "faang": "This is for a FAANG-level tech company (Facebook/Meta, Apple, Amazon, Netflix, Google) or similar tier-1 tech company. The company has extremely high standards, rigorous interview processes, and expects exceptional technical depth and problem-solving abilities."
+}
+
+# Duration adjustments
+duration_contexts = {
+    "15_minutes": "This is a brief screening interview to assess basic qualifications and fit. Focus on high-level questions and keep the conversation moving quickly.",
+    "30_minutes": "This is a standard interview round focused on specific areas of expertise. Balance depth and breadth in your questioning.",
+    "45_minutes": "This is an extended interview allowing for deeper exploration of the candidate's experience and skills. Include both technical and behavioral questions.",
+    "60_minutes": "This is a comprehensive interview covering multiple aspects of the candidate's qualifications. Include technical assessment, behavioral questions, and allow time for the candidate to ask questions."
+}
+
+# Number of job-description variants kept compiled at once
+DEFAULT_VARIANT_CACHE_SIZE = 512
+
+# ``prompt_tokens`` is the estimated size of the context; ``job_description`` is the
+# ``prompt_compiler.CompressedText`` that went into it, or None
+CompiledAssistant = namedtuple("CompiledAssistant",
+                               ["config_hash", "content_hash", "assistant", "prompt_tokens", "job_description"])
+
+
+def build_context(interview_type, interview_level, company_type, interview_duration, job_description=""):
+    role_context = interview_templates[interview_type][interview_level]
+    company_context = company_contexts[company_type]
+    duration_context = duration_contexts[interview_duration]
+    additional_context = f"Additional context about the position:\n{job_description}" if job_description else ""
+
+    # Compacted: the template's indentation and any repeated sentence would
+    # otherwise be paid for on every turn of the call
+    return compact(f"""
+    You are an AI interviewer conducting a professional job interview.
+
+    {role_context}
+
+    {company_context}
+
+    {duration_context}
+
+    {additional_context}
+
+    Important guidelines:
+    1. Introduce yourself as the interviewer at the beginning.
+    2. Ask one question at a time and wait for the candidate's response.
+    3. Listen carefully to answers and ask relevant follow-up questions.
+    4. Balance technical and behavioral questions appropriate for the role and level.
+    5. Be professional, courteous, and encouraging, but also thorough in your assessment.
+    6. When the interview time is nearly up, let the candidate know and ask if they have any questions.
+    7. Thank the candidate for their time at the end of the interview.
+
+    Start the interview with a brief introduction and your first question.
+    """)
+
+
+def build_assistant(interview_type, interview_level, company_type, interview_duration, job_description=""):
+    return {
+        "firstMessage": f"Hello, I'll be conducting your interview today for the {interview_type.replace('_', ' ')} position. Let's get started with the first question.",
+        "context": build_context(interview_type, interview_level, company_type, interview_duration, job_description),
+        "model": "gpt-4o",
+        "voice": "jennifer-playht",
+        "recordingEnabled": True,
+        "interruptionsEnabled": False
+    }
+
+
+def content_hash(assistant):
+    """Hash of the exact payload sent to Vapi, used to key server-side assistants."""
+    body = json.dumps(assistant, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(body.encode("utf-8")).hexdigest()
+
+
+def config_hash(interview_type, interview_level, company_type, interview_duration, job_description=""):
+    """Stable hash of an interview configuration, identical across processes."""
+    key = json.dumps([interview_type, interview_level, company_type, interview_duration, job_description or ""])
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def _compile(*key, job_description=None):
+    assistant = build_assistant(*key)
+    return CompiledAssistant(config_hash(*key), content_hash(assistant), assistant,
+                             count_tokens(assistant["context"]), job_description)
+
+
+# Changes whenever a template is edited; caches of server-side assistants
+# built from older templates are dropped when this no longer matches.
+TEMPLATES_VERSION = hashlib.sha256(
+    json.dumps([interview_templates, company_contexts, duration_contexts], sort_keys=True).encode("utf-8")
+).hexdigest()[:16]
+
+
+class PromptRegistry:
+    """Precompiled assistant payloads for every template combination.
+
+    The 6x4x4x4 base combinations are built once at construction. Payloads with
+    a job description are compiled on first use and kept in a bounded LRU; the
+    job description is first compressed to ``job_description_budget`` tokens.
+    Returned assistant dicts are shared between sessions and must not be mutated.
+    """
+
+    def __init__(self, max_variants=DEFAULT_VARIANT_CACHE_SIZE,
+                 job_description_budget=DEFAULT_JOB_DESCRIPTION_BUDGET):
+        self.max_variants = max_variants
+        self.job_description_budget = job_description_budget
+        self._base = {}
+        self._variants = OrderedDict()
+        self._lock = threading.Lock()
+
+        for combo in itertools.product(INTERVIEW_TYPES, INTERVIEW_LEVELS, COMPANY_TYPES, INTERVIEW_DURATIONS):
+            self._base[combo] = _compile(*combo)
+
+    def __len__(self):
+        return len(self._base) + len(self._variants)
+
+    def get(self, interview_type, interview_level, company_type, interview_duration, job_description="",
+            job_description_budget=None):
+        combo = (interview_type, interview_level, company_type, interview_duration)
+        if not job_description:
+            return self._base[combo]
+        compressed = compress_job_description(job_description, job_description_budget or self.job_description_budget)
+        if not compressed.text:
+            return self._base[combo]
+
+        # Keyed by the compressed text, so pastes that differ only in boilerplate share an entry
+        key = combo + (compressed.text,)
+        with self._lock:
+            entry = self._variants.get(key)
+            if entry is not None:
+                self._variants.move_to_end(key)
+        if entry is not None:
+            # Report the size of this paste, not the one that compiled the entry
+            return entry if entry.job_description == compressed else entry._replace(job_description=compressed)
+
+        entry = _compile(*key, job_description=compressed)
+        with self._lock:
+            self._variants[key] = entry
+            self._variants.move_to_end(key)
+            while len(self._variants) > self.max_variants:
+                self._variants.popitem(last=False)
+        return entry
+
+
+# Shared by every session in the process
+registry = PromptRegistry()
@@ -0,0 +1,350 @@
+"""Question bank: a compact on-disk index of interview questions and per-candidate sampling.
+
+Questions are written as JSON lines::
+
+    {"text": "...", "roles": ["software_engineer"], "levels": ["mid_level"],
+     "companies": [], "skills": ["system design"], "difficulty": 3}
+
+Empty or missing ``roles``, ``levels`` or ``companies`` mean "any". ``build``
+compiles the source into a ``.qbank`` file: a JSON header followed by flat
+arrays (question keys, difficulties, text offsets, posting lists) and the
+question texts. Opening one is a memory map plus a header parse, so even a
+bank of 100k+ questions loads and samples in milliseconds.
+
+Each facet value (role, level, company type, skill, difficulty) has a sorted
+posting list of question numbers. Sampling intersects the postings for the
+interview, drops questions the candidate has already been asked and draws a
+random set, preferring questions on skills named in the job description.
+
+Build and try out a bank from the command line:
+
+    python question_bank.py build data/questions.jsonl
+    python question_bank.py sample data/questions.qbank --type data_scientist --level senior_level
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import sys
+import tempfile
+import time
+from collections import defaultdict, namedtuple
+
+import numpy as np
+
+from prompts import INTERVIEW_TYPES, INTERVIEW_LEVELS, INTERVIEW_DURATIONS, COMPANY_TYPES
+from prompt_compiler import count_tokens
+
+DEFAULT_SOURCE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "questions.jsonl")
+MAGIC = b"QBANK\x01\x00\x00"
+FACETS = ("role", "level", "company", "skill", "difficulty")
+DIFFICULTIES = (1, 2, 3, 4, 5)
+
+# Questions planned for each interview length
+QUESTIONS_PER_DURATION = {"15_minutes": 4, "30_minutes": 6, "45_minutes": 8, "60_minutes": 10}
+# At most this share of an interview comes from the job description's skills
+SKILL_SHARE = 0.5
+
+HISTORY_PREFIX = "questions:"
+HISTORY_TTL = 180 * 24 * 60 * 60
+HISTORY_LIMIT = 2000
+
+Question = namedtuple("Question", ["key", "text", "difficulty"])
+
+
+def question_key(text):
+    """Stable 64-bit ID of a question, so history survives rebuilding the bank."""
+    return int.from_bytes(hashlib.sha256(" ".join(text.lower().split()).encode("utf-8")).digest()[:8], "little")
+
+
+def _values(question, field, allowed):
+    values = question.get(field) or []
+    if isinstance(values, str):
+        values = [values]
+    unknown = [v for v in values if v not in allowed]
+    if unknown:
+        raise ValueError(f"Unknown {field} {unknown} in question: {question.get('text', '')[:60]}")
+    return values or list(allowed)
+
+
+def build(questions, path):
+    """Write ``questions`` (an iterable of dicts) to a ``.qbank`` file. Returns the question count."""
+    keys, texts, difficulty = [], [], []
+    postings = {facet: defaultdict(list) for facet in FACETS}
+    seen = set()
+    for question in questions:
+        text = " ".join(question["text"].split())
+        key = question_key(text)
+        if not text or key in seen:
+            continue
+        seen.add(key)
+        number = len(keys)
+        level = int(question.get("difficulty", 3))
+        if level not in DIFFICULTIES:
+            raise ValueError(f"Difficulty must be 1-5: {text[:60]}")
+        keys.append(key)
+        texts.append(text.encode("utf-8"))
+        difficulty.append(level)
+        for value in _values(question, "roles", INTERVIEW_TYPES):
+            postings["role"][value].append(number)
+        for value in _values(question, "levels", INTERVIEW_LEVELS):
+            postings["level"][value].append(number)
+        for value in _values(question, "companies", COMPANY_TYPES):
+            postings["company"][value].append(number)
+        for skill in {s.strip().lower() for s in question.get("skills") or [] if s.strip()}:
+            postings["skill"][skill].append(number)
+        postings["difficulty"][str(level)].append(number)
+
+    # Every posting list goes into one flat array; the header holds each list's slice
+    flat, header_postings = [], {}
+    for facet in FACETS:
+        header_postings[facet] = {}
+        for value in sorted(postings[facet]):
+            numbers = postings[facet][value]
+            header_postings[facet][value] = [sum(len(p) for p in flat), len(numbers)]
+            flat.append(numbers)
+    offsets = np.zeros(len(texts) + 1, dtype=np.uint64)
+    np.cumsum([len(t) for t in texts], out=offsets[1:])
+    arrays = [
+        ("keys", np.array(keys, dtype=np.uint64)),
+        ("difficulty", np.array(difficulty, dtype=np.uint8)),
+        ("text_offsets", offsets),
+        ("postings", np.array([n for numbers in flat for n in numbers], dtype=np.uint32)),
+    ]
+
+    layout, position = {}, 0
+    for name, array in arrays:
+        position = (position + 7) // 8 * 8
+        layout[name] = [position, len(array)]
+        position += array.nbytes
+    layout["texts"] = [position, int(offsets[-1])]
+    header = json.dumps({"count": len(keys), "layout": layout, "postings": header_postings},
+                        separators=(",", ":")).encode("utf-8")
+    data_start = (len(MAGIC) + 8 + len(header) + 7) // 8 * 8
+
+    # A unique name next to the target, so processes building the same bank at once don't interleave
+    f = tempfile.NamedTemporaryFile(dir=os.path.dirname(path) or ".", prefix=".qbank.", delete=False)
+    try:
+        with f:
+            f.write(MAGIC)
+            f.write(len(header).to_bytes(8, "little"))
+            f.write(header)
+            for name, array in arrays:
+                f.write(b"\0" * (data_start + layout[name][0] - f.tell()))
+                f.write(array.tobytes())
+            f.write(b"\0" * (data_start + layout["texts"][0] - f.tell()))
+            for text in texts:
+                f.write(text)
+        os.replace(f.name, path)
+    except BaseException:
+        if os.path.exists(f.name):
+            os.remove(f.name)
+        raise
+    return len(keys)
+
+
+def read_source(path):
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class QuestionBank:
+    """A memory-mapped ``.qbank`` file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path} is not a question bank")
+        header_size = int.from_bytes(self._mmap[len(MAGIC):len(MAGIC) + 8], "little")
+        header = json.loads(self._mmap[len(MAGIC) + 8:len(MAGIC) + 8 + header_size])
+        data_start = (len(MAGIC) + 8 + header_size + 7) // 8 * 8
+
+        def array(name, dtype):
+            offset, count = header["layout"][name]
+            return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=data_start + offset)
+
+        self.count = header["count"]
+        self.keys = array("keys", np.uint64)
+        self.difficulty = array("difficulty", np.uint8)
+        self._text_offsets = array("text_offsets", np.uint64)
+        self._postings = array("postings", np.uint32)
+        self._texts_start = data_start + header["layout"]["texts"][0]
+        self._index = header["postings"]
+        self.skills = sorted(self._index["skill"])
+        self._skill_pattern = None
+
+    def __len__(self):
+        return self.count
+
+    def posting(self, facet, value):
+        """Sorted question numbers with ``value`` for ``facet`` (a view into the file)."""
+        offset, count = self._index[facet].get(str(value), (0, 0))
+        return self._postings[offset:offset + count]
+
+    def text(self, number):
+        start = self._texts_start + int(self._text_offsets[number])
+        end = self._texts_start + int(self._text_offsets[number + 1])
+        return self._mmap[start:end].decode("utf-8")
+
+    def question(self, number):
+        return Question(f"{int(self.keys[number]):016x}", self.text(number), int(self.difficulty[number]))
+
+    def skills_in(self, text):
+        """Skills of the bank that ``text`` mentions."""
+        if not text or not self.skills:
+            return []
+        if self._skill_pattern is None:
+            alternatives = "|".join(re.escape(s) for s in sorted(self.skills, key=len, reverse=True))
+            self._skill_pattern = re.compile(rf"(?<![\w+#])(?:{alternatives})(?![\w+#])")
+        return sorted(set(self._skill_pattern.findall(text.lower())))
+
+    def candidates(self, interview_type, interview_level, company_type, difficulty=None):
+        """Question numbers that fit an interview."""
+        pool = np.intersect1d(self.posting("role", interview_type), self.posting("level", interview_level),
+                              assume_unique=True)
+        pool = np.intersect1d(pool, self.posting("company", company_type), assume_unique=True)
+        if difficulty is not None:
+            allowed = np.concatenate([self.posting("difficulty", d) for d in difficulty])
+            pool = pool[np.isin(pool, allowed)]
+        return pool
+
+    def sample(self, interview_type, interview_level, company_type, count, exclude=(), skills=(),
+               difficulty=None, seed=None):
+        """``count`` different questions for an interview, easiest first.
+
+        Questions whose keys are in ``exclude`` (oldest first) are only used
+        once the rest of the pool has run out. Up to ``SKILL_SHARE`` of the set
+        is drawn from questions on ``skills``.
+        """
+        rng = np.random.default_rng(seed)
+        pool = self.candidates(interview_type, interview_level, company_type, difficulty)
+        excluded = np.array([int(k, 16) for k in exclude], dtype=np.uint64)
+        fresh = pool[~np.isin(self.keys[pool], excluded)] if len(excluded) else pool
+
+        chosen = []
+        if skills:
+            on_skill = np.unique(np.concatenate([self.posting("skill", s) for s in skills]))
+            preferred = np.intersect1d(fresh, on_skill, assume_unique=True)
+            take = min(len(preferred), int(count * SKILL_SHARE))
+            chosen.extend(rng.choice(preferred, size=take, replace=False).tolist())
+        rest = np.setdiff1d(fresh, np.array(chosen, dtype=np.uint32), assume_unique=True) if chosen else fresh
+        take = min(len(rest), count - len(chosen))
+        chosen.extend(rng.choice(rest, size=take, replace=False).tolist())
+
+        if len(chosen) < count and len(excluded):
+            # Every fresh question is used up: repeat the ones asked longest ago
+            asked = pool[np.isin(self.keys[pool], excluded)]
+            by_key = dict(zip(self.keys[asked].tolist(), asked.tolist()))
+            for key in excluded.tolist():
+                if len(chosen) >= count:
+                    break
+                if key in by_key and by_key[key] not in chosen:
+                    chosen.append(by_key[key])
+
+        chosen.sort(key=lambda n: (int(self.difficulty[n]), n))
+        return [self.question(n) for n in chosen]
+
+    def close(self):
+        # The arrays are views into the map and must go first
+        self.keys = self.difficulty = self._text_offsets = self._postings = None
+        self._mmap.close()
+
+
+def load(source):
+    """Open the bank for ``source``, (re)building the ``.qbank`` next to it if the JSONL is newer."""
+    if source.endswith(".qbank"):
+        return QuestionBank(source)
+    path = os.path.splitext(source)[0] + ".qbank"
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(source):
+        build(read_source(source), path)
+    return QuestionBank(path)
+
+
+QUESTIONS_HEADER = "Question plan (ask these in order, one at a time, with follow-ups based on the answers):"
+
+
+def questions_section(questions):
+    return "\n".join([QUESTIONS_HEADER] + [f"{i}. {q.text}" for i, q in enumerate(questions, 1)])
+
+
+def with_questions(assistant, questions):
+    """Copy of a compiled assistant payload with ``questions`` added to its context.
+
+    Returns the shared payload itself when there are no questions; it must not be mutated.
+    """
+    if not questions:
+        return assistant
+    return dict(assistant, context=f"{assistant['context']}\n\n{questions_section(questions)}")
+
+
+def questions_tokens(questions):
+    """Tokens ``with_questions`` adds to the context."""
+    return count_tokens(questions_section(questions)) + 1 if questions else 0
+
+
+class QuestionHistory:
+    """Keys of the questions each candidate has been asked, in a ``state_store`` backend."""
+
+    def __init__(self, store, ttl=HISTORY_TTL, limit=HISTORY_LIMIT):
+        self.store = store
+        self.ttl = ttl
+        self.limit = limit
+
+    @staticmethod
+    def _key(candidate):
+        # Hashed so names and email addresses are not stored
+        digest = hashlib.sha256(candidate.strip().lower().encode("utf-8")).hexdigest()[:32]
+        return HISTORY_PREFIX + digest
+
+    def asked(self, candidate):
+        """Question keys asked so far, oldest first."""
+        record = self.store.get(self._key(candidate))
+        return record["keys"] if record else []
+
+    def record(self, candidate, questions):
+        keys = [k for k in self.asked(candidate) if k not in {q.key for q in questions}]
+        keys = (keys + [q.key for q in questions])[-self.limit:]
+        self.store.set(self._key(candidate), {"keys": keys, "updated_at": time.time()}, ttl=self.ttl)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="compile a JSONL question file into a .qbank")
+    build_parser.add_argument("source")
+    build_parser.add_argument("-o", "--out", help="output path (default: next to the source)")
+    sample_parser = commands.add_parser("sample", help="draw a question set from a bank")
+    sample_parser.add_argument("bank", help=".qbank or JSONL file")
+    sample_parser.add_argument("--type", default="software_engineer", choices=INTERVIEW_TYPES)
+    sample_parser.add_argument("--level", default="mid_level", choices=INTERVIEW_LEVELS)
+    sample_parser.add_argument("--company", default="enterprise", choices=COMPANY_TYPES)
+    sample_parser.add_argument("--duration", default="30_minutes", choices=INTERVIEW_DURATIONS)
+    sample_parser.add_argument("--job-description", default="", help="text whose skills are preferred")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        out = args.out or os.path.splitext(args.source)[0] + ".qbank"
+        started = time.perf_counter()
+        count = build(read_source(args.source), out)
+        print(f"{count} questions -> {out} ({os.path.getsize(out)} bytes, {time.perf_counter() - started:.2f}s)")
+        return
+
+    bank = load(args.bank)
+    started = time.perf_counter()
+    questions = bank.sample(args.type, args.level, args.company, QUESTIONS_PER_DURATION[args.duration],
+                            skills=bank.skills_in(args.job_description))
+    elapsed = time.perf_counter() - started
+    for question in questions:
+        print(f"[{question.difficulty}] {question.text}")
+    print(f"{len(questions)} of {len(bank)} questions in {elapsed * 1000:.2f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,354 @@
+"""Offline scoring of saved interview transcripts against the role/level rubrics.
+
+Each interview is scored on:
+
+- rubric match: TF-IDF cosine similarity between the candidate's answers and
+  the interview template for their role and level (IDF is taken over the
+  rubric documents, so a score depends only on its own transcript)
+- rubric coverage: share of the rubric's key terms the candidate used
+- STAR structure: share of answers with situation, task, action and result cue phrases
+- answer depth: words per answer
+
+Files are scored in parallel on a process pool. Results are cached in SQLite
+by transcript hash, so a re-run only scores new or changed interviews:
+
+    python scoring.py transcripts/ --out scores.jsonl --workers 8
+
+With ``--history``, scores are also stored with the interviews in the history
+database, where they feed the dashboard's score trends.
+"""
+
+import argparse
+import functools
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from prompts import INTERVIEW_TYPES, INTERVIEW_LEVELS, interview_templates
+
+DEFAULT_CACHE_PATH = ".score_cache.db"
+DEFAULT_TYPE = "software_engineer"
+DEFAULT_LEVEL = "mid_level"
+BATCH_SIZE = 64
+
+STOPWORDS = frozenset("""
+a about after all also an and any are as at be been being both but by can could did do does
+doing for from had has have having he her his how i if in into is it its just me more most my
+no not of on or our out over own same she so some such than that the their them then there
+these they this those through to too under up very was we were what when where which while who
+why will with would you your you're i'm i've it's that's ask asked asks candidate candidates
+conducting focus interview level they've
+""".split())
+
+# Cue phrases for each part of a STAR (Situation, Task, Action, Result) answer. Phrases rather
+# than single words, so everyday words ("i", "at", "had") don't count as structure on their own
+STAR_CUES = {
+    "situation": ["the situation was", "at the time", "at my previous", "in my previous role", "in my last role",
+                  "the context was", "the background was", "we were facing", "the project was", "our team was"],
+    "task": ["my task", "my role was", "my goal was", "the goal was", "i was responsible", "i was asked to",
+             "i needed to", "we needed to", "the challenge was", "the objective was"],
+    "action": ["i decided", "i built", "i led", "i implemented", "i designed", "i created", "i organized",
+               "i proposed", "i worked with", "i started by"],
+    "result": ["as a result", "the result was", "resulted in", "the outcome was", "in the end", "we reduced",
+               "we increased", "which improved", "percent", "i learned"],
+}
+
+# Weights of the features in the overall 0-100 score
+WEIGHTS = {"rubric_match": 0.35, "rubric_coverage": 0.25, "star": 0.25, "depth": 0.15}
+# Answers this long (in words) get full marks for depth
+TARGET_ANSWER_WORDS = 80
+
+_TOKEN = re.compile(r"[a-z0-9%][a-z0-9+#%']*")
+
+
+def tokenize(text):
+    return _TOKEN.findall(text.lower())
+
+
+def _stem(token):
+    # Just enough folding that "designs"/"design" and "skills"/"skill" match
+    if len(token) > 4 and token.endswith("ies"):
+        return token[:-3] + "y"
+    if len(token) > 3 and token.endswith("s") and not token.endswith("ss"):
+        return token[:-1]
+    return token
+
+
+def terms(text):
+    return [_stem(t) for t in tokenize(text) if t not in STOPWORDS]
+
+
+class Rubrics:
+    """TF-IDF vectors of every role/level template over a shared vocabulary."""
+
+    def __init__(self, templates=interview_templates):
+        self.keys = [(t, l) for t in INTERVIEW_TYPES for l in INTERVIEW_LEVELS]
+        docs = [terms(templates[t][l]) for t, l in self.keys]
+        self.vocabulary = {term: i for i, term in enumerate(sorted({term for doc in docs for term in doc}))}
+        self.index = {key: i for i, key in enumerate(self.keys)}
+
+        counts = np.stack([self.counts(doc) for doc in docs])
+        df = np.count_nonzero(counts, axis=0)
+        self.idf = np.log((1 + len(docs)) / (1 + df)) + 1
+        self.matrix = self._normalise(counts * self.idf)
+        self.present = counts > 0
+        # Cached scores are recomputed when the rubrics or the STAR cues change
+        self.version = hashlib.sha256(
+            json.dumps([templates, STAR_CUES], sort_keys=True).encode("utf-8")
+        ).hexdigest()[:16]
+
+    def counts(self, tokens):
+        ids = [self.vocabulary[t] for t in tokens if t in self.vocabulary]
+        return np.bincount(np.array(ids, dtype=np.int64), minlength=len(self.vocabulary)).astype(np.float64)
+
+    @staticmethod
+    def _normalise(matrix):
+        norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+        return np.divide(matrix, norms, out=np.zeros_like(matrix), where=norms > 0)
+
+    def match(self, interview_type, interview_level, counts):
+        """Cosine similarity and term coverage of ``counts`` against one rubric."""
+        row = self.index[(interview_type, interview_level)]
+        similarity = float(self.matrix[row] @ self._normalise(counts * self.idf))
+        present = self.present[row]
+        coverage = float(np.count_nonzero(counts[present]) / max(np.count_nonzero(present), 1))
+        return similarity, coverage
+
+
+@functools.lru_cache(maxsize=None)
+def get_rubrics():
+    return Rubrics()
+
+
+@functools.lru_cache(maxsize=None)
+def _star_vocabulary():
+    phrases = sorted({phrase for cues in STAR_CUES.values() for phrase in cues})
+    index = {phrase: i for i, phrase in enumerate(phrases)}
+    # parts x phrases membership matrix
+    membership = np.zeros((len(STAR_CUES), len(phrases)), dtype=bool)
+    for row, cues in enumerate(STAR_CUES.values()):
+        membership[row, [index[phrase] for phrase in cues]] = True
+    return index, membership, max(len(phrase.split()) for phrase in phrases)
+
+
+def _phrases(text, longest):
+    # Every run of up to ``longest`` words; "30%" reads as "30 percent"
+    tokens = []
+    for token in tokenize(text):
+        tokens += [token[:-1], "percent"] if token.endswith("%") and len(token) > 1 else [token]
+    return {" ".join(tokens[i:i + n]) for n in range(1, longest + 1) for i in range(len(tokens) - n + 1)}
+
+
+def star_scores(answers):
+    """Per answer, the share of the four STAR parts it has a cue phrase for."""
+    if not answers:
+        return np.zeros(0)
+    index, membership, longest = _star_vocabulary()
+    hits = np.zeros((len(answers), len(index)), dtype=bool)
+    for row, answer in enumerate(answers):
+        ids = [index[phrase] for phrase in _phrases(answer, longest) if phrase in index]
+        hits[row, ids] = True
+    # answers x parts: does the answer contain any cue of that part
+    parts = (hits.astype(np.int32) @ membership.T.astype(np.int32)) > 0
+    return parts.mean(axis=1)
+
+
+def load_transcript(path):
+    """The interview settings header (or {}) and the transcript fragments of a JSONL file."""
+    meta, fragments = {}, []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            if "interview" in item:
+                meta = item["interview"]
+            elif "text" in item:
+                fragments.append(item)
+    return meta, fragments
+
+
+def answers_from(fragments):
+    """Consecutive candidate fragments joined into one answer per interviewer turn."""
+    answers, current = [], []
+    for fragment in fragments:
+        if fragment.get("role") == "user":
+            current.append(fragment["text"])
+        elif current:
+            answers.append(" ".join(current))
+            current = []
+    if current:
+        answers.append(" ".join(current))
+    return answers
+
+
+def score_transcript(meta, fragments, default_type=DEFAULT_TYPE, default_level=DEFAULT_LEVEL):
+    rubrics = get_rubrics()
+    interview_type = meta.get("interview_type") or default_type
+    interview_level = meta.get("interview_level") or default_level
+    answers = answers_from(fragments)
+    tokens = terms(" ".join(answers))
+
+    similarity, coverage = rubrics.match(interview_type, interview_level, rubrics.counts(tokens))
+    star = star_scores(answers)
+    words = np.array([len(tokenize(a)) for a in answers], dtype=np.float64)
+    features = {
+        # Cosine similarity with a short template rarely exceeds ~0.5, so scale it up
+        "rubric_match": min(similarity * 2, 1.0),
+        "rubric_coverage": coverage,
+        "star": float(star.mean()) if len(star) else 0.0,
+        "depth": float(np.minimum(words / TARGET_ANSWER_WORDS, 1).mean()) if len(words) else 0.0,
+    }
+    return {
+        "interview_id": meta.get("interview_id"),
+        "interview_type": interview_type,
+        "interview_level": interview_level,
+        "answers": len(answers),
+        "questions": sum(1 for f in fragments if f.get("role") == "assistant" and f["text"].rstrip().endswith("?")),
+        "words_per_answer": round(float(words.mean()), 1) if len(words) else 0.0,
+        "features": {name: round(value, 4) for name, value in features.items()},
+        "score": round(100 * sum(WEIGHTS[name] * value for name, value in features.items()), 1),
+    }
+
+
+def file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 16), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _score_files(jobs, default_type, default_level):
+    # Runs in a worker process; one task per batch keeps pickling overhead low
+    results = []
+    for path, digest in jobs:
+        try:
+            meta, fragments = load_transcript(path)
+            result = score_transcript(meta, fragments, default_type, default_level)
+            result["interview_id"] = result["interview_id"] or os.path.splitext(os.path.basename(path))[0]
+        except (OSError, ValueError, KeyError) as e:
+            result = {"error": str(e)}
+        result["path"] = path
+        results.append((digest, result))
+    return results
+
+
+class ScoreCache:
+    """Scores keyed by transcript hash and rubric version."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS scores (hash TEXT, rubric_version TEXT, result TEXT, "
+            "PRIMARY KEY (hash, rubric_version))"
+        )
+
+    def get_many(self, digests, rubric_version):
+        found = {}
+        digests = list(digests)
+        # Stay under SQLite's bound-parameter limit
+        for start in range(0, len(digests), 500):
+            chunk = digests[start:start + 500]
+            rows = self._conn.execute(
+                f"SELECT hash, result FROM scores WHERE rubric_version = ? AND hash IN ({','.join('?' * len(chunk))})",
+                [rubric_version] + chunk
+            )
+            found.update((digest, json.loads(result)) for digest, result in rows)
+        return found
+
+    def put_many(self, items, rubric_version):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO scores (hash, rubric_version, result) VALUES (?, ?, ?)",
+            [(digest, rubric_version, json.dumps(result)) for digest, result in items]
+        )
+        self._conn.commit()
+
+    def close(self):
+        self._conn.close()
+
+
+def find_transcripts(directory):
+    paths = []
+    for root, _, files in os.walk(directory):
+        paths.extend(os.path.join(root, name) for name in files if name.endswith(".jsonl"))
+    return sorted(paths)
+
+
+def score_directory(directory, cache_path=DEFAULT_CACHE_PATH, workers=None, batch_size=BATCH_SIZE,
+                    default_type=DEFAULT_TYPE, default_level=DEFAULT_LEVEL):
+    """Score every transcript under ``directory``. Returns (results, stats)."""
+    started = time.perf_counter()
+    rubric_version = get_rubrics().version
+    paths = find_transcripts(directory)
+    digests = {path: file_hash(path) for path in paths}
+
+    cache = ScoreCache(cache_path) if cache_path else None
+    cached = cache.get_many(set(digests.values()), rubric_version) if cache else {}
+    todo = [(path, digest) for path, digest in digests.items() if digest not in cached]
+
+    scored = {}
+    if todo:
+        batches = [todo[i:i + batch_size] for i in range(0, len(todo), batch_size)]
+        if workers == 1 or len(batches) == 1:
+            outputs = [_score_files(batch, default_type, default_level) for batch in batches]
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                outputs = list(pool.map(_score_files, batches,
+                                        [default_type] * len(batches), [default_level] * len(batches)))
+        for output in outputs:
+            scored.update(output)
+        if cache:
+            cache.put_many([(d, r) for d, r in scored.items() if "error" not in r], rubric_version)
+    if cache:
+        cache.close()
+
+    results = []
+    for path, digest in digests.items():
+        result = dict(scored.get(digest) or cached[digest], path=path)
+        results.append(result)
+    stats = {
+        "transcripts": len(paths),
+        "scored": len(todo),
+        "cached": len(paths) - len(todo),
+        "errors": sum(1 for r in results if "error" in r),
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    return results, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("directory", help="Directory of <interview id>.jsonl transcripts")
+    parser.add_argument("--out", help="Write one JSON result per line here (default: stdout)")
+    parser.add_argument("--cache", default=DEFAULT_CACHE_PATH, help="Score cache path ('' to disable)")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--type", default=DEFAULT_TYPE, help="Role for transcripts without a settings header")
+    parser.add_argument("--level", default=DEFAULT_LEVEL, help="Level for transcripts without a settings header")
+    parser.add_argument("--history", help="Also store the scores in this interview history database")
+    args = parser.parse_args()
+
+    results, stats = score_directory(args.directory, args.cache, args.workers, args.batch_size,
+                                     args.type, args.level)
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    for result in results:
+        out.write(json.dumps(result) + "\n")
+    if args.out:
+        out.close()
+    if args.history:
+        from history import InterviewHistory
+        history = InterviewHistory(args.history)
+        stats["history_updated"] = history.set_scores(
+            {r["interview_id"]: r["score"] for r in results if "error" not in r}
+        )
+        history.close()
+    print(json.dumps(stats), file=sys.stderr)
@@ -0,0 +1,272 @@
+"""Process-wide accounting and admission control for live calls.
+
+Every session's ``CallLifecycle`` is registered here before it starts. Calls
+are admitted while the node and the API key are under their caps; the rest
+wait in a FIFO queue and start automatically when a slot frees up. A reaper
+thread stops calls whose browser session has gone away.
+"""
+
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from call_executor import IDLE, FAILED
+
+DEFAULT_MAX_CALLS = 50
+DEFAULT_MAX_CALLS_PER_KEY = 10
+DEFAULT_CALL_SECONDS = 30 * 60
+ORPHAN_TIMEOUT = 120
+REAP_INTERVAL = 15
+
+Admission = namedtuple("Admission", ["admitted", "position", "estimated_wait"])
+
+
+class SessionBusy(Exception):
+    """The browser session already has a call in progress or waiting for a slot."""
+
+
+def current_session_id():
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+    return get_script_run_ctx().session_id
+
+
+def streamlit_session_alive(session_id):
+    """True while the browser session is connected (always True outside a Streamlit server)."""
+    from streamlit import runtime
+    return not runtime.exists() or runtime.get_instance().is_active_session(session_id)
+
+
+def key_id(api_key):
+    """Short, non-reversible identifier for an API key."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:16]
+
+
+class _Entry:
+    def __init__(self, session_id, key, lifecycle, connect, expected_seconds):
+        self.session_id = session_id
+        self.key = key
+        self.lifecycle = lifecycle
+        self.connect = connect
+        self.expected_seconds = expected_seconds
+        self.enqueued_at = time.time()
+        self.admitted_at = None
+        self.last_alive = time.time()
+        # Set once the lifecycle has queued or started this call
+        self.started = False
+        self.listener = None
+
+    @property
+    def finished(self):
+        return self.started and self.lifecycle.state in (IDLE, FAILED)
+
+
+class _Listener:
+    # Releases one submitted call's slot or queue position when that call ends. Listeners
+    # run after the state changes, so one may still hear the previous call end; that is
+    # ignored until this call has begun.
+    def __init__(self, manager, entry):
+        self.manager = manager
+        self.entry = entry
+
+    def __call__(self, state):
+        if state in (IDLE, FAILED):
+            if self.entry.started:
+                self.entry.lifecycle.remove_listener(self)
+                self.manager._release(self.entry)
+        else:
+            self.entry.started = True
+
+
+class SessionManager:
+    """Tracks every active and queued call in the process.
+
+    ``is_alive(session_id)`` tells the reaper whether the browser session that
+    owns a call is still connected.
+    """
+
+    def __init__(self, max_calls=DEFAULT_MAX_CALLS, max_calls_per_key=DEFAULT_MAX_CALLS_PER_KEY,
+                 orphan_timeout=ORPHAN_TIMEOUT, is_alive=None):
+        self.max_calls = max_calls
+        self.max_calls_per_key = max_calls_per_key
+        self.orphan_timeout = orphan_timeout
+        self.is_alive = is_alive or (lambda session_id: True)
+        self._active = {}
+        self._queue = []
+        self._lock = threading.Lock()
+        self._reaper = None
+
+    def submit(self, session_id, api_key, lifecycle, connect, expected_seconds=DEFAULT_CALL_SECONDS):
+        """Start ``connect`` on ``lifecycle`` now if there is capacity, otherwise queue it.
+
+        Raises ``SessionBusy`` if the session already has a call that hasn't ended.
+        """
+        entry = _Entry(session_id, key_id(api_key), lifecycle, connect, expected_seconds)
+        listener = entry.listener = _Listener(self, entry)
+        with self._lock:
+            # A call that has just ended may not have been released yet; it mustn't turn this one away
+            for stale in self._entries(session_id):
+                if stale.finished:
+                    self._remove(stale)
+            known = bool(self._entries(session_id))
+            if not known:
+                self._queue.append(entry)
+                # Before the entry can be promoted, so the listener hears the call start
+                lifecycle.add_listener(listener)
+                promoted = self._promote()
+                # Under the lock, so another thread's release can't promote and start the entry first
+                if entry not in promoted and not lifecycle.queue():
+                    # The lifecycle already had a call in progress
+                    lifecycle.remove_listener(listener)
+                    self._remove(entry)
+                    promoted += self._promote()
+        if known:
+            raise SessionBusy(f"Session {session_id} already has a call in progress")
+        self._start(promoted)
+        return self.admission(session_id)
+
+    def admission(self, session_id):
+        """Queue position (1-based) and estimated wait in seconds for a session."""
+        with self._lock:
+            if session_id in self._active:
+                return Admission(True, 0, 0)
+            for position, entry in enumerate(self._queue, start=1):
+                if entry.session_id == session_id:
+                    return Admission(False, position, self._estimate_wait(position))
+        return Admission(False, 0, 0)
+
+    def stats(self):
+        with self._lock:
+            per_key = {}
+            for entry in self._active.values():
+                per_key[entry.key] = per_key.get(entry.key, 0) + 1
+            return {
+                "active": len(self._active),
+                "queued": len(self._queue),
+                "max_calls": self.max_calls,
+                "max_calls_per_key": self.max_calls_per_key,
+                "active_per_key": per_key,
+            }
+
+    def reap(self):
+        """Apply lifecycle timeouts and stop calls whose session is gone. Returns the number reaped."""
+        now = time.time()
+        orphans = []
+        with self._lock:
+            entries = list(self._active.values()) + list(self._queue)
+        for entry in entries:
+            # Nobody may be polling this lifecycle anymore, so apply its timeouts here
+            entry.lifecycle.poll()
+            if self.is_alive(entry.session_id):
+                entry.last_alive = now
+            elif now - entry.last_alive > self.orphan_timeout:
+                orphans.append(entry)
+        for entry in orphans:
+            entry.lifecycle.stop()
+        return len(orphans)
+
+    def start_reaper(self, interval=REAP_INTERVAL):
+        if self._reaper is not None:
+            return self._reaper
+
+        def run():
+            while True:
+                time.sleep(interval)
+                self.reap()
+
+        self._reaper = threading.Thread(target=run, name="call-reaper", daemon=True)
+        self._reaper.start()
+        return self._reaper
+
+    def release(self, session_id):
+        """Free a session's slot or queue position and admit whoever is next."""
+        with self._lock:
+            for entry in self._entries(session_id):
+                self._remove(entry)
+            promoted = self._promote()
+        self._start(promoted)
+
+    def _release(self, entry):
+        # Free one submitted call's slot; a no-op if it was already released
+        with self._lock:
+            self._remove(entry)
+            promoted = self._promote()
+        self._start(promoted)
+
+    def _start(self, promoted):
+        for entry in promoted:
+            if not entry.lifecycle.start(entry.connect):
+                # The lifecycle is busy with something else (e.g. stopping); its slot goes to the next call
+                entry.lifecycle.remove_listener(entry.listener)
+                self._release(entry)
+
+    def _entries(self, session_id):
+        # Caller holds the lock
+        entries = [e for e in self._queue if e.session_id == session_id]
+        if session_id in self._active:
+            entries.append(self._active[session_id])
+        return entries
+
+    def _remove(self, entry):
+        # Caller holds the lock
+        if self._active.get(entry.session_id) is entry:
+            del self._active[entry.session_id]
+        elif entry in self._queue:
+            self._queue.remove(entry)
+
+    def reassign(self, lifecycle, session_id):
+        """Hand a lifecycle's call or queue slot over to another browser session, e.g. after a reload.
+
+        Returns False if the lifecycle has no call here. Raises ``SessionBusy``
+        if ``session_id`` has a call of its own that hasn't ended.
+        """
+        with self._lock:
+            entry = next((e for e in list(self._active.values()) + self._queue if e.lifecycle is lifecycle), None)
+            if entry is None:
+                return False
+            for other in self._entries(session_id):
+                if other is entry:
+                    continue
+                if not other.finished:
+                    raise SessionBusy(f"Session {session_id} already has a call in progress")
+                # Ended but not released yet
+                self._remove(other)
+            old_session_id = entry.session_id
+            if self._active.get(old_session_id) is entry:
+                del self._active[old_session_id]
+                self._active[session_id] = entry
+            entry.session_id = session_id
+            entry.last_alive = time.time()
+        return True
+
+    def _has_capacity(self, key):
+        if len(self._active) >= self.max_calls:
+            return False
+        return sum(1 for e in self._active.values() if e.key == key) < self.max_calls_per_key
+
+    def _promote(self):
+        # Caller holds the lock. Admit queued calls in FIFO order, skipping
+        # ones whose key is at its cap so other keys are not held up.
+        promoted = []
+        for entry in list(self._queue):
+            if len(self._active) >= self.max_calls:
+                break
+            if self._has_capacity(entry.key):
+                self._queue.remove(entry)
+                entry.admitted_at = time.time()
+                self._active[entry.session_id] = entry
+                promoted.append(entry)
+        return promoted
+
+    def _estimate_wait(self, position):
+        # Caller holds the lock. The n-th queued call gets the n-th slot to free
+        # up, assuming calls run for their expected duration.
+        now = time.time()
+        remaining = sorted(
+            max(e.expected_seconds - (now - e.admitted_at), 0) for e in self._active.values()
+        )
+        if not remaining:
+            return 0
+        average = sum(e.expected_seconds for e in self._active.values()) / len(self._active)
+        rounds, index = divmod(position - 1, len(remaining))
+        return remaining[index] + rounds * average
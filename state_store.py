@@ -0,0 +1,215 @@
+"""Pluggable key-value stores for call and session state shared across replicas.
+
+All backends store JSON-serialisable dicts under string keys with an optional
+TTL and expose the same small API: ``get``, ``set``, ``delete`` and ``keys``.
+
+    memory://                      in-process dict (single replica, tests)
+    sqlite:///state.db             shared file, relative to the working directory
+    sqlite:////abs/path/state.db   shared file at an absolute path (replicas on one host or volume)
+    redis://host:6379/0            any Redis-protocol server
+
+``fake_redis_server.py`` provides a local stand-in for the Redis backend.
+"""
+
+import json
+import socket
+import sqlite3
+import threading
+import time
+from urllib.parse import urlparse
+
+
+class MemoryStore:
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at < time.time():
+                del self._data[key]
+                return None
+            return json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (json.dumps(value), expires_at)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def keys(self, prefix=""):
+        now = time.time()
+        with self._lock:
+            return sorted(
+                k for k, (_, expires_at) in self._data.items()
+                if k.startswith(prefix) and (expires_at is None or expires_at >= now)
+            )
+
+    def close(self):
+        pass
+
+
+class SQLiteStore:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+        )
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute("SELECT value, expires_at FROM kv WHERE key = ?", (key,)).fetchone()
+        if row is None or (row[1] is not None and row[1] < time.time()):
+            return None
+        return json.loads(row[0])
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, json.dumps(value), expires_at)
+            )
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def keys(self, prefix=""):
+        # Range scan on the primary key instead of LIKE, so the index is used
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT key FROM kv WHERE key >= ? AND key < ? AND (expires_at IS NULL OR expires_at >= ?) ORDER BY key",
+                (prefix, prefix + "\U0010ffff", time.time())
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class RedisStore:
+    """Minimal RESP client covering the handful of commands the store needs."""
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, timeout=5):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._sock = None
+        self._reader = None
+
+    def _connect(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self._reader = self._sock.makefile("rb")
+        if self.password:
+            self._roundtrip("AUTH", self.password)
+        if self.db:
+            self._roundtrip("SELECT", self.db)
+
+    def _disconnect(self):
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._reader = None
+
+    def _roundtrip(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._sock.sendall(b"".join(parts))
+        return self._read_reply()
+
+    def _read_reply(self):
+        line = self._reader.readline()
+        if not line:
+            raise ConnectionError("Connection closed by server")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise RuntimeError(body.decode())
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            length = int(body)
+            if length < 0:
+                return None
+            data = self._reader.read(length + 2)[:-2]
+            return data.decode("utf-8")
+        if kind == b"*":
+            count = int(body)
+            return None if count < 0 else [self._read_reply() for _ in range(count)]
+        raise RuntimeError(f"Unexpected reply: {line!r}")
+
+    def command(self, *args):
+        with self._lock:
+            # Reconnect once if the server dropped an idle connection
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    return self._roundtrip(*args)
+                except (ConnectionError, OSError):
+                    self._disconnect()
+                    if attempt == 2:
+                        raise
+
+    def get(self, key):
+        value = self.command("GET", key)
+        return None if value is None else json.loads(value)
+
+    def set(self, key, value, ttl=None):
+        if ttl:
+            self.command("SET", key, json.dumps(value), "EX", int(ttl))
+        else:
+            self.command("SET", key, json.dumps(value))
+
+    def delete(self, key):
+        self.command("DEL", key)
+
+    def keys(self, prefix=""):
+        found, cursor = set(), "0"
+        while True:
+            cursor, batch = self.command("SCAN", cursor, "MATCH", prefix + "*", "COUNT", 500)
+            found.update(batch)
+            if cursor == "0":
+                return sorted(found)
+
+    def close(self):
+        with self._lock:
+            self._disconnect()
+
+
+def open_store(url):
+    """Create a store from a ``memory://``, ``sqlite:///...`` or ``redis://...`` URL.
+
+    SQLite paths follow SQLAlchemy: ``sqlite:///rel.db`` is relative to the
+    working directory and ``sqlite:////abs/path.db`` is absolute.
+    """
+    parsed = urlparse(url)
+    if parsed.scheme == "memory":
+        return MemoryStore()
+    if parsed.scheme == "sqlite":
+        # The slash that ends the (empty) host isn't part of the path
+        return SQLiteStore(parsed.path[1:] or "state.db")
+    if parsed.scheme == "redis":
+        db = int(parsed.path.strip("/") or 0)
+        return RedisStore(parsed.hostname or "127.0.0.1", parsed.port or 6379, db, parsed.password)
+    raise ValueError(f"Unsupported state backend: {url}")
@@ -0,0 +1,89 @@
+import json
+import threading
+import time
+
+import pytest
+
+from assistant_cache import AssistantIdCache
+from audio_transport import AudioRelay
+from call_session import connector
+from fake_vapi_server import FakeVapiServer
+from prompts import CompiledAssistant
+from vapi_clients import VapiError
+from voice_backends import BrowserAudioVoice
+
+COMPILED = CompiledAssistant("config", "content", {"name": "Interviewer"}, 0, None)
+
+
+def test_concurrent_misses_create_one_assistant(tmp_path):
+    with FakeVapiServer() as server:
+        cache = AssistantIdCache(str(tmp_path / "cache.json"), api_url=server.url)
+        ids = []
+        threads = [threading.Thread(target=lambda: ids.append(cache.get_or_create("key", COMPILED)))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(ids)) == 1 and len(ids) == 8
+        assert server.state.requests["POST /assistant"] == 1
+
+
+def test_error_responses_raise_before_parsing(tmp_path):
+    cache = AssistantIdCache(str(tmp_path / "cache.json"), api_url="http://127.0.0.1:9")
+
+    class Session:
+        def post(self, *args, **kwargs):
+            class Response:
+                ok, status_code = False, 502
+
+                def json(self):
+                    raise ValueError("not JSON")
+            return Response()
+
+    with pytest.raises(VapiError, match="502"):
+        cache.get_or_create("key", COMPILED, session=Session())
+
+
+def test_processes_merge_entries_and_drop_expired_ones(tmp_path):
+    path = str(tmp_path / "cache.json")
+    first, second = AssistantIdCache(path), AssistantIdCache(path)
+    first.put("key", "a", "assistant-a")
+    second.put("key", "b", "assistant-b")
+    assert AssistantIdCache(path).get("key", "a") == "assistant-a"
+    assert AssistantIdCache(path).get("key", "b") == "assistant-b"
+
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    for entry in data["entries"].values():
+        entry["created_at"] = time.time() - 2 * first.ttl
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    third = AssistantIdCache(path)
+    third.put("key", "c", "assistant-c")
+    with open(path, "r", encoding="utf-8") as f:
+        assert list(json.load(f)["entries"]) == [third._key("key", "c")]
+
+
+def test_a_deleted_assistant_is_replaced_once(tmp_path):
+    with FakeVapiServer() as server:
+        cache = AssistantIdCache(str(tmp_path / "cache.json"), api_url=server.url)
+        cache.put("key", COMPILED.content_hash, "deleted-assistant")
+        client = BrowserAudioVoice(AudioRelay(port=0, host="127.0.0.1").start(), api_url=server.url).get("key")
+        start_kwargs = lambda: {"assistant_id": cache.get_or_create("key", COMPILED, session=client.session)}
+
+        def fallback():
+            cache.invalidate("key", COMPILED.content_hash)
+            return start_kwargs()
+
+        call = connector(client, start_kwargs, fallback=fallback)()
+        call.stop()
+        assistant_id = cache.get("key", COMPILED.content_hash)
+        assert assistant_id in server.state.assistants
+        assert [body["assistantId"] for body in server.state.calls.values()] == [assistant_id]
+        assert server.state.requests["POST /call"] == 2 and server.state.requests["POST /assistant"] == 1
+
+        # Without a fallback, the rejection is the call's error
+        cache.put("key", COMPILED.content_hash, "deleted-assistant")
+        with pytest.raises(VapiError, match="Couldn't find assistant"):
+            connector(client, start_kwargs)()
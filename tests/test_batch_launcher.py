@@ -0,0 +1,48 @@
+import socket
+import threading
+
+import requests
+
+from batch_launcher import is_transient, read_manifest
+
+
+def test_malformed_lines_are_reported_with_the_rest(tmp_path):
+    manifest = tmp_path / "batch.jsonl"
+    manifest.write_text('{"phone": "+15550100"}\n{"phone": "+1555\n[1, 2]\n\n{"candidate": "x"}\n')
+    rows, errors = read_manifest(str(manifest))
+    assert [row.line for row in rows] == [1]
+    assert [error.split(": ")[0] for error in errors] == [f"{manifest}:2", f"{manifest}:3", f"{manifest}:5"]
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def test_only_connect_failures_are_retried():
+    try:
+        requests.post(f"http://127.0.0.1:{_free_port()}/call", json={}, timeout=2)
+    except requests.RequestException as e:
+        refused = e
+    assert is_transient(refused)
+
+    # A server that reads the request and hangs up: the call may have been placed
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(1)
+
+    def hang_up():
+        connection, _ = server.accept()
+        connection.recv(65536)
+        connection.close()
+
+    threading.Thread(target=hang_up, daemon=True).start()
+    try:
+        requests.post(f"http://127.0.0.1:{server.getsockname()[1]}/call", json={}, timeout=2)
+    except requests.RequestException as e:
+        dropped = e
+    server.close()
+    assert isinstance(dropped, requests.ConnectionError)
+    assert not is_transient(dropped)
+    assert not is_transient(requests.ReadTimeout())
@@ -0,0 +1,32 @@
+import time
+
+from call_executor import ACTIVE, IDLE, CallLifecycle, make_executor
+from call_session import connector
+from pacing import InterviewPacer, TimerWheel
+from session_manager import SessionManager
+from voice_backends import Script, SimulatedVoice, Turn
+
+
+def _wait(lifecycle, state, timeout=5):
+    deadline = time.monotonic() + timeout
+    while lifecycle.poll() != state:
+        assert time.monotonic() < deadline, f"still {lifecycle.state}"
+        time.sleep(0.01)
+
+
+def test_short_script_frees_its_slot_before_the_time_limit():
+    voice = SimulatedVoice([Script("short", [Turn(0.0, 1.0, "assistant", "Hello?")])], speedup=100,
+                           connect_seconds=0)
+    manager = SessionManager(max_calls=1)
+    pacer = InterviewPacer(TimerWheel(tick=0.01), speedup=100)
+    lifecycle = CallLifecycle(make_executor(2))
+    pace = pacer.attach(lifecycle, 15 * 60)
+    manager.submit("session", "key", lifecycle, connector(voice, {"assistant": {}}))
+    _wait(lifecycle, ACTIVE)
+    assert lifecycle.call.ended.wait(2)
+
+    # The reaper polls every lifecycle, so nobody has to be watching the page
+    manager.reap()
+    _wait(lifecycle, IDLE)
+    assert manager.stats()["active"] == 0
+    assert not pace.hard_stopped
@@ -0,0 +1,23 @@
+from history import InterviewHistory
+from metrics import MetricsRegistry
+
+META = {"interview_type": "Technical", "interview_level": "Senior", "interview_duration": "30 minutes",
+        "company_type": "Startup"}
+
+
+def test_a_rejected_row_does_not_drop_the_rest_of_the_batch(tmp_path):
+    registry = MetricsRegistry()
+    # The writer thread would flush on its own after flush_interval
+    history = InterviewHistory(str(tmp_path / "history.db"), flush_interval=60, registry=registry)
+    history.record("good", started_at=1.0, outcome="in_progress", **META)
+    # An interview's first write without its settings breaks a NOT NULL constraint
+    history.record("bad", started_at=2.0, outcome="in_progress")
+    history.record("good-too", started_at=3.0, outcome="completed", **META)
+
+    assert history.flush() == 2
+    assert history.get("good")["outcome"] == "in_progress"
+    assert history.get("good-too")["outcome"] == "completed"
+    assert history.get("bad") is None
+    assert registry.counter("history_rejected_rows") == 1
+    assert "vapi_history_rejected_rows_total 1" in registry.render()
+    assert history.flush() == 0
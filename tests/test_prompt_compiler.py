@@ -0,0 +1,47 @@
+from prompt_compiler import JobDescriptionCompressor, compress_job_description, count_tokens
+
+SHORT_DESCRIPTIONS = [
+    "Must have 5+ years of Go experience",
+    "What we offer a great team\nYou will build payment APIs in Go.\nOn call one week in six.",
+    "Senior Backend Engineer\nMust have 5+ years of Go experience\nRemote within Europe.",
+]
+
+LONG_DESCRIPTION = "\n".join(
+    ["About the company:", "We build payments infrastructure for small businesses."]
+    + ["Responsibilities:"] + [f"- Design and build service {i} in Go with strong ownership." for i in range(40)]
+    + ["What we offer"] + [f"- Perk number {i} for everyone on the team." for i in range(40)]
+    + ["Requirements:", "Must have 5+ years of Go experience and strong knowledge of distributed systems."]
+)
+
+
+def test_short_descriptions_are_kept_as_written():
+    for text in SHORT_DESCRIPTIONS:
+        assert compress_job_description(text, 400).text == text
+
+
+def test_compression_fits_budget_and_keeps_high_weight_sections():
+    compressed = compress_job_description(LONG_DESCRIPTION, 120)
+    assert compressed.tokens == count_tokens(compressed.text) <= 120 < compressed.original_tokens
+    assert "Responsibilities:" in compressed.text
+    assert "Requirements:" in compressed.text
+    # A long line naming a section is content, not a heading
+    assert "Must have 5+ years of Go experience" in compressed.text
+    # Low-weight sections give way to high-weight ones
+    assert "payments infrastructure" not in compressed.text
+    # "What we offer" is a heading, so the perks under it go
+    assert "Perk" not in compressed.text
+
+
+def test_never_empty_for_non_empty_input():
+    for text in SHORT_DESCRIPTIONS + ["Benefits:\n- Free lunch every day.\n- Gym membership for all staff."]:
+        for budget in (3, 10, 400):
+            compressed = compress_job_description(text * 5, budget)
+            assert compressed.text
+            assert compressed.tokens == count_tokens(compressed.text) <= budget
+
+
+def test_output_is_stable_for_the_same_input():
+    first = compress_job_description(LONG_DESCRIPTION, 120)
+    assert compress_job_description(LONG_DESCRIPTION, 120) == first
+    # Not only a cache hit: a fresh compressor comes to the same result
+    assert JobDescriptionCompressor()(LONG_DESCRIPTION, 120) == first
@@ -0,0 +1,12 @@
+import json
+import os
+
+import question_bank
+
+
+def test_load_builds_the_bank_next_to_its_source(tmp_path):
+    source = tmp_path / "questions.jsonl"
+    source.write_text("\n".join(json.dumps({"text": f"Question {n}?", "difficulty": 3}) for n in range(5)) + "\n")
+    bank = question_bank.load(str(source))
+    assert len(bank) == 5
+    assert sorted(os.listdir(tmp_path)) == ["questions.jsonl", "questions.qbank"]
@@ -0,0 +1,12 @@
+from scoring import star_scores
+
+
+def test_everyday_words_are_not_star_structure():
+    assert star_scores(["I had a meeting at noon when the team was there"]).tolist() == [0.0]
+
+
+def test_star_answers_score_every_part():
+    answer = ("At the time our team was migrating to Kubernetes. My task was to cut deploy times, "
+              "so I designed a build cache. As a result deploys took 40% less time.")
+    assert star_scores([answer]).tolist() == [1.0]
+    assert star_scores(["In the end we reduced costs by 20%"]).tolist() == [0.25]
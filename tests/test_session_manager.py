@@ -0,0 +1,59 @@
+import threading
+import time
+
+from call_executor import ACTIVE, CONNECTING, QUEUED, CallLifecycle, make_executor
+from session_manager import SessionManager
+
+
+class _Call:
+    def stop(self):
+        pass
+
+
+def _connect():
+    return _Call()
+
+
+def _wait(lifecycle, state, timeout=5):
+    deadline = time.monotonic() + timeout
+    while lifecycle.poll() != state:
+        assert time.monotonic() < deadline, f"still {lifecycle.state}"
+        time.sleep(0.01)
+
+
+def test_release_while_queueing_keeps_the_promoted_call():
+    manager = SessionManager(max_calls=1)
+    first = CallLifecycle(make_executor(1))
+    manager.submit("a", "key", first, _connect)
+    _wait(first, ACTIVE)
+
+    class Racing(CallLifecycle):
+        def queue(self):
+            # The first call is released while the second is being queued
+            releasing = threading.Thread(target=manager.release, args=("a",))
+            releasing.start()
+            releasing.join(0.5)
+            self.releasing = releasing
+            return super().queue()
+
+    second = Racing(make_executor(1))
+    manager.submit("b", "key", second, _connect)
+    second.releasing.join(5)
+    _wait(second, ACTIVE)
+    assert manager.admission("b").admitted
+    assert manager.stats()["active"] == 1
+
+
+def test_a_promoted_call_that_cannot_start_gives_up_its_slot():
+    manager = SessionManager(max_calls=1)
+    first, second, third = (CallLifecycle(make_executor(1)) for _ in range(3))
+    manager.submit("a", "key", first, _connect)
+    manager.submit("b", "key", second, _connect)
+    manager.submit("c", "key", third, _connect)
+    assert second.state == QUEUED and third.state == QUEUED
+
+    second.start = lambda connect: False
+    manager.release("a")
+    assert third.state in (CONNECTING, ACTIVE)
+    assert not manager.admission("b").admitted and manager.admission("b").position == 0
+    assert manager.stats()["active"] == 1 and manager.stats()["queued"] == 0
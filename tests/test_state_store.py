@@ -0,0 +1,16 @@
+import os
+
+from state_store import open_store
+
+
+def test_sqlite_urls_follow_the_sqlalchemy_convention(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    relative = open_store("sqlite:///data.db")
+    assert relative.path == "data.db"
+    relative.set("key", {"value": 1})
+    assert os.path.exists(tmp_path / "data.db")
+
+    # tmp_path is absolute, so this is sqlite:////tmp/...
+    absolute = open_store(f"sqlite:///{tmp_path / 'state.db'}")
+    assert absolute.path == str(tmp_path / "state.db")
+    assert open_store("sqlite://").path == "state.db"
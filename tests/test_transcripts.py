@@ -0,0 +1,32 @@
+from metrics import MetricsRegistry
+from transcripts import TranscriptWriter, read_transcript
+
+
+def _say(buffer, *texts):
+    for text in texts:
+        buffer.append({"role": "assistant", "text": text, "final": True})
+
+
+def test_a_failing_file_does_not_hold_up_the_others(tmp_path):
+    writer = TranscriptWriter(str(tmp_path), flush_interval=60)
+    broken, fine = writer.open("broken"), writer.open("fine")
+    # Can't be opened as a file
+    (tmp_path / "broken.jsonl").mkdir()
+    _say(broken, "one", "two")
+    _say(fine, "three")
+
+    assert writer.flush() == 1
+    assert [f["text"] for f in read_transcript(writer.path("fine"))] == ["three"]
+
+    (tmp_path / "broken.jsonl").rmdir()
+    assert writer.flush() == 2
+    assert [f["text"] for f in read_transcript(writer.path("broken"))] == ["one", "two"]
+
+
+def test_overwritten_lines_are_counted(tmp_path):
+    registry = MetricsRegistry()
+    writer = TranscriptWriter(str(tmp_path), flush_interval=60, buffer_size=2, registry=registry)
+    _say(writer.open("interview"), "one", "two", "three", "four", "five")
+    assert writer.flush() == 2
+    assert registry.counter("transcript_dropped_lines") == 3
+    assert "vapi_transcript_dropped_lines_total 3" in registry.render()
@@ -0,0 +1,28 @@
+import ast
+import importlib.util
+import os
+
+import pytest
+
+from vapi_clients import _CALL_RESOURCES
+
+# Private DailyCall attributes that ListeningDailyCall touches besides _CALL_RESOURCES
+PRIVATE_NAMES = ["_DailyCall__app_quit", "_DailyCall__start_event"] + [name for name, _ in _CALL_RESOURCES]
+
+
+def test_private_daily_call_names_exist_in_the_installed_sdk():
+    # Read from source: DailyCall's constructor opens audio devices and a Daily client
+    spec = importlib.util.find_spec("vapi_python")
+    path = os.path.join(os.path.dirname(spec.origin), "daily_call.py") if spec else None
+    if path is None or not os.path.exists(path):
+        pytest.skip("vapi_python with daily_call is not installed")
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    daily_call = next(node for node in tree.body if isinstance(node, ast.ClassDef) and node.name == "DailyCall")
+    assigned = {
+        "_DailyCall" + target.attr
+        for node in ast.walk(daily_call) if isinstance(node, ast.Assign)
+        for target in node.targets
+        if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) and target.value.id == "self"
+    }
+    assert not set(PRIVATE_NAMES) - assigned
@@ -0,0 +1,53 @@
+import asyncio
+import socket
+import time
+
+from tornado.websocket import websocket_connect
+
+from audio_transport import AudioRelay
+from call_executor import ACTIVE, IDLE, CallLifecycle, make_executor
+from call_session import connector
+from voice_backends import BrowserCall
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _Client:
+    """Places every call on an upstream socket that refuses connections."""
+
+    def __init__(self, relay):
+        self.relay = relay
+        self.upstream_url = f"ws://127.0.0.1:{_free_port()}/"
+
+    def create_websocket_call(self, body):
+        return "call-1", self.upstream_url
+
+    def new_call(self, on_message=None, timer=None):
+        return BrowserCall(self, self.relay, on_message, timer)
+
+
+def test_upstream_close_ends_the_call():
+    relay = AudioRelay(port=0, host="127.0.0.1").start()
+    lifecycle = CallLifecycle(make_executor(1))
+    lifecycle.start(connector(_Client(relay), {"assistant": {}}))
+    deadline = time.monotonic() + 5
+    while lifecycle.poll() != ACTIVE:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+    async def browser():
+        page = await websocket_connect(lifecycle.call.browser_url)
+        # The upstream can't be reached, so the relay closes the stream and the page
+        assert await page.read_message() is None
+        return page.close_code
+
+    assert asyncio.run(browser()) == 4410
+    assert lifecycle.call.ended.wait(2)
+    while lifecycle.poll() != IDLE:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert relay.stats()["streams"] == 0
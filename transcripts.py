@@ -0,0 +1,252 @@
+"""Live transcript capture for interview calls.
+
+Transcript messages from the call are parsed into fragments and appended to a
+per-interview ``TranscriptBuffer``, a fixed-size ring that keeps only the most
+recent fragments in memory. One ``TranscriptWriter`` thread per process drains
+every buffer into ``<directory>/<interview_id>.jsonl`` in batches, one write
+and one fsync per interview per flush, so hour-long interviews are kept in full
+on disk while memory stays bounded.
+
+A file starts with an ``{"interview": {...}}`` line holding the interview
+settings, followed by one line per final fragment. Fragments the ring
+overwrites before they reach the disk are counted as
+``transcript_dropped_lines`` in the writer's ``metrics.MetricsRegistry``.
+"""
+
+import json
+import os
+import threading
+import time
+from collections import deque
+
+from call_executor import IDLE, FAILED
+
+DEFAULT_DIRECTORY = "transcripts"
+BUFFER_SIZE = 2000
+FLUSH_INTERVAL = 1.0
+FLUSH_BATCH = 200
+
+
+def parse_message(message):
+    """Turn a call app message into a transcript fragment, or None if it isn't one."""
+    if isinstance(message, (bytes, str)):
+        try:
+            message = json.loads(message)
+        except ValueError:
+            return None
+    if not isinstance(message, dict) or message.get("type") != "transcript":
+        return None
+    text = (message.get("transcript") or "").strip()
+    if not text:
+        return None
+    return {
+        "role": message.get("role", "unknown"),
+        "text": text,
+        "final": message.get("transcriptType", "final") == "final",
+    }
+
+
+class TranscriptBuffer:
+    """Bounded ring of final transcript fragments plus the latest partial per speaker.
+
+    Every fragment gets an increasing ``seq`` so readers can ask for just what
+    they haven't seen. Fragments older than ``maxlen`` are dropped from memory.
+    """
+
+    def __init__(self, maxlen=BUFFER_SIZE, on_append=None):
+        self._fragments = deque(maxlen=maxlen)
+        self._partials = {}
+        self._seq = 0
+        self._lock = threading.Lock()
+        self.on_append = on_append
+
+    @property
+    def seq(self):
+        return self._seq
+
+    def add_message(self, message):
+        fragment = parse_message(message)
+        if fragment is not None:
+            self.append(fragment)
+
+    def append(self, fragment):
+        with self._lock:
+            if not fragment["final"]:
+                self._partials[fragment["role"]] = fragment["text"]
+                return
+            self._partials.pop(fragment["role"], None)
+            self._seq += 1
+            self._fragments.append({
+                "seq": self._seq,
+                "time": time.time(),
+                "role": fragment["role"],
+                "text": fragment["text"],
+            })
+            pending = self._seq
+        if self.on_append is not None:
+            self.on_append(pending)
+
+    def since(self, seq):
+        """Final fragments after ``seq`` that are still in the ring."""
+        with self._lock:
+            first = self._seq - len(self._fragments) + 1
+            return list(self._fragments)[max(seq + 1 - first, 0):]
+
+    def tail(self, count):
+        with self._lock:
+            return list(self._fragments)[-count:]
+
+    def partials(self):
+        with self._lock:
+            return dict(self._partials)
+
+
+class _Stream:
+    def __init__(self, buffer, path, meta):
+        self.buffer = buffer
+        self.path = path
+        self.meta = meta
+        self.flushed = 0
+        self.dropped = 0
+        self.closing = False
+        self.file = None
+
+
+class _Listener:
+    # Compares equal per (writer, interview) so re-attaching doesn't stack listeners
+    def __init__(self, writer, interview_id, lifecycle):
+        self.writer = writer
+        self.interview_id = interview_id
+        self.lifecycle = lifecycle
+
+    def __eq__(self, other):
+        return isinstance(other, _Listener) and (other.writer, other.interview_id) == (self.writer, self.interview_id)
+
+    def __call__(self, state):
+        if state in (IDLE, FAILED):
+            self.writer.close(self.interview_id)
+            self.lifecycle.remove_listener(self)
+
+
+class TranscriptWriter:
+    """Background thread that appends every open transcript to its JSONL file."""
+
+    def __init__(self, directory=DEFAULT_DIRECTORY, flush_interval=FLUSH_INTERVAL,
+                 flush_batch=FLUSH_BATCH, buffer_size=BUFFER_SIZE, registry=None):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.flush_batch = flush_batch
+        self.buffer_size = buffer_size
+        self.registry = registry
+        self._streams = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def open(self, interview_id, meta=None):
+        """Create (or return) the buffer for an interview and start writing it out.
+
+        ``meta`` (e.g. the interview settings) is written as the file's first line.
+        """
+        with self._lock:
+            stream = self._streams.get(interview_id)
+            if stream is None:
+                buffer = TranscriptBuffer(self.buffer_size, on_append=self._on_append)
+                path = os.path.join(self.directory, f"{interview_id}.jsonl")
+                stream = self._streams[interview_id] = _Stream(buffer, path, meta)
+        self._start()
+        return stream.buffer
+
+    def attach(self, interview_id, lifecycle, meta=None):
+        """Open the interview's transcript and close it when the call ends."""
+        buffer = self.open(interview_id, meta)
+        lifecycle.add_listener(_Listener(self, interview_id, lifecycle))
+        return buffer
+
+    def buffer(self, interview_id):
+        with self._lock:
+            stream = self._streams.get(interview_id)
+        return None if stream is None else stream.buffer
+
+    def path(self, interview_id):
+        return os.path.join(self.directory, f"{interview_id}.jsonl")
+
+    def close(self, interview_id):
+        """Flush what is left and forget the interview on the writer thread."""
+        with self._lock:
+            stream = self._streams.get(interview_id)
+            if stream is not None:
+                stream.closing = True
+        self._wake.set()
+
+    def flush(self):
+        """Write every pending fragment. Returns the number of fragments written.
+
+        A transcript whose file can't be written keeps its fragments in the
+        ring for the next flush; the others are written regardless.
+        """
+        with self._lock:
+            streams = list(self._streams.items())
+        written = 0
+        for interview_id, stream in streams:
+            try:
+                written += self._flush_stream(stream)
+            except OSError:
+                # Disk trouble: retry next round, and keep the file open until then
+                continue
+            if stream.closing:
+                if stream.file is not None:
+                    stream.file.close()
+                with self._lock:
+                    self._streams.pop(interview_id, None)
+        return written
+
+    def _flush_stream(self, stream):
+        fragments = stream.buffer.since(stream.flushed)
+        if not fragments:
+            return 0
+        # Fragments the ring overwrote before they could be written
+        dropped = fragments[0]["seq"] - stream.flushed - 1
+        if dropped:
+            stream.dropped += dropped
+            if self.registry is not None:
+                self.registry.count("transcript_dropped_lines", dropped)
+            stream.flushed += dropped
+        if stream.file is None:
+            os.makedirs(self.directory, exist_ok=True)
+            stream.file = open(stream.path, "a", encoding="utf-8")
+            if stream.meta is not None and stream.file.tell() == 0:
+                stream.file.write(json.dumps({"interview": stream.meta}) + "\n")
+        stream.file.write("".join(json.dumps(f) + "\n" for f in fragments))
+        stream.file.flush()
+        os.fsync(stream.file.fileno())
+        stream.flushed = fragments[-1]["seq"]
+        return len(fragments)
+
+    def _on_append(self, seq):
+        # Flush early when a burst of fragments builds up
+        if seq % self.flush_batch == 0:
+            self._wake.set()
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+
+            def run():
+                while True:
+                    self._wake.wait(self.flush_interval)
+                    self._wake.clear()
+                    self.flush()
+
+            self._thread = threading.Thread(target=run, name="transcript-writer", daemon=True)
+            self._thread.start()
+
+
+def read_transcript(path):
+    """All fragments saved for an interview, oldest first."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    return [line for line in lines if "seq" in line]
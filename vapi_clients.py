@@ -0,0 +1,373 @@
+"""Process-wide pool of warm Vapi clients, shared by every Streamlit session.
+
+``vapi_python.Vapi`` opens a new HTTP connection for every call it creates and
+initialises the Daily SDK on the first click. The pool keeps one keep-alive
+HTTP session per API key, checks it in the background, and hands out
+lightweight ``PooledVapi`` call objects with the same ``start``/``stop`` API.
+
+``vapi_python`` and the Daily/audio stack behind it are only imported when a
+client is warmed or a call starts, never when this module is imported.
+
+``vapi_python``'s ``DailyCall.leave()`` keeps the call's audio streams, PyAudio
+instance and native Daily client alive, and hangs if the call never finished
+joining. ``PooledVapi.stop`` works around both, so a long-running server does
+not accumulate them. The workaround reaches into ``DailyCall``'s private
+attributes, so calls refuse to start on a ``vapi_python`` version it hasn't
+been checked against (``VAPI_PYTHON_VERSIONS``).
+"""
+
+import functools
+import importlib.metadata
+import json
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_API_URL = "https://api.vapi.ai"
+DEFAULT_POOL_SIZE = 32
+HEALTH_CHECK_INTERVAL = 60
+REQUEST_TIMEOUT = 10
+
+# Statuses worth retrying: rate limited or a server-side failure
+TRANSIENT_STATUSES = (408, 429, 500, 502, 503, 504)
+
+# vapi_python releases whose DailyCall internals the names below were checked against
+VAPI_PYTHON_VERSIONS = ("0.1.9",)
+
+# Private attributes of vapi_python's DailyCall that leave() does not free, and how to free them
+_CALL_RESOURCES = [
+    ("_DailyCall__input_audio_stream", "close"),
+    ("_DailyCall__output_audio_stream", "close"),
+    ("_DailyCall__audio_interface", "terminate"),
+    ("_DailyCall__call_client", "release"),
+]
+
+_sdk_lock = threading.Lock()
+_sdk_ready = False
+
+
+def warm_sdk():
+    """Initialise the Daily SDK once per process."""
+    global _sdk_ready
+    with _sdk_lock:
+        if not _sdk_ready:
+            import daily
+            daily.Daily.init()
+            _sdk_ready = True
+
+
+class VapiError(Exception):
+    """Error response from the Vapi API. ``retry_after`` is in seconds, if the API sent one."""
+
+    def __init__(self, message, status=None, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+    @property
+    def transient(self):
+        return self.status in TRANSIENT_STATUSES
+
+
+def _vapi_python_version():
+    try:
+        return importlib.metadata.version("vapi_python")
+    except importlib.metadata.PackageNotFoundError:
+        return "(unknown version)"
+
+
+@functools.lru_cache(maxsize=None)
+def _listening_call_class():
+    # Built on first use so the Daily/audio stack is still imported lazily
+    from vapi_python import daily_call
+
+    version = _vapi_python_version()
+    if version not in VAPI_PYTHON_VERSIONS:
+        raise RuntimeError(
+            f"vapi_python {version} is not supported: PooledVapi frees DailyCall's private attributes, "
+            f"which were checked against vapi_python {', '.join(VAPI_PYTHON_VERSIONS)}. Install a supported "
+            "version, or check _CALL_RESOURCES against the new one and add it to VAPI_PYTHON_VERSIONS."
+        )
+
+    class ListeningDailyCall(daily_call.DailyCall):
+        """``DailyCall`` that hands every app message (transcripts, status updates) to a callback."""
+
+        def __init__(self, on_message):
+            self._on_message = on_message
+            super().__init__()
+
+        def on_app_message(self, message, sender):
+            self._on_message(message)
+
+        def send_app_message(self, text):
+            # DailyCall has no way to send one; Vapi expects the message as a JSON string
+            self._DailyCall__call_client.send_app_message(text)
+
+        def leave(self):
+            # The audio threads wait for the join to complete; wake them so they can exit if it never did
+            self._DailyCall__app_quit = True
+            start_event = getattr(self, "_DailyCall__start_event", None)
+            if start_event is not None:
+                start_event.set()
+            super().leave()
+
+        def release(self):
+            """Free the audio streams, PyAudio and the Daily client. Raises the first error after trying them all."""
+            error = None
+            for name, method in _CALL_RESOURCES:
+                resource = getattr(self, name, None)
+                if resource is None or not hasattr(resource, method):
+                    continue
+                try:
+                    getattr(resource, method)()
+                except Exception as e:
+                    error = error or e
+                setattr(self, name, None)
+            if error is not None:
+                raise error
+
+    return ListeningDailyCall
+
+
+class VapiClient:
+    """Warm HTTP session for one API key."""
+
+    def __init__(self, api_key, api_url=DEFAULT_API_URL, pool_size=DEFAULT_POOL_SIZE, audio_sdk=True):
+        self.api_key = api_key
+        self.api_url = api_url
+        self.pool_size = pool_size
+        # False when calls carry their audio some other way than the Daily SDK
+        self.audio_sdk = audio_sdk
+        self.healthy = None
+        self.last_error = None
+        self.last_check = 0.0
+        self._checking = False
+        self._lock = threading.Lock()
+        self.session = self._new_session()
+
+    def _new_session(self):
+        session = requests.Session()
+        session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+        session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size))
+        session.headers.update({
+            'Authorization': 'Bearer ' + self.api_key,
+            'Content-Type': 'application/json'
+        })
+        return session
+
+    def health_check(self):
+        """Ping the API over the pooled connection and record the result."""
+        try:
+            response = self.session.get(f"{self.api_url}/assistant", params={"limit": 1}, timeout=REQUEST_TIMEOUT)
+            self.healthy = response.status_code == 200
+            self.last_error = None if self.healthy else f"HTTP {response.status_code}"
+        except requests.RequestException as e:
+            self.healthy = False
+            self.last_error = str(e)
+            # Drop possibly broken keep-alive connections
+            with self._lock:
+                old, self.session = self.session, self._new_session()
+            old.close()
+        self.last_check = time.time()
+        return self.healthy
+
+    def warm(self):
+        if self.audio_sdk:
+            warm_sdk()
+        return self.health_check()
+
+    def refresh_async(self, warm=False):
+        """Run ``warm`` or ``health_check`` on a daemon thread unless one is already running."""
+        with self._lock:
+            if self._checking:
+                return None
+            self._checking = True
+
+        def run():
+            try:
+                self.warm() if warm else self.health_check()
+            finally:
+                self._checking = False
+
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def _create(self, path, body):
+        response = self.session.post(f"{self.api_url}{path}", json=body, timeout=REQUEST_TIMEOUT)
+        try:
+            data = response.json()
+        except ValueError:
+            data = {}
+        if response.status_code != 201:
+            retry_after = response.headers.get("Retry-After")
+            raise VapiError(
+                f"Error: {data.get('message', response.status_code)}", status=response.status_code,
+                retry_after=float(retry_after) if retry_after and retry_after.isdigit() else None
+            )
+        return data
+
+    def create_web_call(self, body):
+        data = self._create("/call/web", body)
+        return data.get('id'), data.get('webCallUrl')
+
+    def create_websocket_call(self, body):
+        """Create a call whose audio flows over a WebSocket; returns the call ID and the socket's URL."""
+        data = self._create("/call", body)
+        return data.get('id'), (data.get('transport') or {}).get('websocketCallUrl')
+
+    def create_phone_call(self, body):
+        """Place an outbound phone call; returns the call ID."""
+        return self._create("/call", body).get('id')
+
+    def new_call(self, on_message=None, timer=None):
+        return PooledVapi(self, on_message, timer)
+
+    def close(self):
+        self.session.close()
+
+
+def call_body(assistant_id=None, assistant=None, assistant_overrides=None):
+    """Request body for a call to a saved assistant (``assistant_id``) or an inline one."""
+    if assistant_id:
+        return {'assistantId': assistant_id, 'assistantOverrides': assistant_overrides}
+    return {'assistant': assistant, 'assistantOverrides': assistant_overrides}
+
+
+class PooledVapi:
+    """Drop-in replacement for ``vapi_python.Vapi`` that uses a warm ``VapiClient``.
+
+    ``on_message``, if given, is called on the SDK's event thread with every
+    message the assistant sends during the call. ``timer`` (a
+    ``metrics.CallTimer``) records the start, first message and stop phases.
+    If ``start`` raises, nothing is left running; ``stop`` may be called any
+    number of times, from any thread.
+    """
+
+    def __init__(self, client, on_message=None, timer=None):
+        self.client = client
+        self.on_message = on_message
+        self.timer = timer
+        self.call_id = None
+        self._call = None
+        self._lock = threading.Lock()
+
+    def start(self, *, assistant_id=None, assistant=None, assistant_overrides=None):
+        body = call_body(assistant_id, assistant, assistant_overrides)
+        if self.timer is not None:
+            self.timer.start()
+        started = time.perf_counter()
+        # Before the call is created, so an unsupported SDK fails without placing one
+        call_class = _listening_call_class()
+        call_id, web_call_url = self.client.create_web_call(body)
+        if not web_call_url:
+            raise Exception("Error: Unable to create call.")
+
+        warm_sdk()
+        self.call_id = call_id
+        # Held through the join, so a concurrent stop waits for it rather than releasing the call mid-join
+        with self._lock:
+            try:
+                self._call = call_class(self._handle_message)
+                self._call.join(web_call_url)
+                error = None
+            except BaseException as e:
+                error = e
+        if error is not None:
+            try:
+                self.stop()
+            except Exception:
+                # The join error is the one worth reporting
+                pass
+            raise error
+        if self.timer is not None:
+            self.timer.observe("start", time.perf_counter() - started)
+
+    def _handle_message(self, message):
+        if self.timer is not None:
+            self.timer.message(message)
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def send(self, message):
+        """Send a control message (e.g. ``add-message``) to the assistant. Returns False if the call is over."""
+        with self._lock:
+            call = self._call
+        if call is None:
+            return False
+        call.send_app_message(json.dumps(message))
+        return True
+
+    def stop(self):
+        with self._lock:
+            call, self._call = self._call, None
+        if call is None:
+            return
+        started = time.perf_counter()
+        error = None
+        try:
+            call.leave()
+        except Exception as e:
+            error = e
+        # Released even if leaving failed; a leave() error takes precedence over a release() one
+        try:
+            call.release()
+        except Exception as e:
+            error = error or e
+        if error is not None:
+            raise error
+        if self.timer is not None:
+            self.timer.observe("stop", time.perf_counter() - started)
+
+
+class VapiClientPool:
+    """Keeps one warm ``VapiClient`` per API key for the whole process."""
+
+    # Calls can start from an assistant created server-side (see ``assistant_cache``)
+    remote_assistants = True
+    # Audio goes through the server's devices via Daily, not the candidate's browser
+    browser_audio = False
+
+    def __init__(self, api_url=DEFAULT_API_URL, pool_size=DEFAULT_POOL_SIZE,
+                 health_check_interval=HEALTH_CHECK_INTERVAL, audio_sdk=True):
+        self.api_url = api_url
+        self.pool_size = pool_size
+        self.health_check_interval = health_check_interval
+        self.audio_sdk = audio_sdk
+        self._clients = {}
+        self._lock = threading.Lock()
+
+    def _client(self, api_key):
+        with self._lock:
+            client = self._clients.get(api_key)
+            created = client is None
+            if created:
+                client = self._clients[api_key] = VapiClient(api_key, self.api_url, self.pool_size, self.audio_sdk)
+        return client, created
+
+    def get(self, api_key):
+        client, created = self._client(api_key)
+        if created or time.time() - client.last_check > self.health_check_interval:
+            # Never put a health check on the start path
+            client.refresh_async(warm=created)
+        return client
+
+    def warm_async(self, api_key):
+        client, _ = self._client(api_key)
+        return client.refresh_async(warm=True)
+
+    def status(self):
+        with self._lock:
+            clients = list(self._clients.values())
+        return [
+            {"healthy": c.healthy, "last_check": c.last_check, "last_error": c.last_error}
+            for c in clients
+        ]
+
+    def close(self):
+        with self._lock:
+            clients, self._clients = list(self._clients.values()), {}
+        for client in clients:
+            client.close()
@@ -0,0 +1,389 @@
+"""Voice backends: what actually places the calls both apps start.
+
+A backend has the ``VapiClientPool`` API: ``get(api_key)`` returns a client
+whose ``new_call(on_message, timer)`` makes a call object with
+``start(assistant_id=..., assistant=..., assistant_overrides=...)`` and
+``stop()``. ``open_backend`` picks one from a URL:
+
+- ``vapi://`` (the default): real calls through Vapi and the Daily SDK
+- ``simulated://data/interviews?speedup=50``: ``SimulatedVoice``, which
+  replays scripted or recorded interviews in process, with no network or
+  audio, at the given speed-up
+- ``browser://0.0.0.0:8765?public_url=wss://host/relay&max_streams=100``:
+  ``BrowserAudioVoice``, real Vapi calls over Vapi's WebSocket transport,
+  with audio relayed to and from the candidate's browser by an
+  ``audio_transport.AudioRelay`` listening on the given address.
+  ``public_url`` is where browsers reach the relay. Servers need no audio
+  devices.
+
+The simulator sends the same app messages a real call does (status updates,
+speech updates, partial and final transcripts), so transcripts, metrics and
+history are exercised as in a live interview.
+"""
+
+import heapq
+import itertools
+import json
+import os
+import secrets
+import threading
+import time
+import uuid
+from collections import namedtuple
+from urllib.parse import parse_qs, urlparse
+
+from audio_transport import AUDIO_FORMAT, DEFAULT_MAX_STREAMS, DEFAULT_PORT, AudioRelay
+from vapi_clients import DEFAULT_API_URL, VapiClientPool, call_body
+import metrics
+
+DEFAULT_SCRIPTS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "interviews")
+# Simulated time to connect the call
+CONNECT_SECONDS = 1.0
+# Pacing of scripted lines without timings
+WORDS_PER_SECOND = 2.5
+TURN_GAP = 0.8
+# Partial transcripts sent while each line is spoken
+PARTIALS_PER_TURN = 3
+
+# One spoken line; ``offset`` is seconds from the start of the call
+Turn = namedtuple("Turn", ["offset", "duration", "role", "text"])
+Script = namedtuple("Script", ["name", "turns"])
+
+
+def _speaking_time(text):
+    return max(len(text.split()) / WORDS_PER_SECOND, 0.5)
+
+
+def load_script(path):
+    """Read a script: a JSONL file of ``{"role", "text"}`` lines, as written by ``TranscriptWriter``.
+
+    Recorded transcripts keep their timing (``time`` is when a line was
+    finished). Scripted lines may give ``at`` (offset in seconds) and
+    ``duration``; otherwise each starts ``TURN_GAP`` after the previous one
+    and lasts as long as it takes to say.
+    """
+    lines = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                if item.get("text") and item.get("role"):
+                    lines.append(item)
+    turns, end, origin = [], 0.0, None
+    for item in lines:
+        duration = item.get("duration") or _speaking_time(item["text"])
+        if "at" in item:
+            offset = float(item["at"])
+        elif "time" in item:
+            # Recorded: the line ended at ``time``; it can't have started before the previous one ended
+            origin = item["time"] - duration if origin is None else origin
+            finished = item["time"] - origin
+            offset = max(finished - duration, end)
+            duration = finished - offset
+        else:
+            offset = end + TURN_GAP if turns else 0.0
+        turns.append(Turn(offset, duration, item["role"], item["text"]))
+        end = offset + duration
+    return Script(os.path.splitext(os.path.basename(path))[0], turns)
+
+
+def load_scripts(path):
+    """Scripts from a JSONL file or every ``.jsonl`` file in a directory."""
+    if os.path.isdir(path):
+        paths = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(".jsonl"))
+    else:
+        paths = [path]
+    scripts = [script for script in map(load_script, paths) if script.turns]
+    if not scripts:
+        raise ValueError(f"No interview scripts in {path}")
+    return scripts
+
+
+def events(script):
+    """``(offset, message)`` pairs a call replaying ``script`` sends, in order."""
+    yield 0.0, {"type": "status-update", "status": "in-progress"}
+    end = 0.0
+    for turn in script.turns:
+        yield turn.offset, {"type": "speech-update", "status": "started", "role": turn.role}
+        words = turn.text.split()
+        for i in range(1, PARTIALS_PER_TURN + 1):
+            # Cumulative partials, as the transcriber sends them
+            yield turn.offset + turn.duration * i / (PARTIALS_PER_TURN + 1), {
+                "type": "transcript", "role": turn.role, "transcriptType": "partial",
+                "transcript": " ".join(words[:max(len(words) * i // (PARTIALS_PER_TURN + 1), 1)]),
+            }
+        end = turn.offset + turn.duration
+        yield end, {"type": "transcript", "role": turn.role, "transcriptType": "final", "transcript": turn.text}
+        yield end, {"type": "speech-update", "status": "stopped", "role": turn.role}
+    yield end + TURN_GAP, {"type": "status-update", "status": "ended", "endedReason": "assistant-ended-call"}
+
+
+class _Player:
+    """One thread that delivers every simulated call's next message when it falls due."""
+
+    def __init__(self):
+        self._heap = []
+        self._order = itertools.count()
+        self._ready = threading.Condition()
+        self._thread = None
+
+    def schedule(self, due, call):
+        with self._ready:
+            heapq.heappush(self._heap, (due, next(self._order), call))
+            self._ready.notify()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="voice-simulator", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self._ready:
+                while not self._heap or self._heap[0][0] > time.monotonic():
+                    self._ready.wait(self._heap[0][0] - time.monotonic() if self._heap else None)
+                _, _, call = heapq.heappop(self._heap)
+            try:
+                call._advance()
+            except Exception:
+                # A failing message handler must not hold up every other call's playback
+                pass
+
+
+class SimulatedCall:
+    """A call that plays back a script instead of connecting to anyone.
+
+    ``ended`` is set once the call is over, because the script ran out or
+    ``stop`` was called.
+    """
+
+    def __init__(self, voice, on_message=None, timer=None):
+        self.voice = voice
+        self.on_message = on_message
+        self.timer = timer
+        self.call_id = None
+        self.script = None
+        self.ended = threading.Event()
+        # Control messages the app sent to the assistant, in order
+        self.sent = []
+        self._events = None
+        self._next = None
+        self._origin = None
+        self._stopped = False
+        self._lock = threading.Lock()
+
+    def start(self, *, assistant_id=None, assistant=None, assistant_overrides=None):
+        if self.timer is not None:
+            self.timer.start()
+        started = time.perf_counter()
+        if self.voice.connect_seconds:
+            time.sleep(self.voice.connect_seconds / self.voice.speedup)
+        self.call_id = uuid.uuid4().hex
+        self.script = self.voice.next_script()
+        self._events = events(self.script)
+        self._origin = time.monotonic()
+        if self.timer is not None:
+            self.timer.observe("start", time.perf_counter() - started)
+        with self._lock:
+            self._schedule()
+
+    def _schedule(self):
+        # Caller holds the lock
+        self._next = next(self._events, None)
+        if self._next is None:
+            self.ended.set()
+            return
+        self.voice.player.schedule(self._origin + self._next[0] / self.voice.speedup, self)
+
+    def _advance(self):
+        with self._lock:
+            if self._stopped:
+                return
+            _, message = self._next
+            try:
+                if self.timer is not None:
+                    self.timer.message(message)
+                if self.on_message is not None:
+                    self.on_message(message)
+            finally:
+                self._schedule()
+
+    def send(self, message):
+        with self._lock:
+            if self._stopped:
+                return False
+            self.sent.append(message)
+        return True
+
+    def stop(self):
+        started = time.perf_counter()
+        with self._lock:
+            if self._stopped:
+                return
+            self._stopped = True
+        self.ended.set()
+        if self.timer is not None:
+            self.timer.observe("stop", time.perf_counter() - started)
+
+
+class SimulatedVoice:
+    """In-process stand-in for ``VapiClientPool`` that replays ``scripts``, ``speedup`` times faster.
+
+    Calls take the scripts in turn. It is its own client: ``get`` returns
+    the backend whatever the key.
+    """
+
+    # Assistants can't be created server-side, so calls always carry the assistant inline
+    remote_assistants = False
+    browser_audio = False
+
+    def __init__(self, scripts, speedup=1.0, connect_seconds=CONNECT_SECONDS):
+        if speedup <= 0:
+            raise ValueError("speedup must be positive")
+        self.scripts = scripts
+        self.speedup = speedup
+        self.connect_seconds = connect_seconds
+        self.player = _Player()
+        self._scripts = itertools.cycle(scripts)
+        self._lock = threading.Lock()
+
+    def next_script(self):
+        with self._lock:
+            return next(self._scripts)
+
+    def get(self, api_key):
+        return self
+
+    def new_call(self, on_message=None, timer=None):
+        return SimulatedCall(self, on_message, timer)
+
+    def warm_async(self, api_key):
+        return None
+
+    def status(self):
+        return [{"healthy": True, "last_check": time.time(), "last_error": None}]
+
+    def close(self):
+        pass
+
+
+class BrowserCall:
+    """Vapi call over its WebSocket transport, with the audio relayed to and from the candidate's browser.
+
+    Once started, ``browser_url`` is where the page's microphone widget
+    connects. ``ended`` is set when the call's audio stream closes, from
+    either end; ``CallLifecycle.poll`` then ends the call. A page that merely
+    disconnects doesn't close the stream, since it reconnects.
+    """
+
+    def __init__(self, client, relay, on_message=None, timer=None):
+        self.client = client
+        self.relay = relay
+        self.on_message = on_message
+        self.timer = timer
+        self.call_id = None
+        self.browser_url = None
+        self.ended = threading.Event()
+        self._token = None
+        self._lock = threading.Lock()
+
+    def start(self, *, assistant_id=None, assistant=None, assistant_overrides=None):
+        body = call_body(assistant_id, assistant, assistant_overrides)
+        body["transport"] = {"provider": "vapi.websocket", "audioFormat": AUDIO_FORMAT}
+        if self.timer is not None:
+            self.timer.start()
+        started = time.perf_counter()
+        # Reserve the relay's buffers first, so a full relay fails the start before a call is placed
+        token = secrets.token_urlsafe(24)
+        stream = self.relay.register(token, on_message=self._handle_message, on_close=self.ended.set)
+        with self._lock:
+            self._token = token
+        try:
+            self.call_id, socket_url = self.client.create_websocket_call(body)
+            if not socket_url:
+                raise Exception("Error: Unable to create call.")
+        except BaseException:
+            self.stop()
+            raise
+        stream.upstream_url = socket_url
+        self.browser_url = self.relay.url(token)
+        if self.timer is not None:
+            self.timer.observe("start", time.perf_counter() - started)
+
+    def _handle_message(self, message):
+        if self.timer is not None:
+            self.timer.message(message)
+        if self.on_message is not None:
+            self.on_message(message)
+
+    def send(self, message):
+        """Send a control message to the assistant over the call's socket. Returns False if the call is over."""
+        with self._lock:
+            token = self._token
+        return token is not None and self.relay.send(token, json.dumps(message))
+
+    def stop(self):
+        with self._lock:
+            token, self._token = self._token, None
+        if token is None:
+            return
+        started = time.perf_counter()
+        self.relay.unregister(token)
+        self.ended.set()
+        if self.timer is not None:
+            self.timer.observe("stop", time.perf_counter() - started)
+
+
+class _BrowserAudioClient:
+    """A warm ``VapiClient`` whose calls are ``BrowserCall``s."""
+
+    def __init__(self, client, relay):
+        self.client = client
+        self.relay = relay
+
+    @property
+    def session(self):
+        return self.client.session
+
+    def create_websocket_call(self, body):
+        return self.client.create_websocket_call(body)
+
+    def new_call(self, on_message=None, timer=None):
+        return BrowserCall(self, self.relay, on_message, timer)
+
+
+class BrowserAudioVoice(VapiClientPool):
+    """``VapiClientPool`` for calls whose audio is the candidate's browser, relayed by ``relay``."""
+
+    browser_audio = True
+
+    def __init__(self, relay, api_url=DEFAULT_API_URL):
+        # No Daily SDK or audio devices involved
+        super().__init__(api_url=api_url, audio_sdk=False)
+        self.relay = relay
+
+    def get(self, api_key):
+        return _BrowserAudioClient(super().get(api_key), self.relay)
+
+
+def open_backend(url, api_url=None):
+    """Create a backend from a ``vapi://``, ``simulated://[scripts path][?speedup=N]`` or ``browser://`` URL.
+
+    ``api_url`` defaults to ``DEFAULT_API_URL``.
+    """
+    api_url = api_url or DEFAULT_API_URL
+    parsed = urlparse(url)
+    if parsed.scheme == "vapi":
+        return VapiClientPool(api_url=api_url)
+    if parsed.scheme == "simulated":
+        query = parse_qs(parsed.query)
+        scripts = load_scripts(parsed.netloc + parsed.path or DEFAULT_SCRIPTS)
+        return SimulatedVoice(scripts, speedup=float(query.get("speedup", ["1"])[0]))
+    if parsed.scheme == "browser":
+        query = parse_qs(parsed.query)
+        relay = AudioRelay(
+            port=DEFAULT_PORT if parsed.port is None else parsed.port, host=parsed.hostname or "0.0.0.0",
+            public_url=query.get("public_url", [None])[0],
+            max_streams=int(query.get("max_streams", [DEFAULT_MAX_STREAMS])[0]),
+            registry=metrics.registry,
+        )
+        return BrowserAudioVoice(relay.start(), api_url)
+    raise ValueError(f"Unsupported voice backend: {url}")
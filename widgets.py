@@ -0,0 +1,264 @@
+"""Small UI pieces shared by the Streamlit entry points."""
+
+import json
+
+import streamlit as st
+import streamlit.components.v1 as components
+
+from call_executor import IDLE, QUEUED, CONNECTING, ACTIVE, STOPPING, FAILED
+from call_state import LIVE_STATES
+
+# Seconds between status checks while a call is queued, running or ending
+POLL_INTERVAL = 0.5
+# Seconds between checks on a call that runs on another replica, through the shared state store
+REMOTE_POLL_INTERVAL = 3
+# Seconds between live transcript refreshes, and how many lines to show
+TRANSCRIPT_POLL_INTERVAL = 1
+TRANSCRIPT_LINES = 100
+
+ROLE_LABELS = {"assistant": "Interviewer", "user": "You"}
+
+STATUS_LABELS = {
+    IDLE: ("INACTIVE", "status-inactive"),
+    QUEUED: ("QUEUED", "status-pending"),
+    CONNECTING: ("CONNECTING...", "status-pending"),
+    ACTIVE: ("ACTIVE", "status-active"),
+    STOPPING: ("ENDING...", "status-pending"),
+    FAILED: ("FAILED", "status-inactive"),
+}
+
+TIMER_HTML = """
+<div id="call-timer" style="font-family: sans-serif; font-size: 15px; color: #4CAF50; font-weight: bold;"></div>
+<script>
+    const startedAt = {started_at_ms};
+    const timer = document.getElementById("call-timer");
+    function tick() {{
+        const seconds = Math.max(0, Math.floor((Date.now() - startedAt) / 1000));
+        const mm = String(Math.floor(seconds / 60)).padStart(2, "0");
+        const ss = String(seconds % 60).padStart(2, "0");
+        timer.textContent = "{label}" + mm + ":" + ss;
+    }}
+    tick();
+    setInterval(tick, 1000);
+</script>
+"""
+
+
+# Microphone capture and playback for calls whose audio runs through the browser (see audio_transport).
+# Audio worklets turn the microphone into 20 ms frames of 16 kHz PCM16 and play the interviewer's
+# audio from a one-second ring. If the socket falls behind, new frames are dropped rather than queued.
+BROWSER_AUDIO_HTML = """
+<div id="audio-status" style="font-family: sans-serif; font-size: 14px; color: #555;">Starting microphone...</div>
+<button id="audio-resume" style="display: none;">Enable Audio</button>
+<script>
+const socketUrl = __SOCKET_URL__;
+const SAMPLE_RATE = 16000;
+const FRAME_SAMPLES = 320;
+// Half a second of audio waiting to be sent
+const MAX_BUFFERED_BYTES = SAMPLE_RATE;
+const status = document.getElementById("audio-status");
+const resume = document.getElementById("audio-resume");
+const processors = `
+class Capture extends AudioWorkletProcessor {
+  constructor() { super(); this.frame = new Int16Array(${FRAME_SAMPLES}); this.filled = 0; }
+  process(inputs) {
+    const input = inputs[0][0];
+    if (input) {
+      for (let i = 0; i < input.length; i++) {
+        const s = Math.max(-1, Math.min(1, input[i]));
+        this.frame[this.filled++] = s < 0 ? s * 0x8000 : s * 0x7fff;
+        if (this.filled === this.frame.length) {
+          this.port.postMessage(this.frame.buffer, [this.frame.buffer]);
+          this.frame = new Int16Array(${FRAME_SAMPLES});
+          this.filled = 0;
+        }
+      }
+    }
+    return true;
+  }
+}
+class Playback extends AudioWorkletProcessor {
+  constructor() {
+    super();
+    this.ring = new Float32Array(${SAMPLE_RATE});
+    this.read = 0; this.write = 0; this.count = 0;
+    this.port.onmessage = (event) => {
+      const pcm = new Int16Array(event.data);
+      for (let i = 0; i < pcm.length; i++) {
+        this.ring[this.write] = pcm[i] / 0x8000;
+        this.write = (this.write + 1) % this.ring.length;
+        if (this.count === this.ring.length) { this.read = (this.read + 1) % this.ring.length; } else { this.count++; }
+      }
+    };
+  }
+  process(inputs, outputs) {
+    const out = outputs[0][0];
+    for (let i = 0; i < out.length; i++) {
+      if (this.count) { out[i] = this.ring[this.read]; this.read = (this.read + 1) % this.ring.length; this.count--; }
+      else { out[i] = 0; }
+    }
+    return true;
+  }
+}
+registerProcessor("capture", Capture);
+registerProcessor("playback", Playback);
+`;
+
+async function run() {
+  const context = new AudioContext({sampleRate: SAMPLE_RATE});
+  await context.audioWorklet.addModule(URL.createObjectURL(new Blob([processors], {type: "application/javascript"})));
+  const microphone = await navigator.mediaDevices.getUserMedia(
+    {audio: {channelCount: 1, echoCancellation: true, noiseSuppression: true}});
+  const capture = new AudioWorkletNode(context, "capture");
+  const playback = new AudioWorkletNode(context, "playback");
+  context.createMediaStreamSource(microphone).connect(capture);
+  playback.connect(context.destination);
+  if (context.state === "suspended") {
+    resume.style.display = "inline";
+    resume.onclick = () => { context.resume(); resume.style.display = "none"; };
+  }
+
+  let socket = null;
+  let dropped = 0;
+  function connect() {
+    socket = new WebSocket(socketUrl);
+    socket.binaryType = "arraybuffer";
+    socket.onopen = () => { status.textContent = "🎙️ Microphone connected"; };
+    socket.onmessage = (event) => {
+      if (event.data instanceof ArrayBuffer) playback.port.postMessage(event.data, [event.data]);
+    };
+    socket.onclose = (event) => {
+      if (event.code >= 4400) {
+        // The call ended or another tab took over its audio
+        status.textContent = "Call audio ended";
+        microphone.getTracks().forEach((track) => track.stop());
+        context.close();
+        return;
+      }
+      status.textContent = "Reconnecting audio...";
+      setTimeout(connect, 1000);
+    };
+  }
+  capture.port.onmessage = (event) => {
+    if (!socket || socket.readyState !== WebSocket.OPEN) return;
+    if (socket.bufferedAmount > MAX_BUFFERED_BYTES) {
+      dropped++;
+      status.textContent = "🎙️ Microphone connected (slow network, " + dropped + " frames dropped)";
+      return;
+    }
+    socket.send(event.data);
+  };
+  connect();
+}
+run().catch((error) => { status.textContent = "Microphone unavailable: " + error.message; });
+</script>
+"""
+
+
+def browser_audio(socket_url):
+    """Microphone and speaker for a call whose audio is relayed through the page, at ``socket_url``."""
+    components.html(BROWSER_AUDIO_HTML.replace("__SOCKET_URL__", json.dumps(socket_url)), height=40)
+
+
+def call_timer(started_at, label="Elapsed: "):
+    """Live elapsed-time counter for a call started at ``started_at`` (epoch seconds).
+
+    The counter ticks in the browser, so it costs no script reruns on the server.
+    """
+    if started_at is None:
+        return
+    components.html(TIMER_HTML.format(started_at_ms=int(started_at * 1000), label=label), height=28)
+
+
+def call_status(label, state):
+    status_text, status_class = STATUS_LABELS[state]
+    st.markdown(f"{label}: <span class='{status_class}'>{status_text}</span>", unsafe_allow_html=True)
+
+
+def _end_polling():
+    # Streamlit only cancels a fragment's run_every timer on a full run, which also redraws the
+    # parts of the page that depend on the call (transcript note, start button, history)
+    st.rerun()
+
+
+@st.fragment(run_every=POLL_INTERVAL)
+def live_call(label, lifecycle, manager, session_id, stop_label, on_stop):
+    """Status, progress and stop/cancel control of a call in progress, polled while it lasts.
+
+    The fragment redraws itself as the call is admitted, connects and ends, and
+    reruns the page once it is over (also when the far side hangs up or the
+    call is stopped at its time limit), which stops the polling.
+    """
+    state = lifecycle.poll()
+    if state not in LIVE_STATES:
+        _end_polling()
+    call_status(label, state)
+    if state == QUEUED:
+        admission = manager.admission(session_id)
+        minutes = max(1, round(admission.estimated_wait / 60))
+        st.info(f"All call slots on this server are busy. You are number {admission.position} in line "
+                f"(about {minutes} min). Your call will start automatically.")
+    elif state == CONNECTING:
+        st.caption("Connecting...")
+    elif state == STOPPING:
+        st.caption("Ending the call...")
+    elif state == ACTIVE:
+        call_timer(lifecycle.started_at)
+        browser_url = getattr(lifecycle.call, "browser_url", None)
+        if browser_url:
+            browser_audio(browser_url)
+        st.button(stop_label, on_click=on_stop, type="primary", use_container_width=True)
+    if state in (QUEUED, CONNECTING):
+        st.button("Cancel", on_click=on_stop, use_container_width=True)
+
+
+@st.fragment(run_every=REMOTE_POLL_INTERVAL)
+def remote_interview(call_state, interview_id):
+    """Status and stop control for an interview whose call runs on another replica.
+
+    Reruns the page once the call ends or its replica stops responding.
+    """
+    record = call_state.get(interview_id)
+    if record is None or record["stale"] or record["state"] not in LIVE_STATES:
+        _end_polling()
+    call_status("Interview Status", record["state"])
+    st.caption(f"This interview is running on server {record['replica']}.")
+    if record["state"] == ACTIVE:
+        call_timer(record["started_at"])
+    if record["stop_requested"]:
+        st.caption("Ending the call...")
+    else:
+        st.button("End Interview", on_click=call_state.request_stop, args=(interview_id,),
+                  type="primary", use_container_width=True)
+
+
+@st.fragment(run_every=TRANSCRIPT_POLL_INTERVAL)
+def live_transcript(buffer, lines=TRANSCRIPT_LINES):
+    """The latest lines of a call's ``TranscriptBuffer``; only this fragment reruns as they arrive."""
+    fragments = buffer.tail(lines)
+    partials = buffer.partials()
+    if not fragments and not partials:
+        st.caption("The transcript will appear here once the conversation starts.")
+        return
+    entries = [f"**{ROLE_LABELS.get(f['role'], f['role'])}:** {f['text']}" for f in fragments]
+    # Words still being spoken
+    entries += [f"**{ROLE_LABELS.get(role, role)}:** _{text}..._" for role, text in partials.items()]
+    with st.container(height=300):
+        st.markdown("\n\n".join(entries))
+
+
+def call_controls(label, lifecycle, manager, session_id, start_label, stop_label, on_start, on_stop, idle_note=None):
+    """Status, progress and start/stop buttons for a session's ``CallLifecycle``.
+
+    ``idle_note`` is shown under the status while no call is in progress.
+    Only a call in progress is polled (see ``live_call``).
+    """
+    if lifecycle.state in LIVE_STATES:
+        live_call(label, lifecycle, manager, session_id, stop_label, on_stop)
+        return
+    call_status(label, lifecycle.state)
+    if lifecycle.state == FAILED:
+        st.error(lifecycle.error)
+    elif idle_note:
+        st.caption(idle_note)
+    st.button(start_label, on_click=on_start, type="primary", use_container_width=True)